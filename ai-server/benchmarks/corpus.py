@@ -0,0 +1,414 @@
+"""
+벤치마크용 합성 기관 / 추천 요청 코퍼스
+
+기관 유형, 지역, 설명, 어르신 상태 어휘는 database/test_data.sql과 docs/test-institutions.md,
+docs/test-users.md에서, 태그는 utils/tag_vocabulary.py(Spring 태그 테이블)에서 가져와
+시드 하나로 같은 코퍼스를 몇 번이든 다시 만들 수 있습니다 (10만 개 이상도 스트리밍으로 생성).
+
+임베딩은 두 가지입니다.
+    - 실제 모델: --post로 API 대량 등록 엔드포인트에 보내 서버가 bge-m3로 임베딩
+    - 합성 벡터: 태그 / 유형 / 지역마다 임의 방향을 정하고 그 합 + 노이즈를 정규화한 벡터
+      (같은 태그를 가진 기관끼리 가깝고, 선호 태그로 만든 프로필 벡터가 그 기관들과 가까움)
+      모델 없이 검색 성능을 재거나(InMemoryCorpus) --load-db로 Postgres에 바로 적재할 때 사용
+
+실행 (ai-server 디렉토리에서):
+    python -m benchmarks.corpus --institutions 100000 --requests 1000 --output-dir ./bench_data
+    python -m benchmarks.corpus --institutions 100000 --load-db
+    python -m benchmarks.corpus --institutions 5000 --post http://localhost:8001
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.tag_vocabulary import TAG_VOCABULARY
+
+# database/test_data.sql의 기관 유형 + docs/test-institutions.md의 institutionType (한글)
+INSTITUTION_TYPES = ["요양원", "주간보호센터", "방문요양센터", "재활병원", "요양센터", "복지관"]
+INSTITUTION_TYPE_WEIGHTS = [0.35, 0.25, 0.2, 0.08, 0.07, 0.05]
+
+# 지역 (주소 접두어) → 대략적인 중심 좌표
+REGIONS: Dict[str, Tuple[float, float]] = {
+    "서울시 송파구": (37.5145, 127.1059),
+    "서울시 강남구": (37.4979, 127.0276),
+    "서울시 서초구": (37.4837, 127.0324),
+    "서울시 강서구": (37.5509, 126.8495),
+    "서울시 노원구": (37.6542, 127.0568),
+    "경기도 성남시 분당구": (37.3595, 127.1052),
+    "경기도 고양시 일산동구": (37.6584, 126.7748),
+    "경기도 의정부시": (37.7381, 127.0338),
+    "경기도 양평군": (37.4917, 127.4875),
+    "부산시 해운대구": (35.1631, 129.1635),
+}
+STREETS = ["올림픽로", "테헤란로", "서초대로", "봉은사로", "강남대로", "판교역로", "중앙로", "공원로", "강변로", "시장로"]
+
+NAME_PREFIXES = [
+    "사랑재", "행복한집", "푸른솔", "햇살", "평화의집", "참사랑", "새봄", "늘푸른",
+    "소망", "은빛", "한마음", "다정", "온누리", "하늘정원", "솔바람", "효심"
+]
+OPENING_HOURS = [
+    "24시간 운영", "평일 08:00~18:00", "평일 08:00~18:00, 토요일 09:00~15:00",
+    "평일 08:00~20:00", "평일 09:00~17:00"
+]
+DESCRIPTIONS = [
+    "치매 교육을 받은 요양보호사가 다수 근무하며 친절을 강조하는 기관입니다.",
+    "넓은 정원과 산책로가 있어 활동이 편리합니다.",
+    "당뇨와 고혈압 전문 관리 프로그램을 운영하며, 영양사가 직접 식단을 관리합니다.",
+    "뇌졸중 환자를 위한 전문 재활 프로그램과 물리치료를 제공합니다.",
+    "집에서 편안하게 돌봄을 받을 수 있는 재가 서비스입니다.",
+    "경도 인지 장애와 치매 초기 환자를 위한 인지 활동 프로그램을 운영합니다.",
+    "가톨릭 정신을 바탕으로 어르신들을 섬기는 요양원입니다.",
+    "중증 환자를 위한 집중 재활 치료를 제공합니다. 물리치료사가 상주합니다.",
+    "합리적인 비용으로 양질의 재가돌봄 서비스를 제공합니다.",
+    "한방 치료를 전문으로 하며 자연 속에서 한의학적 관리를 받을 수 있습니다.",
+    "최신 치매 관리 시스템과 가족 지원 프로그램을 운영합니다.",
+    "전문 재활 서비스를 제공하는 종합 의료 기관입니다.",
+    "어르신들을 위한 종합 복지 서비스와 여가활동 프로그램을 운영합니다.",
+]
+
+# docs/test-users.md / database/test_data.sql의 어르신 프로필 값
+GENDERS = ["MALE", "FEMALE"]
+ACTIVITY_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+COGNITIVE_LEVELS = ["NORMAL", "MILD_COGNITIVE_IMPAIRMENT", "MILD_DEMENTIA", "MODERATE_DEMENTIA", "SEVERE_DEMENTIA"]
+CARE_GRADES = ["GRADE_1", "GRADE_2", "GRADE_3", "GRADE_4", "GRADE_5"]
+NOTES = [
+    "당뇨 약 복용 중, 매일 오후 2시 복용. 가끔 길을 잃어버리는 증상이 있습니다.",
+    "6개월 전 뇌졸중으로 쓰러진 후 오른쪽 팔다리가 불편합니다. 적극적인 재활 치료가 필요합니다.",
+    "중증 치매로 24시간 집중 케어가 필요합니다. 배회 증상이 있어 안전 시설이 필수입니다.",
+    "집에서 생활하길 원하시고, 정기적인 방문 간호와 목욕 서비스가 필요합니다.",
+    "평생 가톨릭 신자로 매일 미사 참례를 원하십니다. 고혈압 약 복용 중입니다.",
+    "낙상 위험 있음",
+    "거동 불편",
+    "식이 조절 필요",
+]
+ADDITIONAL_TEXTS = [
+    "",
+    "사람이 너무 많은 곳은 힘들어하세요. 소규모로 운영되는 곳이면 좋겠습니다.",
+    "물리치료사가 상주하고 최신 재활 장비가 있는 곳을 찾고 있습니다.",
+    "일주일에 3회 정도 방문 요양 서비스와 주 1회 방문 목욕 서비스가 필요합니다.",
+    "배회 감지 시스템과 안전 시설이 완비된 곳을 찾고 있습니다.",
+    "매일 미사와 기도 시간이 있는 요양원을 찾고 있습니다.",
+]
+
+# 카테고리별 (기관 태그 수 범위, 선호 태그 수 범위)
+TAG_COUNTS = {
+    "specialized_diseases": ((1, 4), (0, 2)),
+    "service_types": ((1, 3), (0, 2)),
+    "operational_features": ((1, 5), (0, 2)),
+    "facility_features": ((2, 6), (0, 2)),
+}
+
+
+def _weights(size: int, rng: random.Random) -> List[float]:
+    """자주 쓰이는 태그와 드문 태그가 섞이도록 순위 역수 가중치 (순서는 시드로 섞음)"""
+    weights = [1.0 / (rank + 1) for rank in range(size)]
+    rng.shuffle(weights)
+    return weights
+
+
+def _sample_tags(rng: random.Random, tags: List[str], weights: List[float], count: int) -> List[str]:
+    chosen = []
+    while len(chosen) < min(count, len(tags)):
+        tag = rng.choices(tags, weights)[0]
+        if tag not in chosen:
+            chosen.append(tag)
+    return chosen
+
+
+def _jitter(rng: random.Random, center: Tuple[float, float], km: float) -> Tuple[float, float]:
+    """중심에서 최대 km 안쪽 임의 좌표 (위도 1도 ≈ 111km)"""
+    latitude = center[0] + rng.uniform(-km, km) / 111.0
+    longitude = center[1] + rng.uniform(-km, km) / (111.0 * math.cos(math.radians(center[0])))
+    return round(latitude, 6), round(longitude, 6)
+
+
+class CorpusGenerator:
+    """시드 하나로 기관 등록 요청 / 추천 요청 JSON(API 요청 본문 형식)을 결정적으로 생성"""
+    
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+        rng = random.Random(seed)
+        self.tag_weights = {category: _weights(len(tags), rng) for category, tags in TAG_VOCABULARY.items()}
+    
+    def institutions(self, count: int, start_id: int = 1) -> Iterator[dict]:
+        """InstitutionRequest 본문 (institutionId = start_id부터 연속)"""
+        rng = random.Random(self.seed * 1000003 + 1)
+        regions = list(REGIONS)
+        for offset in range(count):
+            institution_id = start_id + offset
+            institution_type = rng.choices(INSTITUTION_TYPES, INSTITUTION_TYPE_WEIGHTS)[0]
+            region = rng.choice(regions)
+            latitude, longitude = _jitter(rng, REGIONS[region], km=8.0)
+            tags = {
+                category: _sample_tags(rng, TAG_VOCABULARY[category], self.tag_weights[category], rng.randint(*counts[0]))
+                for category, counts in TAG_COUNTS.items()
+            }
+            yield {
+                "institutionId": institution_id,
+                "name": f"{rng.choice(NAME_PREFIXES)} {institution_type} {institution_id}",
+                "institutionType": institution_type,
+                "address": f"{region} {rng.choice(STREETS)} {rng.randint(1, 999)}",
+                "latitude": latitude,
+                "longitude": longitude,
+                "specializedDiseases": tags["specialized_diseases"],
+                "serviceTypes": tags["service_types"],
+                "operationalFeatures": tags["operational_features"],
+                "facilityFeatures": tags["facility_features"],
+                "openinggHours": rng.choice(OPENING_HOURS),  # InstitutionRequest의 alias 그대로
+                "description": " ".join(rng.sample(DESCRIPTIONS, rng.randint(1, 3))),
+            }
+    
+    def recommendation_requests(
+        self,
+        count: int,
+        limit: int = 5,
+        filter_ratio: float = 0.2,
+        geo_ratio: float = 0.5
+    ) -> Iterator[dict]:
+        """
+        RecommendationRequest 본문
+        
+        filter_ratio 비율은 기관 유형 필터를, geo_ratio 비율은 어르신 위치(위치 재정렬)를 포함합니다.
+        """
+        rng = random.Random(self.seed * 1000003 + 2)
+        regions = list(REGIONS)
+        for i in range(count):
+            region = rng.choice(regions)
+            preferred = {
+                category: _sample_tags(rng, TAG_VOCABULARY[category], self.tag_weights[category], rng.randint(*counts[1]))
+                for category, counts in TAG_COUNTS.items()
+            }
+            elderly = {
+                "elderlyProfileId": i + 1,
+                "name": f"어르신 {i + 1}",
+                "gender": rng.choice(GENDERS),
+                "birthDate": f"19{rng.randint(30, 55)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "activityLevel": rng.choice(ACTIVITY_LEVELS),
+                "cognitiveLevel": rng.choice(COGNITIVE_LEVELS),
+                "longTermCareGrade": rng.choice(CARE_GRADES),
+                "notes": rng.choice(NOTES),
+                "address": f"{region} {rng.choice(STREETS)} {rng.randint(1, 999)}",
+            }
+            if rng.random() < geo_ratio:
+                elderly["latitude"], elderly["longitude"] = _jitter(rng, REGIONS[region], km=5.0)
+            
+            request = {
+                "member": {
+                    "memberId": i + 1,
+                    "name": f"보호자 {i + 1}",
+                    "preferredSpecializedDiseases": preferred["specialized_diseases"],
+                    "preferredServiceTypes": preferred["service_types"],
+                    "preferredOperationalFeatures": preferred["operational_features"],
+                    "preferredFacilityFeatures": preferred["facility_features"],
+                },
+                "elderly": elderly,
+                "additionalText": rng.choice(ADDITIONAL_TEXTS),
+                "limit": limit,
+            }
+            if rng.random() < filter_ratio:
+                request["filters"] = {"institutionTypes": rng.sample(INSTITUTION_TYPES, rng.randint(1, 2))}
+            yield request
+
+
+class SyntheticEmbedder:
+    """
+    모델 없이 태그 구조를 반영한 정규화 벡터 생성
+    
+    태그 / 기관 유형 / 지역마다 고정된 임의 방향을 두고, 기관(또는 프로필)이 가진 항목들의
+    방향 합에 노이즈를 더해 정규화합니다. 묶음 단위로 (행 x 어휘) 소속 행렬 @ 방향 행렬로 계산합니다.
+    """
+    
+    def __init__(self, dimension: int = 1024, seed: int = 42, noise: float = 0.6):
+        self.dimension = dimension
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        vocabulary = [tag for tags in TAG_VOCABULARY.values() for tag in tags] + INSTITUTION_TYPES + list(REGIONS)
+        self.column = {key: i for i, key in enumerate(dict.fromkeys(vocabulary))}
+        directions = self.rng.standard_normal((len(self.column), dimension)).astype(np.float32)
+        self.directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+    
+    def _encode(self, keys_per_row: List[List[str]]) -> np.ndarray:
+        membership = np.zeros((len(keys_per_row), len(self.column)), dtype=np.float32)
+        for row, keys in enumerate(keys_per_row):
+            for key in keys:
+                if key in self.column:
+                    membership[row, self.column[key]] = 1.0
+        counts = np.maximum(membership.sum(axis=1, keepdims=True), 1.0)
+        vectors = membership @ self.directions / np.sqrt(counts)
+        vectors += self.noise * self.rng.standard_normal(vectors.shape).astype(np.float32) / np.sqrt(self.dimension)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    def institutions(self, institutions: List[dict]) -> np.ndarray:
+        return self._encode([
+            [
+                *inst["specializedDiseases"], *inst["serviceTypes"],
+                *inst["operationalFeatures"], *inst["facilityFeatures"],
+                inst["institutionType"], _region_of(inst["address"])
+            ]
+            for inst in institutions
+        ])
+    
+    def profiles(self, requests: List[dict]) -> np.ndarray:
+        return self._encode([
+            [
+                *request["member"]["preferredSpecializedDiseases"], *request["member"]["preferredServiceTypes"],
+                *request["member"]["preferredOperationalFeatures"], *request["member"]["preferredFacilityFeatures"],
+                _region_of(request["elderly"].get("address") or "")
+            ]
+            for request in requests
+        ])
+
+
+def _region_of(address: str) -> str:
+    for region in REGIONS:
+        if address.startswith(region):
+            return region
+    return ""
+
+
+def chunked(items: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def embedding_rows(institutions: List[dict], embeddings: np.ndarray) -> List[Tuple[int, np.ndarray, str, dict, str]]:
+    """기관 요청 + 벡터 → save_institution_embeddings_batch 행 (텍스트 / 메타데이터는 API와 같은 함수로)"""
+    from main import build_institution_text, build_institution_metadata
+    from models.institution import InstitutionRequest
+    from services.cache_service import hash_text
+    
+    rows = []
+    for inst, embedding in zip(institutions, embeddings):
+        request = InstitutionRequest(**inst)
+        text = build_institution_text(request)
+        rows.append((request.institution_id, embedding, text, build_institution_metadata(request), hash_text(text)))
+    return rows
+
+
+class InMemoryCorpus:
+    """
+    Postgres 대신 VectorIndex에 합성 코퍼스를 적재하는 읽기 전용 소스
+    
+    VectorIndex가 DatabaseService에서 쓰는 iter_institution_embeddings / current_timestamp만 제공합니다.
+        index = VectorIndex(InMemoryCorpus(...), version=1, persist=False); index.load()
+    """
+    
+    def __init__(self, count: int, seed: int = 42, dimension: int = 1024, chunk_size: int = 5000):
+        self.count = count
+        self.seed = seed
+        self.dimension = dimension
+        self.chunk_size = chunk_size
+    
+    def current_timestamp(self) -> str:
+        return time.strftime("%Y-%m-%d %H:%M:%S")
+    
+    def iter_institution_embeddings(
+        self,
+        since: Optional[str] = None,
+        chunk_size: int = 1000,
+        version: Optional[int] = None
+    ) -> Iterator[List[Tuple[int, np.ndarray, dict]]]:
+        from main import build_institution_metadata
+        from models.institution import InstitutionRequest
+        
+        embedder = SyntheticEmbedder(self.dimension, self.seed)
+        for chunk in chunked(CorpusGenerator(self.seed).institutions(self.count), self.chunk_size):
+            embeddings = embedder.institutions(chunk)
+            yield [
+                (inst["institutionId"], embedding, build_institution_metadata(InstitutionRequest(**inst)))
+                for inst, embedding in zip(chunk, embeddings)
+            ]
+
+
+def write_jsonl(path: str, items: Iterator[dict]) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_jsonl(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_db(generator: CorpusGenerator, count: int, chunk_size: int, seed: int):
+    """합성 벡터로 institution_embeddings에 바로 적재 (EMBEDDING_VERSION 버전, 모델 불필요)"""
+    from services.database_service import DatabaseService
+    
+    db_service = DatabaseService()
+    embedder = SyntheticEmbedder(seed=seed)
+    saved = 0
+    start = time.perf_counter()
+    try:
+        for chunk in chunked(generator.institutions(count), chunk_size):
+            saved += db_service.save_institution_embeddings_batch(embedding_rows(chunk, embedder.institutions(chunk)))
+    finally:
+        db_service.close()
+    return {"saved": saved, "seconds": round(time.perf_counter() - start, 1)}
+
+
+def post_bulk(generator: CorpusGenerator, count: int, chunk_size: int, url: str):
+    """API 대량 등록 엔드포인트로 전송 (서버가 실제 모델로 임베딩)"""
+    import httpx
+    
+    succeeded = failed = 0
+    start = time.perf_counter()
+    with httpx.Client(base_url=url, timeout=600) as client:
+        for chunk in chunked(generator.institutions(count), chunk_size):
+            response = client.post("/api/v1/institutions/embeddings/bulk", json=chunk)
+            response.raise_for_status()
+            body = response.json()
+            succeeded += body["succeeded"]
+            failed += body["failed"]
+    return {"succeeded": succeeded, "failed": failed, "seconds": round(time.perf_counter() - start, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 기관 / 추천 요청 코퍼스 생성")
+    parser.add_argument("--institutions", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default=None, help="institutions.jsonl / recommendation_requests.jsonl 저장 위치")
+    parser.add_argument("--load-db", action="store_true", help="합성 벡터로 Postgres에 바로 적재")
+    parser.add_argument("--post", default=None, help="API 서버 주소 (대량 등록 엔드포인트로 전송)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    
+    generator = CorpusGenerator(args.seed)
+    result = {"seed": args.seed, "institutions": args.institutions}
+    
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        result["files"] = {
+            "institutions.jsonl": write_jsonl(
+                os.path.join(args.output_dir, "institutions.jsonl"), generator.institutions(args.institutions)
+            ),
+            "recommendation_requests.jsonl": write_jsonl(
+                os.path.join(args.output_dir, "recommendation_requests.jsonl"),
+                generator.recommendation_requests(args.requests)
+            ),
+        }
+    if args.load_db:
+        result["load_db"] = load_db(generator, args.institutions, args.chunk_size, args.seed)
+    if args.post:
+        result["post"] = post_bulk(generator, args.institutions, min(args.chunk_size, 256), args.post)
+    
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
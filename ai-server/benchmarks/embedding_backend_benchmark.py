@@ -0,0 +1,181 @@
+"""
+임베딩 추론 백엔드(torch / onnx / onnx-int8) 지연 시간, 메모리, 정확도 비교
+
+백엔드마다 별도 프로세스에서 EmbeddingService를 띄워 측정하므로
+RSS(최대 상주 메모리)가 서로 섞이지 않습니다.
+    - 모델 로드 시간, 로드 후 / 측정 후 최대 RSS
+    - 단건 encode_text 지연 시간 (p50 / p95, 추천 요청 1건의 추론 비용)
+    - encode_batch 처리량 (texts/s, 대량 등록)
+    - torch 결과 대비 코사인 일치도 (평균 / 최소) 와 top-k 이웃 일치율
+
+실행 (ai-server 디렉토리에서, ONNX 모델은 scripts/export_onnx.py로 먼저 생성):
+    python -m benchmarks.embedding_backend_benchmark
+    python -m benchmarks.embedding_backend_benchmark --backends torch onnx-int8 --texts 200
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from utils.text_formatter import create_institution_text, create_user_profile_text
+
+DISEASES = ["치매", "당뇨", "고혈압", "뇌졸중", "파킨슨", "관절염"]
+SERVICES = ["주간보호", "장기요양", "방문요양", "재활치료", "단기보호"]
+OPERATIONS = ["치매 전담", "24시간 간호사", "물리치료사 상주", "영양사 식단 관리"]
+FACILITIES = ["정원", "예배실", "산책로", "1인실", "엘리베이터"]
+
+
+def sample_texts(count: int, seed: int) -> list:
+    """실제 요청과 비슷한 길이의 기관/프로필 텍스트 (절반씩)"""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        if i % 2 == 0:
+            texts.append(create_institution_text(
+                name=f"테스트 요양원 {i}",
+                institution_type=rng.choice(["요양원", "주간보호센터", "요양병원"]),
+                address=rng.choice(["서울시 송파구", "서울시 강남구", "부산시 해운대구"]),
+                specialized_diseases=rng.sample(DISEASES, 2),
+                service_types=rng.sample(SERVICES, 2),
+                operational_features=rng.sample(OPERATIONS, 2),
+                facility_features=rng.sample(FACILITIES, 2),
+                opening_hours="평일 08:00~20:00",
+                description="어르신 한 분 한 분의 상태에 맞춘 돌봄을 제공합니다. " * rng.randint(1, 4)
+            ))
+        else:
+            texts.append(create_user_profile_text(
+                member_name="보호자",
+                elderly_name=f"어르신 {i}",
+                gender=rng.choice(["MALE", "FEMALE"]),
+                birth_date="1940-01-01",
+                activity_level=rng.choice(["높음", "보통", "낮음"]),
+                cognitive_level=rng.choice(["정상", "경도 인지장애", "중등도 치매"]),
+                long_term_care_grade=rng.choice(["1등급", "3등급", "5등급"]),
+                notes="식사 시 도움이 필요하고 밤에 자주 깨십니다.",
+                address="서울시 송파구",
+                preferred_specialized_diseases=rng.sample(DISEASES, 1),
+                preferred_service_types=rng.sample(SERVICES, 1),
+                preferred_operational_features=rng.sample(OPERATIONS, 1),
+                preferred_facility_features=rng.sample(FACILITIES, 1),
+                additional_text=""
+            ))
+    return texts
+
+
+def max_rss_mb() -> float:
+    """현재 프로세스의 최대 RSS (Linux: KB 단위)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend: str, texts_path: str, output_path: str, batch_size: int):
+    """(자식 프로세스) 한 백엔드를 측정하고 임베딩은 .npy, 결과는 stdout JSON으로"""
+    os.environ["EMBEDDING_BACKEND"] = backend
+    import logging
+    logging.disable(logging.INFO)
+    from services.embedding_service import EmbeddingService
+    
+    with open(texts_path, encoding="utf-8") as f:
+        texts = json.load(f)
+    
+    start = time.perf_counter()
+    service = EmbeddingService()
+    load_seconds = time.perf_counter() - start
+    rss_after_load = max_rss_mb()
+    
+    # 워밍업 (첫 호출의 그래프 최적화/메모리 할당 제외)
+    service.encode_batch(texts[:4], batch_size=batch_size)
+    
+    latencies = []
+    single = []
+    for text in texts:
+        start = time.perf_counter()
+        single.append(service.encode_text(text))
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    service.encode_batch(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+    
+    np.save(output_path, np.stack(single).astype(np.float32))
+    print(json.dumps({
+        "load_seconds": round(load_seconds, 1),
+        "rss_after_load_mb": round(rss_after_load),
+        "peak_rss_mb": round(max_rss_mb()),
+        "single_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "single_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "batch_texts_per_second": round(len(texts) / batch_seconds, 1)
+    }))
+
+
+def agreement(reference: np.ndarray, embeddings: np.ndarray, k: int = 10) -> dict:
+    """같은 텍스트의 코사인 유사도, 그리고 텍스트 간 top-k 이웃이 얼마나 같은지"""
+    cosine = np.sum(reference * embeddings, axis=1)
+    k = min(k, len(reference) - 1)
+    ref_top = np.argsort(-(reference @ reference.T), axis=1)[:, 1:k + 1]
+    top = np.argsort(-(embeddings @ embeddings.T), axis=1)[:, 1:k + 1]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top.tolist(), top.tolist())]
+    return {
+        "cosine_mean": round(float(cosine.mean()), 5),
+        "cosine_min": round(float(cosine.min()), 5),
+        f"neighbors@{k}_overlap": round(float(np.mean(overlap)), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 추론 백엔드 비교")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--texts", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--texts-path", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output-path", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args.worker, args.texts_path, args.output_path, args.batch_size)
+        return
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        texts_path = os.path.join(workdir, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump(sample_texts(args.texts, args.seed), f, ensure_ascii=False)
+        
+        report = {}
+        embeddings = {}
+        for backend in args.backends:
+            output_path = os.path.join(workdir, f"{backend}.npy")
+            completed = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.embedding_backend_benchmark",
+                    "--worker", backend, "--texts-path", texts_path,
+                    "--output-path", output_path, "--batch-size", str(args.batch_size)
+                ],
+                capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                report[backend] = {"error": completed.stderr.strip().splitlines()[-1:]}
+                continue
+            report[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            embeddings[backend] = np.load(output_path)
+        
+        if "torch" in embeddings:
+            for backend, values in embeddings.items():
+                if backend != "torch":
+                    report[backend]["parity_vs_torch"] = agreement(embeddings["torch"], values)
+                    report[backend]["speedup_p50"] = round(
+                        report["torch"]["single_p50_ms"] / report[backend]["single_p50_ms"], 2
+                    )
+    
+    print(json.dumps({"texts": args.texts, "batch_size": args.batch_size, "backends": report}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+/api/v1/recommendations 부하 테스트 (동시성 단계별 처리량 / 지연 시간)
+
+동시성 단계마다 워커 N개가 합성 추천 요청(benchmarks.corpus)을 쉬지 않고 보내고
+    - 처리량 (성공 요청/s), 상태 코드별 건수
+    - 지연 시간 p50 / p95 / p99 / 최대
+    - 응답의 Server-Timing 헤더로 본 서버 단계별(embed / search / rank ...) p50 / p95
+를 JSON으로 출력합니다. 단계마다 --warmup초는 측정에서 제외합니다.
+서버는 미리 띄워 둡니다 (pgvector 컨테이너 또는 SEARCH_BACKEND=memory).
+같은 요청이 반복되면 서버 캐시에 맞으므로 --queries는 측정 요청 수보다 넉넉하게 잡거나
+캐시를 끈 서버(PROFILE_EMBEDDING_CACHE_SIZE=0, SEARCH_RESULT_CACHE_SIZE=0)로 측정하세요.
+
+실행 (ai-server 디렉토리에서, httpx 필요):
+    python -m benchmarks.load_test --url http://localhost:8001 --concurrency 1 4 16 --duration 30
+    python -m benchmarks.load_test --requests-file ./bench_data/recommendation_requests.jsonl --output after.json
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.corpus import CorpusGenerator, read_jsonl
+from benchmarks.results import emit, latency_summary, run_info
+
+ENDPOINT = "/api/v1/recommendations"
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'embed;dur=12.3, search;dur=4.1' → {'embed': 12.3, 'search': 4.1}"""
+    stages = {}
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and value:
+                stages[name] = float(value)
+    return stages
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    requests: itertools.cycle,
+    concurrency: int,
+    duration: float,
+    warmup: float
+) -> dict:
+    """동시성 concurrency로 warmup + duration초 동안 요청, 측정 구간의 결과만 집계"""
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    deadline = measure_from + duration
+    
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    stages: Dict[str, List[float]] = defaultdict(list)
+    
+    async def worker():
+        while loop.time() < deadline:
+            body = next(requests)
+            start = loop.time()
+            try:
+                response = await client.post(ENDPOINT, json=body)
+            except httpx.HTTPError as e:
+                if start >= measure_from:
+                    errors[type(e).__name__] += 1
+                continue
+            elapsed_ms = (loop.time() - start) * 1000
+            if start < measure_from:
+                continue
+            
+            statuses[str(response.status_code)] += 1
+            if response.status_code == 200:
+                latencies.append(elapsed_ms)
+                for name, value in parse_server_timing(response.headers.get("server-timing", "")).items():
+                    stages[name].append(value)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # 마지막 요청이 deadline을 넘겨 끝날 수 있으므로 실제 측정 구간 길이로 나눔
+    measured = max(time.perf_counter() - started - warmup, 1e-9)
+    
+    stage_summary = {}
+    for name, values in stages.items():
+        summary = latency_summary(values)
+        stage_summary[name] = {"p50_ms": summary["p50_ms"], "p95_ms": summary["p95_ms"]}
+    
+    return {
+        "concurrency": concurrency,
+        "seconds": round(measured, 2),
+        "throughput_rps": round(len(latencies) / measured, 2),
+        "statuses": dict(statuses),
+        "errors": dict(errors),
+        "latency": latency_summary(latencies),
+        "server_stages": stage_summary,
+    }
+
+
+async def run(args) -> dict:
+    if args.requests_file:
+        bodies = read_jsonl(args.requests_file)
+    else:
+        bodies = list(CorpusGenerator(args.seed).recommendation_requests(args.queries, limit=args.limit))
+    requests = itertools.cycle(bodies)
+    
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        ready = await client.get("/ready")
+        if ready.status_code != 200:
+            raise SystemExit(f"서버가 준비되지 않았습니다: {ready.status_code} {ready.text}")
+        
+        levels = []
+        for concurrency in args.concurrency:
+            levels.append(await run_level(client, requests, concurrency, args.duration, args.warmup))
+    return {"endpoint": ENDPOINT, "request_pool": len(bodies), "levels": levels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/api/v1/recommendations 부하 테스트")
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=30.0, help="동시성 단계별 측정 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="단계별 측정 전 워밍업 (초)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--requests-file", default=None, help="추천 요청 JSONL (없으면 합성 요청 생성)")
+    parser.add_argument("--queries", type=int, default=5000, help="합성 요청 수")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="결과 JSON 파일")
+    args = parser.parse_args()
+    
+    result = {"run": run_info("load_test", **vars(args))}
+    result.update(asyncio.run(run(args)))
+    emit(result, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+추천 파이프라인 단계별 마이크로 벤치마크 (텍스트 생성 / 임베딩 / 검색)
+    
+    - text: 기관 등록 텍스트, 추천 요청 → 프로필 텍스트 (API와 같은 함수)
+    - encode: EmbeddingService 단건 encode_text 지연 시간, 배치 크기별 encode_batch 처리량
+    - search: 시나리오별(필터 없음 / 기관 유형 필터 / 반경 5km / 합성 요청 혼합) 단건 검색 지연 시간,
+              memory 백엔드는 search_many(대량 추천) 쿼리당 시간도 측정
+
+검색 백엔드:
+    - memory: benchmarks.corpus의 합성 코퍼스를 VectorIndex(persist=False)에 적재 (DB / 모델 불필요)
+    - pgvector: 현재 DB의 institution_embeddings (python -m benchmarks.corpus --load-db로 같은 시드 코퍼스 적재)
+쿼리 벡터는 같은 시드의 합성 프로필 벡터이므로 두 백엔드가 같은 코퍼스 / 쿼리로 측정됩니다.
+
+실행 (ai-server 디렉토리에서):
+    python -m benchmarks.pipeline_benchmark --sections text search --institutions 100000
+    python -m benchmarks.pipeline_benchmark --sections search --backend pgvector --output before.json
+"""
+import argparse
+import itertools
+import logging
+import time
+
+import numpy as np
+
+from benchmarks.corpus import CorpusGenerator, InMemoryCorpus, SyntheticEmbedder
+from benchmarks.results import emit, latency_summary, run_info, time_calls
+
+# 반경 시나리오 기준점 (서울시 송파구)
+RADIUS_ORIGIN = (37.5145, 127.1059)
+
+
+def ops_summary(latencies_ms: list) -> dict:
+    summary = latency_summary(latencies_ms)
+    summary["ops_per_second"] = round(1000 / summary["mean_ms"], 1) if summary.get("mean_ms") else None
+    return summary
+
+
+def benchmark_text(institutions: list, requests: list, repeat: int) -> dict:
+    from main import build_institution_text, build_recommendation_profile_text
+    from models.institution import InstitutionRequest
+    from models.recommendation import RecommendationRequest
+    
+    institution_models = itertools.cycle([InstitutionRequest(**inst) for inst in institutions])
+    request_models = itertools.cycle([RecommendationRequest(**request) for request in requests])
+    return {
+        "institution_text": ops_summary(time_calls(lambda: build_institution_text(next(institution_models)), repeat)),
+        "profile_text": ops_summary(time_calls(lambda: build_recommendation_profile_text(next(request_models)), repeat)),
+    }
+
+
+def benchmark_encode(institutions: list, requests: list, repeat: int, batch_sizes: list) -> dict:
+    """EmbeddingService를 이 프로세스에서 로드 (EMBEDDING_BACKEND 등 서버와 같은 환경변수 사용)"""
+    from main import build_institution_text, build_recommendation_profile_text
+    from models.institution import InstitutionRequest
+    from models.recommendation import RecommendationRequest
+    from services.embedding_service import EmbeddingService
+    
+    profile_texts = [build_recommendation_profile_text(RecommendationRequest(**request)) for request in requests]
+    institution_texts = [build_institution_text(InstitutionRequest(**inst)) for inst in institutions]
+    
+    start = time.perf_counter()
+    service = EmbeddingService()
+    report = {"backend": service.backend, "load_seconds": round(time.perf_counter() - start, 1)}
+    
+    texts = itertools.cycle(profile_texts)
+    report["single_profile"] = latency_summary(time_calls(lambda: service.encode_text(next(texts)), repeat))
+    
+    report["batch"] = {}
+    for batch_size in batch_sizes:
+        texts = institution_texts[:max(batch_size * 4, batch_size)]
+        service.encode_batch(texts[:batch_size], batch_size=batch_size)  # 워밍업
+        start = time.perf_counter()
+        service.encode_batch(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        report["batch"][str(batch_size)] = {
+            "texts": len(texts),
+            "texts_per_second": round(len(texts) / seconds, 1),
+            "ms_per_text": round(seconds / len(texts) * 1000, 3),
+        }
+    return report
+
+
+def search_scenarios(requests: list) -> dict:
+    """시나리오 이름 → 요청별 (limit, filters) 목록"""
+    from main import plan_recommendation_search
+    from models.recommendation import RecommendationRequest
+    
+    mixed = []
+    for request in requests:
+        filters, _, _, fetch_limit = plan_recommendation_search(RecommendationRequest(**request))
+        mixed.append((fetch_limit, filters))
+    
+    count = len(requests)
+    return {
+        "top5": [(5, None)] * count,
+        "type_filter": [(5, {"institution_types": ["주간보호센터"]})] * count,
+        "radius_5km": [(25, {
+            "origin_latitude": RADIUS_ORIGIN[0],
+            "origin_longitude": RADIUS_ORIGIN[1],
+            "max_distance_km": 5.0
+        })] * count,
+        "mixed_requests": mixed,
+    }
+
+
+def benchmark_search(backend, queries: np.ndarray, requests: list, repeat: int, batch_size: int) -> dict:
+    report = {}
+    for name, plans in search_scenarios(requests).items():
+        cases = itertools.cycle(zip(queries, plans))
+        
+        def search_next():
+            query, (limit, filters) = next(cases)
+            return backend.search_similar_institutions(user_embedding=query, limit=limit, filters=filters)
+        
+        report[name] = latency_summary(time_calls(search_next, repeat))
+        
+        if hasattr(backend, "search_many"):
+            chunk = slice(0, min(batch_size, len(queries)))
+            latencies = time_calls(
+                lambda: backend.search_many(
+                    queries[chunk], [limit for limit, _ in plans[chunk]], [filters for _, filters in plans[chunk]]
+                ),
+                max(repeat // batch_size, 3)
+            )
+            report[name]["search_many_ms_per_query"] = round(float(np.mean(latencies)) / (chunk.stop - chunk.start), 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 파이프라인 단계별 마이크로 벤치마크")
+    parser.add_argument("--sections", nargs="+", default=["text", "search"], choices=["text", "encode", "search"])
+    parser.add_argument("--backend", default="memory", choices=["memory", "pgvector"], help="검색 백엔드")
+    parser.add_argument("--institutions", type=int, default=20000, help="memory 백엔드 합성 코퍼스 크기")
+    parser.add_argument("--queries", type=int, default=500, help="합성 추천 요청 수")
+    parser.add_argument("--repeat", type=int, default=500, help="항목별 측정 횟수")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--search-batch", type=int, default=64, help="search_many 한 번의 쿼리 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="결과 JSON 파일")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    generator = CorpusGenerator(args.seed)
+    requests = list(generator.recommendation_requests(args.queries))
+    sample_institutions = list(generator.institutions(min(args.institutions, 2000)))
+    
+    result = {"run": run_info("pipeline", **vars(args))}
+    
+    if "text" in args.sections:
+        result["text"] = benchmark_text(sample_institutions, requests, args.repeat)
+    
+    if "encode" in args.sections:
+        try:
+            result["encode"] = benchmark_encode(sample_institutions, requests, min(args.repeat, 200), args.batch_sizes)
+        except Exception as e:
+            result["encode"] = {"error": str(e)}
+    
+    if "search" in args.sections:
+        queries = SyntheticEmbedder(seed=args.seed).profiles(requests)
+        start = time.perf_counter()
+        if args.backend == "memory":
+            from services.vector_index import VectorIndex
+            backend = VectorIndex(InMemoryCorpus(args.institutions, seed=args.seed), version=1, persist=False)
+            backend.load()
+            corpus_size = backend.size
+        else:
+            from services.database_service import DatabaseService
+            backend = DatabaseService()
+            corpus_size = backend.count_institutions()
+        
+        try:
+            result["search"] = {
+                "backend": args.backend,
+                "corpus_size": corpus_size,
+                "load_seconds": round(time.perf_counter() - start, 1),
+                "scenarios": benchmark_search(backend, queries, requests, args.repeat, args.search_batch),
+            }
+        finally:
+            if args.backend == "pgvector":
+                backend.close()
+    
+    emit(result, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+압축 임베딩 저장 모드별 메모리 / recall@k 비교
+
+각 모드(full, halfvec, int8, binary)에 대해
+    - 벡터 1개당 바이트 수와 전체 메모리
+    - 압축 표현만으로 고른 top-k의 recall@k
+    - 압축 표현으로 k * rerank_factor개 후보를 고른 뒤 원본 벡터로 재정렬한 recall@k
+    - 쿼리당 1차 검색 시간
+을 측정해 JSON으로 출력합니다. 정답은 float32 전수 검색 결과입니다.
+
+실행 (ai-server 디렉토리에서):
+    python -m benchmarks.quantization_benchmark --synthetic 20000
+    python -m benchmarks.quantization_benchmark --from-db --k 10 --rerank-factor 4
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from utils.quantization import quantize_int8, int8_scores, binary_codes, hamming_distances
+
+
+def synthetic_corpus(size: int, dimension: int, seed: int) -> np.ndarray:
+    """군집 구조를 가진 정규화 벡터 (실제 기관 임베딩처럼 유사한 기관끼리 모여 있도록)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(size // 200, 1), dimension)).astype(np.float32)
+    labels = rng.integers(0, centers.shape[0], size)
+    corpus = centers[labels] + 0.8 * rng.standard_normal((size, dimension)).astype(np.float32)
+    return corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+
+
+def load_corpus_from_db() -> np.ndarray:
+    """institution_embeddings 전체를 float32 행렬로 읽기"""
+    from services.database_service import DatabaseService
+    
+    db_service = DatabaseService()
+    try:
+        vectors = [
+            embedding
+            for rows in db_service.iter_institution_embeddings()
+            for _, embedding, _ in rows
+        ]
+    finally:
+        db_service.close()
+    return np.stack(vectors).astype(np.float32)
+
+
+def make_queries(corpus: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """코퍼스 벡터에 노이즈를 섞은 쿼리 (사용자 프로필이 기관과 완전히 같지는 않으므로)"""
+    rng = np.random.default_rng(seed + 1)
+    base = corpus[rng.integers(0, corpus.shape[0], count)]
+    queries = base + 0.6 * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(corpus.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 높은 순 상위 k개 행 번호"""
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(truth.tolist())) / len(truth)
+
+
+def benchmark(corpus: np.ndarray, queries: np.ndarray, k: int, rerank_factor: int) -> dict:
+    n, dimension = corpus.shape
+    num_candidates = min(n, k * rerank_factor)
+    
+    half = corpus.astype(np.float16)
+    codes = quantize_int8(corpus)
+    bits = binary_codes(corpus)
+    
+    modes = {
+        "full": (4 * dimension, lambda q: corpus @ q),
+        "halfvec": (2 * dimension, lambda q: (half @ q.astype(np.float16)).astype(np.float32)),
+        "int8": (dimension, lambda q: int8_scores(codes, q)),
+        "binary": (dimension // 8, lambda q: -hamming_distances(bits, binary_codes(q)).astype(np.float32)),
+    }
+    
+    truths = [top_k(corpus @ q, k) for q in queries]
+    report = {}
+    
+    for mode, (bytes_per_vector, score) in modes.items():
+        first_stage_recalls = []
+        reranked_recalls = []
+        elapsed = 0.0
+        
+        for q, truth in zip(queries, truths):
+            start = time.perf_counter()
+            scores = score(q)
+            elapsed += time.perf_counter() - start
+            
+            first_stage_recalls.append(recall(top_k(scores, k), truth))
+            
+            candidates = top_k(scores, num_candidates)
+            reranked = candidates[top_k(corpus[candidates] @ q, k)]
+            reranked_recalls.append(recall(reranked, truth))
+        
+        report[mode] = {
+            "bytes_per_vector": bytes_per_vector,
+            "total_mb": round(bytes_per_vector * n / 1024 / 1024, 2),
+            "compression": round(4 * dimension / bytes_per_vector, 1),
+            f"recall@{k}": round(float(np.mean(first_stage_recalls)), 4),
+            f"recall@{k}_reranked": round(float(np.mean(reranked_recalls)), 4),
+            "first_stage_ms_per_query": round(elapsed / len(queries) * 1000, 3),
+        }
+    
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="압축 임베딩 모드별 메모리 / recall@k 벤치마크")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=20000, help="합성 기관 벡터 수")
+    source.add_argument("--from-db", action="store_true", help="institution_embeddings 실제 벡터 사용")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    if args.from_db:
+        corpus = load_corpus_from_db()
+    else:
+        corpus = synthetic_corpus(args.synthetic, args.dimension, args.seed)
+    queries = make_queries(corpus, args.queries, args.seed)
+    
+    result = {
+        "corpus_size": corpus.shape[0],
+        "dimension": corpus.shape[1],
+        "queries": len(queries),
+        "k": args.k,
+        "rerank_factor": args.rerank_factor,
+        "modes": benchmark(corpus, queries, args.k, args.rerank_factor),
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+벤치마크 결과 공통 형식
+
+모든 벤치마크는 결과 dict에 실행 환경(run)을 붙여 JSON으로 출력하고, --output을 주면 파일로도 저장합니다.
+같은 코퍼스 시드 / 크기로 실행한 두 결과 파일을 비교하면 변경 전후를 볼 수 있습니다.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+def latency_summary(latencies_ms: List[float]) -> dict:
+    """지연 시간(ms) 목록 → 건수 / 평균 / p50 / p95 / p99 / 최대"""
+    if not latencies_ms:
+        return {"count": 0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def time_calls(fn, repeat: int, warmup: int = 3) -> List[float]:
+    """fn()을 warmup번 실행한 뒤 repeat번 호출한 각 지연 시간(ms)"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def run_info(benchmark: str, **params) -> dict:
+    """결과 비교용 실행 환경 (커밋, 호스트, 파라미터)"""
+    return {
+        "benchmark": benchmark,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+
+def emit(result: dict, output: Optional[str] = None):
+    """결과를 stdout에 출력하고 output이 있으면 파일로도 저장"""
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
@@ -1,15 +1,44 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse, Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
+import os
 import time
+from typing import Dict, List, Optional, Tuple
 
-from models.institution import InstitutionRequest, InstitutionResponse
+from models.institution import (
+    InstitutionRequest,
+    InstitutionResponse,
+    InstitutionBulkItemResult,
+    InstitutionBulkResponse
+)
 from models.user import Member, ElderlyProfile
-from models.recommendation import RecommendationResponse, RecommendationItem, RecommendationRequest
-from services.embedding_service import EmbeddingService
+from models.recommendation import (
+    RecommendationResponse,
+    RecommendationItem,
+    RecommendationRequest,
+    BulkRecommendationResult
+)
+from models.embedding_job import BatchUpdateRequest, BatchUpdateStatus
 from services.database_service import DatabaseService
-from utils.text_formatter import create_institution_text, create_user_profile_text
+from services.inference_queue import InferenceQueue
+from services.inference_client import RemoteInferenceClient
+from services.vector_index import VectorIndex
+from services.tag_matcher import TagMatcher
+from services.embedding_snapshot import EmbeddingSnapshot
+from services.two_stage_retriever import TwoStageRetriever
+from services.reembedding_job import ReembeddingJob, JOB_OWNER, job_status
+from services.cache_service import LRUTTLCache, SingleFlight, hash_text, hash_embedding, hash_request
+from utils.text_formatter import create_institution_text, create_user_profile_text, create_recommendation_reason
+from utils.geo import rank_by_distance
+from utils.embedding_format import EmbeddingFormat, encode_embedding
+from utils.snapshot import SnapshotDecoder, SNAPSHOT_MEDIA_TYPE
+from utils.lexical import LexicalEmbedding, colbert_to_int8
+from utils.metrics import MetricsMiddleware, render_metrics, stage, record_stage_error
 
 # 로깅 설정
 logging.basicConfig(
@@ -19,37 +48,441 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # 전역 서비스 인스턴스
-embedding_service = None
+embedding_service = None  # EMBEDDING_VERSION(빌드 버전) 모델 (INFERENCE_MODE=local)
 db_service = None
+inference_queue = None  # InferenceQueue 또는 RemoteInferenceClient
+vector_index = None
+# 유사도 검색 백엔드 (DatabaseService 또는 VectorIndex, 동일한 search_similar_institutions 제공)
+search_backend = None
+# RETRIEVAL_MODE=two_stage: dense + sparse 후보 → multi-vector 재정렬
+two_stage_retriever: Optional[TwoStageRetriever] = None
+# 추천 이유용 태그 매칭 (버전별 태그 임베딩 캐시)
+tag_matcher: Optional[TagMatcher] = None
+# pgvector 모드의 대량 추천용 인메모리 기관 행렬 (처음 대량 추천 시 로드)
+bulk_index: Optional[VectorIndex] = None
+bulk_index_lock = asyncio.Lock()
+# 이 프로세스에서 실행 중(또는 마지막으로 실행한) 재임베딩 작업
+reembedding_job: Optional[ReembeddingJob] = None
+# 프로필 임베딩 / 검색에 사용하는 임베딩 버전
+# (DB의 embedding_settings.active_version을 따르며, 모델과 메모리 인덱스가 준비된 뒤에 바뀜)
+active_version: Optional[int] = None
+version_watch_task: Optional[asyncio.Task] = None
+vector_index_sync_task: Optional[asyncio.Task] = None
+data_version_watch_task: Optional[asyncio.Task] = None
+
+# pgvector: Postgres에서 검색 / memory: 인메모리 벡터 인덱스에서 검색
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "pgvector")
+# dense: 프로필 임베딩 ANN 검색 / two_stage: bge-m3 sparse·multi-vector로 후보 생성 + 재정렬
+# (two_stage는 database/two_stage_retrieval.sql 필요, 기관 저장 시 sparse·multi-vector도 저장)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense").lower()
+
+# 프로필 텍스트 해시 → 임베딩
+profile_embedding_cache = LRUTTLCache(
+    "profile_embedding",
+    maxsize=int(os.getenv("PROFILE_EMBEDDING_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("PROFILE_EMBEDDING_CACHE_TTL", "3600"))
+)
+# (임베딩 해시, limit, 필터, 기관 데이터 버전) → 검색 결과
+# 이 서버의 저장은 바로, 다른 워커/서버의 저장은 DATA_VERSION_REFRESH_SECONDS 안에 무효화
+# (메모리 모드는 인덱스가 변경분을 반영한 뒤, DB에 시퀀스가 없으면 TTL까지)
+search_result_cache = LRUTTLCache(
+    "search_result",
+    maxsize=int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("SEARCH_RESULT_CACHE_TTL", "300"))
+)
+# 동시에 들어온 같은 요청은 한 번만 계산 (재시도, 여러 위젯, 연타)
+# 추천: (검색 버전, 요청 해시) / 프로필 임베딩: 프로필 캐시 키
+recommendation_flight = SingleFlight("recommendation")
+profile_embedding_flight = SingleFlight("profile_embedding")
+
+# 대량 등록 시 한 번에 임베딩/저장할 기관 수
+BULK_CHUNK_SIZE = int(os.getenv("BULK_EMBEDDING_CHUNK_SIZE", "256"))
+# 모델 forward pass 한 번에 넣을 텍스트 수
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+# 대량 추천: 한 번에 임베딩/검색할 프로필 수, 요청당 최대 프로필 수, 동시 실행 수
+BULK_RECOMMENDATION_CHUNK_SIZE = int(os.getenv("BULK_RECOMMENDATION_CHUNK_SIZE", "64"))
+BULK_RECOMMENDATION_MAX_REQUESTS = int(os.getenv("BULK_RECOMMENDATION_MAX_REQUESTS", "10000"))
+bulk_recommendation_semaphore = asyncio.Semaphore(int(os.getenv("BULK_RECOMMENDATION_CONCURRENCY", "1")))
+
+# 위치 기반 정렬: (1 - 가중치) * 유사도 + 가중치 * exp(-거리 / 감쇠 거리)
+GEO_DISTANCE_WEIGHT = float(os.getenv("GEO_DISTANCE_WEIGHT", "0.3"))
+GEO_DECAY_KM = float(os.getenv("GEO_DECAY_KM", "10"))
+# 위치 정렬 시 limit의 몇 배를 유사도 후보로 가져올지
+GEO_CANDIDATE_FACTOR = int(os.getenv("GEO_CANDIDATE_FACTOR", "5"))
+
+# local: 이 프로세스에서 모델 로드 / remote: 추론 서버(python -m services.inference_server)에 Unix 소켓으로 위임
+# API_WORKERS > 1이면 remote로 실행해 모델을 워커 수만큼 로드하지 않도록
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "local").lower()
+# uvicorn 워커 프로세스 수 (추론 스레드 수는 추론 쪽 INFERENCE_THREADS로 따로 지정)
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+# 다른 서버가 바꾼 active_version을 확인하는 주기 (초)
+EMBEDDING_VERSION_REFRESH_SECONDS = float(os.getenv("EMBEDDING_VERSION_REFRESH_SECONDS", "10"))
+# 인메모리 인덱스(memory 모드 / 대량 추천 스냅샷)에 다른 서버의 저장·삭제를 반영하는 주기 (초, 0이면 끔)
+VECTOR_INDEX_SYNC_SECONDS = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", "30"))
+# 다른 워커/서버의 기관 저장을 확인해 검색 결과 캐시를 무효화하는 주기 (초, 0이면 끔)
+DATA_VERSION_REFRESH_SECONDS = float(os.getenv("DATA_VERSION_REFRESH_SECONDS", "2"))
+
+# 재임베딩 작업: heartbeat가 이 시간 이상 끊긴 running 작업은 중단된 것으로 보고 재개 가능
+REEMBEDDING_STALE_SECONDS = float(os.getenv("REEMBEDDING_STALE_SECONDS", "300"))
+# 시작 시 중단된(interrupted / 비정상 종료) 재임베딩 작업을 이어서 실행
+REEMBEDDING_AUTO_RESUME = os.getenv("REEMBEDDING_AUTO_RESUME", "true").lower() == "true"
+
+# 시작 상태 (/ready)
+# 서버는 바로 떠서 /health(liveness)에 응답하고, 모델 로드/워밍업은 백그라운드에서 진행
+ready = False
+startup_error: Optional[str] = None
+startup_phases: Dict[str, float] = {}
+startup_task: Optional[asyncio.Task] = None
+
+
+async def run_startup_phase(name: str, fn, *args):
+    """시작 단계 하나를 실행(동기 함수는 스레드에서)하고 소요 시간 기록"""
+    start = time.time()
+    if asyncio.iscoroutinefunction(fn):
+        result = await fn(*args)
+    else:
+        result = await run_in_threadpool(fn, *args)
+    startup_phases[name] = round(time.time() - start, 2)
+    logger.info(f"⏱️ 시작 단계 '{name}' 완료 ({startup_phases[name]}s)")
+    return result
+
+
+def live_versions() -> List[int]:
+    """저장할 임베딩 버전 (전환 중이면 검색 중인 버전과 새 버전 모두)"""
+    return sorted({active_version, db_service.embedding_version})
+
+
+async def start_local_inference():
+    """버전별 모델 로드 → 추론 큐 → 워밍업 (이 프로세스가 모델을 직접 들고 추론)"""
+    global embedding_service
+    # API 워커가 remote 모드일 때 torch / sentence-transformers를 import하지 않도록 여기서 import
+    from services.embedding_service import load_encoders, WARMUP_SEQ_LENGTHS, WARMUP_BATCH_SIZES
+    
+    encoders = await run_startup_phase("model_load", load_encoders, live_versions())
+    embedding_service = encoders[db_service.embedding_version]
+    
+    queue = InferenceQueue(encoders, loader=load_encoders)
+    await queue.start()
+    
+    if WARMUP_SEQ_LENGTHS and WARMUP_BATCH_SIZES:
+        for encoder in {id(encoder): encoder for encoder in encoders.values()}.values():
+            await run_startup_phase("warm_up", encoder.warm_up, WARMUP_SEQ_LENGTHS, WARMUP_BATCH_SIZES)
+    return queue
+
+
+async def warm_up_loaded_versions(versions: List[int]):
+    """버전 전환으로 새로 로드한 모델 워밍업 (remote 모드는 추론 서버가 로드하면서 워밍업)"""
+    if INFERENCE_MODE == "remote" or not versions:
+        return
+    from services.embedding_service import WARMUP_SEQ_LENGTHS, WARMUP_BATCH_SIZES
+    if not (WARMUP_SEQ_LENGTHS and WARMUP_BATCH_SIZES):
+        return
+    
+    encoders = inference_queue.encoders
+    # 다른 버전과 같은 모델을 쓰는 버전은 이미 워밍업됨
+    warm = {id(encoders[version]) for version in encoders if version not in versions}
+    for encoder in {id(encoders[version]): encoders[version] for version in versions}.values():
+        if id(encoder) not in warm:
+            await run_in_threadpool(encoder.warm_up, WARMUP_SEQ_LENGTHS, WARMUP_BATCH_SIZES)
+
+
+async def start_remote_inference():
+    """추론 서버 연결 → 검색/저장 버전 모델을 추론 서버에 로드 (로드/워밍업은 추론 서버가 수행)"""
+    client = RemoteInferenceClient()
+    await run_startup_phase("inference_connect", client.start)
+    await run_startup_phase("model_load", client.ensure_versions, live_versions())
+    return client
+
+
+async def initialize_services():
+    """DB 연결 → 추론(로컬 모델 로드·워밍업 / 추론 서버 연결) → (메모리 인덱스) 순서로 초기화 후 ready"""
+    global db_service, inference_queue, vector_index, search_backend, tag_matcher, ready, startup_error
+    global active_version, version_watch_task, vector_index_sync_task, data_version_watch_task, two_stage_retriever
+    
+    start = time.time()
+    try:
+        if SEARCH_BACKEND == "memory" and API_WORKERS > 1:
+            # 워커마다 같은 인덱스 파일(VECTOR_INDEX_DIR)을 따로 쓰게 되므로 허용하지 않음
+            raise ValueError("SEARCH_BACKEND=memory는 API_WORKERS=1에서만 사용할 수 있습니다.")
+        if RETRIEVAL_MODE not in ("dense", "two_stage"):
+            raise ValueError(f"지원하지 않는 RETRIEVAL_MODE: {RETRIEVAL_MODE}")
+        
+        db_service = await run_startup_phase("database", DatabaseService)
+        active_version = db_service.active_version
+        search_backend = db_service
+        
+        if INFERENCE_MODE == "remote":
+            inference_queue = await start_remote_inference()
+        else:
+            inference_queue = await start_local_inference()
+        logger.info(
+            f"🔎 임베딩 버전: 검색 v{active_version}, 빌드 v{db_service.embedding_version} "
+            f"(추론: {INFERENCE_MODE})"
+        )
+        
+        if SEARCH_BACKEND == "memory":
+            index = VectorIndex(db_service, active_version)
+            await run_startup_phase("vector_index", index.load)
+            db_service.add_write_listener(index.on_write)
+            vector_index = index
+            search_backend = index
+        if RETRIEVAL_MODE == "two_stage":
+            two_stage_retriever = TwoStageRetriever(db_service)
+        logger.info(f"🔎 검색 백엔드: {SEARCH_BACKEND} (검색 방식: {RETRIEVAL_MODE})")
+        
+        tag_matcher = TagMatcher(inference_queue)
+        await run_startup_phase("tag_embeddings", tag_matcher.prepare, active_version)
+        
+        startup_phases["total"] = round(time.time() - start, 2)
+        ready = True
+        logger.info(f"✅ 모든 서비스 초기화 완료 (단계별 소요 시간: {startup_phases})")
+        
+        version_watch_task = asyncio.create_task(watch_active_version())
+        if VECTOR_INDEX_SYNC_SECONDS > 0:
+            vector_index_sync_task = asyncio.create_task(sync_vector_indexes())
+        if DATA_VERSION_REFRESH_SECONDS > 0:
+            data_version_watch_task = asyncio.create_task(watch_data_version())
+        if REEMBEDDING_AUTO_RESUME:
+            await resume_interrupted_reembedding_job()
+    
+    except Exception as e:
+        startup_error = str(e)
+        logger.error(f"❌ 서비스 초기화 실패: {startup_error}")
+
+
+async def apply_active_version():
+    """
+    DB의 active_version을 이 프로세스에 반영
+    
+    새 버전 모델과 (메모리 모드) 새 버전 인덱스를 먼저 준비하고, 준비가 끝난 뒤
+    active_version 대입 한 번으로 프로필 임베딩과 검색이 함께 새 버전으로 넘어갑니다.
+    그 전까지는 이전 버전이 계속 응답합니다.
+    """
+    global active_version, vector_index, search_backend, bulk_index
+    
+    version = await run_in_threadpool(db_service.refresh_active_version)
+    if version == active_version:
+        return
+    
+    loaded = await inference_queue.ensure_versions([version])
+    # 전환 직후 요청이 첫 추론(cold start) 비용을 내지 않도록 active_version 대입 전에 워밍업
+    await warm_up_loaded_versions(loaded)
+    await tag_matcher.prepare(version)
+    
+    previous_index = None
+    if vector_index and vector_index.version != version:
+        index = VectorIndex(db_service, version)
+        await run_in_threadpool(index.load)
+        db_service.add_write_listener(index.on_write)
+        previous_index = vector_index
+        vector_index = index
+        search_backend = index
+    
+    previous = active_version
+    active_version = version
+    logger.info(f"✅ 검색 임베딩 버전 전환: v{previous} → v{version}")
+    
+    if previous_index:
+        db_service.remove_write_listener(previous_index.on_write)
+        await run_in_threadpool(previous_index.save)
+    if bulk_index is not None and bulk_index.version != version:
+        # 대량 추천 스냅샷은 다음 호출 시 새 버전으로 다시 로드
+        db_service.remove_write_listener(bulk_index.on_write)
+        bulk_index = None
+    # 더 이상 검색/저장에 쓰지 않는 버전의 모델 해제
+    inference_queue.release_versions(live_versions())
+    tag_matcher.release([version])
+
+
+async def watch_active_version():
+    """다른 서버(또는 재임베딩 작업)가 전환한 active_version을 주기적으로 반영"""
+    while True:
+        await asyncio.sleep(EMBEDDING_VERSION_REFRESH_SECONDS)
+        try:
+            await apply_active_version()
+        except Exception as e:
+            logger.error(f"❌ 임베딩 버전 확인 실패: {str(e)}")
+
+
+async def sync_vector_indexes():
+    """인메모리 인덱스에 DB 변경분(다른 서버 / 재임베딩 / 가져오기 / 삭제)을 주기적으로 반영"""
+    while True:
+        await asyncio.sleep(VECTOR_INDEX_SYNC_SECONDS)
+        for index in {id(index): index for index in (vector_index, bulk_index) if index is not None}.values():
+            try:
+                if await run_in_threadpool(index.refresh):
+                    # 인덱스가 바뀌기 전에 계산해 캐시한 결과는 버림
+                    db_service.invalidate_local_results()
+            except Exception as e:
+                logger.error(f"❌ 벡터 인덱스 v{index.version} 동기화 실패: {str(e)}")
+
+
+async def watch_data_version():
+    """다른 워커/서버가 저장한 기관 데이터를 검색 결과 캐시에 반영 (공유 시퀀스 확인)"""
+    while True:
+        await asyncio.sleep(DATA_VERSION_REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(db_service.refresh_data_version)
+        except Exception as e:
+            logger.error(f"❌ 기관 데이터 버전 확인 실패: {str(e)}")
+
+
+async def resume_interrupted_reembedding_job():
+    """배포/재시작으로 중단된 마지막 재임베딩 작업이 있으면 이어서 실행"""
+    global reembedding_job
+    
+    try:
+        job = await run_in_threadpool(db_service.get_embedding_job)
+        if job is None or job["status"] not in ("running", "indexing", "interrupted"):
+            return
+        
+        # 다른 서버가 실행 중이면(heartbeat가 살아 있으면) None
+        claimed = await run_in_threadpool(
+            db_service.claim_embedding_job, job["job_id"], JOB_OWNER, REEMBEDDING_STALE_SECONDS
+        )
+        if claimed is None:
+            return
+        
+        reembedding_job = ReembeddingJob(db_service, inference_queue, claimed)
+        reembedding_job.start()
+    
+    except Exception as e:
+        logger.error(f"❌ 재임베딩 작업 재개 실패: {str(e)}")
+
+
+async def require_ready():
+    """모델/DB가 필요한 엔드포인트: 초기화 전이면 503"""
+    if not ready:
+        raise HTTPException(
+            status_code=503,
+            detail="서버 초기화 중입니다." if startup_error is None else f"서버 초기화 실패: {startup_error}"
+        )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """앱 시작/종료 시 실행"""
-    global embedding_service, db_service
+    global startup_task
     
     logger.info("🚀 AI 서버 시작 중...")
-    
-    # 서비스 초기화
-    embedding_service = EmbeddingService()
-    db_service = DatabaseService()
-    
-    logger.info("✅ 모든 서비스 초기화 완료")
+    startup_task = asyncio.create_task(initialize_services())
     
     yield
     
     # 종료 시 정리
     logger.info("🛑 AI 서버 종료 중...")
+    if not startup_task.done():
+        startup_task.cancel()
+    if version_watch_task:
+        version_watch_task.cancel()
+    if vector_index_sync_task:
+        vector_index_sync_task.cancel()
+    if data_version_watch_task:
+        data_version_watch_task.cancel()
+    if reembedding_job:
+        await reembedding_job.stop()
+    if inference_queue:
+        await inference_queue.stop()
+    if vector_index:
+        vector_index.save()
     if db_service:
         db_service.close()
 
 
+class TimedJSONResponse(ORJSONResponse):
+    """
+    기본 응답 클래스: orjson 직렬화 + 직렬화 시간을 serialize 단계로 기록
+    
+    dict 안의 numpy 배열은 orjson이 그대로 직렬화합니다 (tolist 불필요).
+    pydantic 모델을 넘기면 model_dump_json 한 번으로 직렬화하므로, 엔드포인트에서 모델을
+    TimedJSONResponse로 감싸 반환하면 response_model 재검증(모델 → dict → 검증 → JSON)을 건너뜁니다.
+    (response_model은 OpenAPI 문서용으로 유지)
+    """
+    
+    def render(self, content) -> bytes:
+        with stage("serialize"):
+            if isinstance(content, BaseModel):
+                return content.model_dump_json(by_alias=True).encode("utf-8")
+            return super().render(content)
+
+
 # FastAPI 앱 생성
 app = FastAPI(
     title="Caring AI Server",
     description="요양 기관 추천 AI 서버",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
+# 요청 / 단계별 지표 + Server-Timing 헤더 (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
+
+def build_institution_text(request: InstitutionRequest) -> str:
+    """기관 등록 요청 → 임베딩용 텍스트"""
+    return create_institution_text(
+        name=request.name,
+        institution_type=request.institution_type,
+        address=request.address,
+        specialized_diseases=request.specialized_diseases or [],
+        service_types=request.service_types or [],
+        operational_features=request.operational_features or [],
+        facility_features=request.facility_features or [],
+        opening_hours=request.opening_hours or "",
+        description=request.description or ""
+    )
+
+
+def build_institution_metadata(request: InstitutionRequest) -> dict:
+    """기관 등록 요청 → institution_embeddings.metadata"""
+    return {
+        "name": request.name,
+        "type": request.institution_type,
+        "address": request.address,
+        "latitude": request.latitude,
+        "longitude": request.longitude,
+        "specialized_diseases": request.specialized_diseases or [],
+        "service_types": request.service_types or [],
+        "operational_features": request.operational_features or [],
+        "facility_features": request.facility_features or [],
+        # 템플릿 변경 시 재임베딩 작업이 텍스트를 다시 만들 수 있도록 나머지 입력도 보관
+        "opening_hours": request.opening_hours or "",
+        "description": request.description or ""
+    }
+
+
+async def encode_profile_text(user_text: str, version: int):
+    """프로필 텍스트 → version 모델 임베딩 (같은 텍스트는 캐시에서 반환)"""
+    cache_key = (version, hash_text(user_text))
+    embedding = profile_embedding_cache.get(cache_key)
+    if embedding is None:
+        async def encode():
+            embedding = await inference_queue.encode(user_text, version, kind="profile")
+            embedding.flags.writeable = False  # 캐시 공유 객체이므로 변경 방지
+            profile_embedding_cache.set(cache_key, embedding)
+            return embedding
+        
+        # 캐시에 없는 같은 텍스트가 동시에 들어와도 추론은 한 번
+        embedding = await profile_embedding_flight.run(cache_key, encode)
+    return embedding
+
+
+async def encode_profile_lexical(user_text: str, version: int) -> LexicalEmbedding:
+    """프로필 텍스트 → version 모델의 dense / sparse / multi-vector (2단계 검색용, 캐시 사용)"""
+    cache_key = (version, "lexical", hash_text(user_text))
+    embedding = profile_embedding_cache.get(cache_key)
+    if embedding is None:
+        async def encode():
+            embedding = await inference_queue.encode(user_text, version, kind="profile", lexical=True)
+            embedding.dense.flags.writeable = False  # 캐시 공유 객체이므로 변경 방지
+            embedding.colbert.flags.writeable = False
+            profile_embedding_cache.set(cache_key, embedding)
+            return embedding
+        
+        embedding = await profile_embedding_flight.run(cache_key, encode)
+    return embedding
 
 
 @app.get("/")
@@ -60,15 +493,63 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """헬스 체크"""
+    """헬스 체크 (liveness: 프로세스가 살아 있으면 200, 초기화 여부와 무관)"""
     return {
         "status": "healthy",
-        "embedding_service": "loaded" if embedding_service else "not loaded",
-        "database": "connected" if db_service else "not connected"
+        "ready": ready,
+        "embedding_service": "remote" if INFERENCE_MODE == "remote" else ("loaded" if embedding_service else "not loaded"),
+        "embedding_backend": embedding_service.backend if embedding_service else None,
+        "embedding_version": {
+            "active": active_version,
+            "build": db_service.embedding_version if db_service else None
+        },
+        "database": "connected" if db_service else "not connected",
+        "database_pool": db_service.pool_stats() if db_service else None,
+        "inference": inference_queue.stats() if inference_queue else None,
+        "tag_matcher": tag_matcher.stats() if tag_matcher else None,
+        "search_backend": SEARCH_BACKEND,
+        "retrieval": {
+            "mode": RETRIEVAL_MODE,
+            **(two_stage_retriever.stats() if two_stage_retriever else {})
+        },
+        "reembedding_job": reembedding_job.status() if reembedding_job and reembedding_job.running else None,
+        "vector_index": vector_index.stats() if vector_index else None,
+        "cache": {
+            "profile_embedding": profile_embedding_cache.stats(),
+            "search_result": search_result_cache.stats()
+        },
+        "coalescing": {
+            "recommendation": recommendation_flight.stats(),
+            "profile_embedding": profile_embedding_flight.stats()
+        }
     }
 
 
-@app.post("/api/v1/institutions/embeddings", response_model=InstitutionResponse)
+@app.get("/ready")
+async def readiness_check():
+    """
+    레디니스 체크 (모델 로드 + 워밍업 + DB 연결이 끝나야 200, 그 전에는 503)
+    
+    시작 후에도 추론(remote 모드면 추론 서버 소켓)이 응답하지 않으면 503을 반환합니다.
+    """
+    inference_ok = ready and await inference_queue.healthy()
+    body = {
+        "ready": inference_ok,
+        "inference": inference_ok if ready else None,
+        "startup_phases": startup_phases,
+        "error": startup_error
+    }
+    return JSONResponse(status_code=200 if inference_ok else 503, content=body)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 지표 (요청/단계별 소요 시간, 추론 배치, DB 쿼리, 본문 크기, 단계별 오류)"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@app.post("/api/v1/institutions/embeddings", response_model=InstitutionResponse, dependencies=[Depends(require_ready)])
 async def create_institution_embedding(request: InstitutionRequest):
     """
     기능 1: 기관 정보를 받아서 임베딩 생성 및 저장
@@ -79,52 +560,68 @@ async def create_institution_embedding(request: InstitutionRequest):
         logger.info(f"📥 기관 등록 요청 수신: ID={request.institution_id}, 이름={request.name}")
         
         # 1. 기관 정보 → 텍스트 변환
-        institution_text = create_institution_text(
-            name=request.name,
-            institution_type=request.institution_type,
-            address=request.address,
-            specialized_diseases=request.specialized_diseases or [],
-            service_types=request.service_types or [],
-            operational_features=request.operational_features or [],
-            facility_features=request.facility_features or [],
-            opening_hours=request.opening_hours or "",
-            description=request.description or ""
-        )
+        with stage("text"):
+            institution_text = build_institution_text(request)
+            content_hash = hash_text(institution_text)
         
         logger.info(f"📝 텍스트 변환 완료 (길이: {len(institution_text)}자)")
         logger.debug(f"변환된 텍스트:\n{institution_text}")
         
-        # 2. 텍스트 → 임베딩 변환
-        embedding = embedding_service.encode_text(institution_text)
-        
-        # 3. 메타데이터 준비
-        metadata = {
-            "name": request.name,
-            "type": request.institution_type,
-            "address": request.address,
-            "specialized_diseases": request.specialized_diseases or [],
-            "service_types": request.service_types or [],
-            "operational_features": request.operational_features or [],
-            "facility_features": request.facility_features or []
-        }
+        # 2. 메타데이터 준비
+        metadata = build_institution_metadata(request)
         
-        # 4. DB에 저장
-        db_service.save_institution_embedding(
-            institution_id=request.institution_id,
-            embedding=embedding,
-            original_text=institution_text,
-            metadata=metadata
-        )
+        # 3. 임베딩 텍스트가 저장된 것과 같으면 metadata만 갱신하고 종료 (추론/벡터 쓰기 생략)
+        with stage("refresh"):
+            refreshed = await run_in_threadpool(
+                db_service.refresh_metadata_if_unchanged,
+                request.institution_id, content_hash, metadata
+            )
+        if refreshed:
+            logger.info(f"✅ 기관 ID {request.institution_id} 처리 완료 (텍스트 변경 없음, 재임베딩 생략)")
+            return TimedJSONResponse(InstitutionResponse(
+                success=True,
+                institution_id=request.institution_id,
+                message="임베딩 텍스트 변경이 없어 메타데이터만 갱신되었습니다.",
+                reembedded=False
+            ))
+        
+        # 4~5. 버전별 텍스트 → 임베딩 변환 후 저장 (전환 중이면 검색 중인 버전과 새 버전 모두)
+        lexical = two_stage_retriever is not None
+        for version in live_versions():
+            # 추론 큐에서 다른 요청과 함께 배치 처리
+            with stage("embed"):
+                embedding = await inference_queue.encode(institution_text, version, kind="institution", lexical=lexical)
+            if lexical:
+                # 2단계 검색: 같은 forward pass의 sparse / multi-vector도 저장
+                lexical_embedding, embedding = embedding, embedding.dense
+            
+            # DB에 저장 (풀 커넥션을 쓰는 동기 호출이므로 스레드풀에서 실행)
+            with stage("save"):
+                await run_in_threadpool(
+                    db_service.save_institution_embedding,
+                    institution_id=request.institution_id,
+                    embedding=embedding,
+                    original_text=institution_text,
+                    metadata=metadata,
+                    content_hash=content_hash,
+                    version=version
+                )
+                if lexical:
+                    await run_in_threadpool(db_service.save_lexical_embeddings, [(
+                        request.institution_id, content_hash,
+                        lexical_embedding.sparse, colbert_to_int8(lexical_embedding.colbert)
+                    )], version)
         
         logger.info(f"✅ 기관 ID {request.institution_id} 처리 완료")
         
-        return InstitutionResponse(
+        return TimedJSONResponse(InstitutionResponse(
             success=True,
             institution_id=request.institution_id,
             message="기관 임베딩이 성공적으로 생성 및 저장되었습니다.",
-            embedding_dimension=len(embedding)
-        )
-        
+            embedding_dimension=len(embedding),
+            reembedded=True
+        ))
+    
     except Exception as e:
         logger.error(f"❌ 기관 임베딩 생성 실패: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -133,6 +630,118 @@ async def create_institution_embedding(request: InstitutionRequest):
         )
 
 
+@app.post("/api/v1/institutions/embeddings/bulk", response_model=InstitutionBulkResponse, dependencies=[Depends(require_ready)])
+async def create_institution_embeddings_bulk(requests: List[InstitutionRequest]):
+    """
+    기능 1-1: 여러 기관을 한 번에 임베딩 생성 및 저장
+    
+    지역 온보딩 등 초기 적재용입니다.
+    BULK_CHUNK_SIZE 단위로 encode_batch → 한 번의 UPSERT/트랜잭션으로 처리하며,
+    기관별 성공/실패 여부를 반환합니다.
+    임베딩 텍스트가 바뀌지 않은 기관은 metadata만 갱신하고 추론에서 제외합니다.
+    같은 institution_id가 두 번 이상 있으면 한 번의 UPSERT로 저장할 수 없으므로(같은 행을 두 번 갱신) 422로 거절합니다.
+    """
+    logger.info(f"📥 기관 대량 등록 요청 수신: {len(requests)}개")
+    
+    seen, duplicates = set(), set()
+    for request in requests:
+        if request.institution_id in seen:
+            duplicates.add(request.institution_id)
+        seen.add(request.institution_id)
+    if duplicates:
+        raise HTTPException(
+            status_code=422,
+            detail=f"같은 institution_id가 여러 번 포함되어 있습니다: {sorted(duplicates)}"
+        )
+    start_time = time.time()
+    
+    results = {}
+    
+    for chunk_start in range(0, len(requests), BULK_CHUNK_SIZE):
+        chunk = requests[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        
+        # 1. 기관 정보 → 텍스트 변환 (기관별로 실패 처리)
+        prepared = []
+        with stage("text"):
+            for request in chunk:
+                try:
+                    prepared.append((request, build_institution_text(request)))
+                except Exception as e:
+                    record_stage_error("text")
+                    results[request.institution_id] = (False, f"텍스트 변환 실패: {str(e)}", False)
+        
+        if not prepared:
+            continue
+        
+        try:
+            # 2. 텍스트가 그대로인 기관은 metadata만 갱신
+            with stage("refresh"):
+                refreshed = await run_in_threadpool(db_service.refresh_metadata_if_unchanged_batch, [
+                    (request.institution_id, hash_text(text), build_institution_metadata(request))
+                    for request, text in prepared
+                ])
+            for request, _ in prepared:
+                if request.institution_id in refreshed:
+                    results[request.institution_id] = (True, "임베딩 텍스트 변경이 없어 메타데이터만 갱신되었습니다.", False)
+            prepared = [(request, text) for request, text in prepared if request.institution_id not in refreshed]
+            if not prepared:
+                continue
+            
+            # 3~4. 버전별 텍스트 → 임베딩 변환 (청크 단위 배치) 후 한 번의 UPSERT로 저장
+            lexical = two_stage_retriever is not None
+            for version in live_versions():
+                with stage("embed"):
+                    embeddings = await inference_queue.encode_many(
+                        [text for _, text in prepared],
+                        version,
+                        batch_size=EMBEDDING_BATCH_SIZE,
+                        kind="institution",
+                        lexical=lexical
+                    )
+                if lexical:
+                    lexical_embeddings, embeddings = embeddings, [embedding.dense for embedding in embeddings]
+                with stage("save"):
+                    await run_in_threadpool(db_service.save_institution_embeddings_batch, [
+                        (request.institution_id, embedding, text, build_institution_metadata(request), hash_text(text))
+                        for (request, text), embedding in zip(prepared, embeddings)
+                    ], version)
+                    if lexical:
+                        await run_in_threadpool(db_service.save_lexical_embeddings, [
+                            (request.institution_id, hash_text(text), embedding.sparse, colbert_to_int8(embedding.colbert))
+                            for (request, text), embedding in zip(prepared, lexical_embeddings)
+                        ], version)
+            
+            for request, _ in prepared:
+                results[request.institution_id] = (True, "기관 임베딩이 성공적으로 생성 및 저장되었습니다.", True)
+        
+        except Exception as e:
+            logger.error(f"❌ 청크 처리 실패 (시작 인덱스 {chunk_start}): {str(e)}", exc_info=True)
+            for request, _ in prepared:
+                results[request.institution_id] = (False, f"임베딩 생성/저장 실패: {str(e)}", False)
+    
+    items = [
+        InstitutionBulkItemResult(institution_id=institution_id, success=ok, message=message, reembedded=reembedded)
+        for institution_id, (ok, message, reembedded) in results.items()
+    ]
+    succeeded = sum(1 for item in items if item.success)
+    skipped = sum(1 for item in items if item.success and not item.reembedded)
+    
+    elapsed = time.time() - start_time
+    logger.info(
+        f"✅ 기관 대량 등록 완료: 성공 {succeeded}개 (재임베딩 생략 {skipped}개), "
+        f"실패 {len(items) - succeeded}개 ({elapsed:.1f}s)"
+    )
+    
+    return TimedJSONResponse(InstitutionBulkResponse(
+        success=succeeded == len(items),
+        total=len(items),
+        succeeded=succeeded,
+        failed=len(items) - succeeded,
+        skipped=skipped,
+        results=items
+    ))
+
+
 @app.post("/api/v1/users/profile-text")
 async def generate_user_profile_text(
     member: Member,
@@ -149,22 +758,23 @@ async def generate_user_profile_text(
         logger.info(f"📥 사용자 프로필 텍스트 생성 요청: 회원={member.name}, 어르신={elderlyProfile.name}")
         
         # 사용자 프로필 → 텍스트 변환
-        user_text = create_user_profile_text(
-            member_name=member.name,
-            elderly_name=elderlyProfile.name,
-            gender=elderlyProfile.gender.value,
-            birth_date=str(elderlyProfile.birthDate) if elderlyProfile.birthDate else "",
-            activity_level=elderlyProfile.activityLevel.value if elderlyProfile.activityLevel else "",
-            cognitive_level=elderlyProfile.cognitiveLevel.value if elderlyProfile.cognitiveLevel else "",
-            long_term_care_grade=elderlyProfile.longTermCareGrade.value if elderlyProfile.longTermCareGrade else "",
-            notes=elderlyProfile.notes or "",
-            address=elderlyProfile.address or "",
-            preferred_specialized_diseases=elderlyProfile.preferredSpecializedDiseases,
-            preferred_service_types=elderlyProfile.preferredServiceTypes,
-            preferred_operational_features=elderlyProfile.preferredOperationalFeatures,
-            preferred_facility_features=elderlyProfile.preferredFacilityFeatures,
-            additional_text=additionalText
-        )
+        with stage("text"):
+            user_text = create_user_profile_text(
+                member_name=member.name,
+                elderly_name=elderlyProfile.name,
+                gender=elderlyProfile.gender.value,
+                birth_date=str(elderlyProfile.birthDate) if elderlyProfile.birthDate else "",
+                activity_level=elderlyProfile.activityLevel.value if elderlyProfile.activityLevel else "",
+                cognitive_level=elderlyProfile.cognitiveLevel.value if elderlyProfile.cognitiveLevel else "",
+                long_term_care_grade=elderlyProfile.longTermCareGrade.value if elderlyProfile.longTermCareGrade else "",
+                notes=elderlyProfile.notes or "",
+                address=elderlyProfile.address or "",
+                preferred_specialized_diseases=elderlyProfile.preferredSpecializedDiseases,
+                preferred_service_types=elderlyProfile.preferredServiceTypes,
+                preferred_operational_features=elderlyProfile.preferredOperationalFeatures,
+                preferred_facility_features=elderlyProfile.preferredFacilityFeatures,
+                additional_text=additionalText
+            )
         
         logger.info(f"✅ 사용자 프로필 텍스트 생성 완료 (길이: {len(user_text)}자)")
         
@@ -175,7 +785,7 @@ async def generate_user_profile_text(
             "profileText": user_text,
             "textLength": len(user_text)
         }
-        
+    
     except Exception as e:
         logger.error(f"❌ 사용자 프로필 텍스트 생성 실패: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -184,11 +794,12 @@ async def generate_user_profile_text(
         )
 
 
-@app.post("/api/v1/users/profile-embedding")
+@app.post("/api/v1/users/profile-embedding", dependencies=[Depends(require_ready)])
 async def generate_user_profile_embedding(
     member: Member,
     elderlyProfile: ElderlyProfile,
-    additionalText: str = ""
+    additionalText: str = "",
+    embeddingFormat: EmbeddingFormat = "json"
 ):
     """
     기능 5: 사용자 데이터를 받아서 임베딩으로 변환
@@ -197,44 +808,57 @@ async def generate_user_profile_embedding(
     1. 텍스트로 변환
     2. 임베딩으로 변환
     3. 임베딩 벡터 반환
+    
+    embeddingFormat=base64-f32 / base64-f16이면 임베딩을 little-endian 바이트의 base64 문자열로
+    반환합니다 (응답의 embeddingFormat / embeddingDtype로 디코딩, utils/embedding_format 참고).
     """
     try:
         logger.info(f"📥 사용자 프로필 임베딩 생성 요청: 회원={member.name}, 어르신={elderlyProfile.name}")
         
         # 1. 사용자 프로필 → 텍스트 변환
-        user_text = create_user_profile_text(
-            member_name=member.name,
-            elderly_name=elderlyProfile.name,
-            gender=elderlyProfile.gender.value,
-            birth_date=str(elderlyProfile.birthDate) if elderlyProfile.birthDate else "",
-            activity_level=elderlyProfile.activityLevel.value if elderlyProfile.activityLevel else "",
-            cognitive_level=elderlyProfile.cognitiveLevel.value if elderlyProfile.cognitiveLevel else "",
-            long_term_care_grade=elderlyProfile.longTermCareGrade.value if elderlyProfile.longTermCareGrade else "",
-            notes=elderlyProfile.notes or "",
-            address=elderlyProfile.address or "",
-            preferred_specialized_diseases=elderlyProfile.preferredSpecializedDiseases,
-            preferred_service_types=elderlyProfile.preferredServiceTypes,
-            preferred_operational_features=elderlyProfile.preferredOperationalFeatures,
-            preferred_facility_features=elderlyProfile.preferredFacilityFeatures,
-            additional_text=additionalText
-        )
+        with stage("text"):
+            user_text = create_user_profile_text(
+                member_name=member.name,
+                elderly_name=elderlyProfile.name,
+                gender=elderlyProfile.gender.value,
+                birth_date=str(elderlyProfile.birthDate) if elderlyProfile.birthDate else "",
+                activity_level=elderlyProfile.activityLevel.value if elderlyProfile.activityLevel else "",
+                cognitive_level=elderlyProfile.cognitiveLevel.value if elderlyProfile.cognitiveLevel else "",
+                long_term_care_grade=elderlyProfile.longTermCareGrade.value if elderlyProfile.longTermCareGrade else "",
+                notes=elderlyProfile.notes or "",
+                address=elderlyProfile.address or "",
+                preferred_specialized_diseases=elderlyProfile.preferredSpecializedDiseases,
+                preferred_service_types=elderlyProfile.preferredServiceTypes,
+                preferred_operational_features=elderlyProfile.preferredOperationalFeatures,
+                preferred_facility_features=elderlyProfile.preferredFacilityFeatures,
+                additional_text=additionalText
+            )
         
         logger.info(f"📝 텍스트 변환 완료 (길이: {len(user_text)}자)")
         
-        # 2. 텍스트 → 임베딩 변환
-        embedding = embedding_service.encode_text(user_text)
+        # 2. 텍스트 → 임베딩 변환 (같은 프로필은 캐시 사용)
+        version = active_version
+        with stage("embed"):
+            embedding = await encode_profile_text(user_text, version)
         
         logger.info(f"✅ 사용자 프로필 임베딩 생성 완료 (차원: {len(embedding)})")
         
-        return {
+        # 3. 응답 포맷으로 인코딩 (json이면 numpy 배열을 그대로 orjson이 직렬화)
+        encoded, dtype = encode_embedding(embedding, embeddingFormat)
+        
+        # dict를 그대로 반환하면 jsonable_encoder가 1024개 float를 하나씩 변환하므로 응답 객체로 반환
+        return TimedJSONResponse({
             "success": True,
             "memberId": member.memberId,
             "elderlyProfileId": elderlyProfile.elderlyProfileId,
             "profileText": user_text,
-            "embedding": embedding.tolist(),  # numpy array를 list로 변환
-            "embeddingDimension": len(embedding)
-        }
-        
+            "embedding": encoded,
+            "embeddingFormat": embeddingFormat,
+            "embeddingDtype": dtype,
+            "embeddingDimension": len(embedding),
+            "embeddingVersion": version
+        })
+    
     except Exception as e:
         logger.error(f"❌ 사용자 프로필 임베딩 생성 실패: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -243,7 +867,182 @@ async def generate_user_profile_embedding(
         )
 
 
-@app.post("/api/v1/recommendations", response_model=RecommendationResponse)
+def build_recommendation_profile_text(request: RecommendationRequest) -> str:
+    """추천 요청 → 프로필 텍스트"""
+    member = request.member
+    elderly = request.elderly
+    return create_user_profile_text(
+        member_name=member.name,
+        elderly_name=elderly.name,
+        gender=elderly.gender,
+        birth_date=elderly.birthDate or "",
+        activity_level=elderly.activityLevel or "",
+        cognitive_level=elderly.cognitiveLevel or "",
+        long_term_care_grade=elderly.longTermCareGrade or "",
+        notes=elderly.notes or "",
+        address=elderly.address or "",
+        preferred_specialized_diseases=member.preferredSpecializedDiseases,
+        preferred_service_types=member.preferredServiceTypes,
+        preferred_operational_features=member.preferredOperationalFeatures,
+        preferred_facility_features=member.preferredFacilityFeatures,
+        additional_text=request.additionalText or ""
+    )
+
+
+def plan_recommendation_search(request: RecommendationRequest) -> Tuple[Optional[dict], Optional[Tuple[float, float]], float, int]:
+    """추천 요청 → (검색 필터, 위치 기준점, 거리 가중치, 가져올 후보 수)"""
+    member = request.member
+    elderly = request.elderly
+    filters = request.filters.to_search_filters() if request.filters else None
+    
+    # 위치 기준점: 어르신 위치 우선, 없으면 회원 위치
+    origin = None
+    if elderly.latitude is not None and elderly.longitude is not None:
+        origin = (elderly.latitude, elderly.longitude)
+    elif member.latitude is not None and member.longitude is not None:
+        origin = (member.latitude, member.longitude)
+    
+    distance_weight = GEO_DISTANCE_WEIGHT if request.distanceWeight is None else request.distanceWeight
+    if origin is not None and request.maxDistanceKm is not None:
+        filters = {
+            **(filters or {}),
+            "origin_latitude": origin[0],
+            "origin_longitude": origin[1],
+            "max_distance_km": request.maxDistanceKm
+        }
+    # 거리로 재정렬할 때는 유사도 후보를 넉넉히 가져옴
+    geo_ranking = origin is not None and distance_weight > 0
+    fetch_limit = request.limit * GEO_CANDIDATE_FACTOR if geo_ranking else request.limit
+    return filters, origin, distance_weight, fetch_limit
+
+
+def build_recommendation_items(
+    request: RecommendationRequest,
+    similar_institutions: List[dict],
+    origin: Optional[Tuple[float, float]],
+    distance_weight: float,
+    version: int
+) -> List[RecommendationItem]:
+    """유사도 검색 결과 → (위치 재정렬) → 추천 이유 → RecommendationItem 목록"""
+    member = request.member
+    
+    # 위치 기준 하이브리드 점수로 후보 전체를 한 번에 재정렬
+    distances = [None] * len(similar_institutions)
+    order = range(len(similar_institutions))
+    if origin is not None:
+        ranked, distance_array = rank_by_distance(
+            similar_institutions, origin[0], origin[1],
+            distance_weight=distance_weight,
+            decay_km=GEO_DECAY_KM,
+            max_distance_km=request.maxDistanceKm
+        )
+        distances = [None if d != d else round(float(d), 2) for d in distance_array.tolist()]  # NaN → None
+        if distance_weight > 0:
+            order = ranked.tolist()
+    
+    # 추천 이유: 선호 태그와 기관 태그를 후보 전체에 대해 한 번에 매칭 (태그 임베딩은 캐시)
+    selected = list(order[:request.limit])  # limit만큼만 반환
+    candidate_tags = []
+    for index in selected:
+        metadata = similar_institutions[index].get("metadata", {})
+        # 태그 리스트 생성 (전문질환, 서비스, 운영특성, 시설 모두 합침)
+        tags = []
+        tags.extend(metadata.get("specialized_diseases", []))
+        tags.extend(metadata.get("service_types", []))
+        tags.extend(metadata.get("operational_features", []))
+        tags.extend(metadata.get("facility_features", []))
+        candidate_tags.append(tags)
+    
+    preferred_tags = [
+        *member.preferredSpecializedDiseases,
+        *member.preferredServiceTypes,
+        *member.preferredOperationalFeatures,
+        *member.preferredFacilityFeatures
+    ]
+    tag_matches = tag_matcher.match(preferred_tags, candidate_tags, version)
+    
+    recommendations = []
+    for index, tags, (exact_tags, related_tags) in zip(selected, candidate_tags, tag_matches):
+        inst = similar_institutions[index]
+        metadata = inst.get("metadata", {})
+        recommendations.append(RecommendationItem(
+            institutionId=inst["institutionId"],
+            similarity=inst["similarity"],
+            name=metadata.get("name", ""),
+            type=metadata.get("type", ""),
+            address=metadata.get("address", ""),
+            distanceKm=distances[index],
+            isAvailable=True,  # TODO: Spring에서 입소 가능 여부 정보 필요
+            tags=tags,
+            recommendationReason=create_recommendation_reason(exact_tags, related_tags, inst["similarity"])
+        ))
+    return recommendations
+
+
+async def compute_recommendations(request: RecommendationRequest) -> RecommendationResponse:
+    """추천 요청 하나의 계산: 프로필 텍스트 → 임베딩 → 유사 기관 검색 → 재정렬 / 추천 이유"""
+    # 1. 사용자 프로필 → 텍스트 변환
+    with stage("text"):
+        user_text = build_recommendation_profile_text(request)
+    
+    # 2. 텍스트 → 임베딩 변환 (같은 프로필은 캐시 사용)
+    # 요청 도중 버전이 전환되어도 프로필 임베딩과 검색은 같은 버전(과 그 버전의 검색 백엔드)을 사용
+    version, backend = active_version, search_backend
+    with stage("embed"):
+        if two_stage_retriever:
+            profile_lexical = await encode_profile_lexical(user_text, version)
+            user_embedding = profile_lexical.dense
+        else:
+            user_embedding = await encode_profile_text(user_text, version)
+    
+    # 3. 유사 기관 검색 (필터는 검색 쿼리 안에서 적용되므로 limit개만 조회)
+    # 기관 데이터 버전이 키에 포함되므로 기관이 저장되면 이전 결과는 자동으로 무효화됨
+    # (다른 워커/서버의 저장은 DATA_VERSION_REFRESH_SECONDS 안에)
+    filters, origin, distance_weight, fetch_limit = plan_recommendation_search(request)
+    
+    search_key = (
+        hash_embedding(user_embedding), fetch_limit,
+        json.dumps(filters, sort_keys=True, ensure_ascii=False) if filters else None,
+        request.ivfflatProbes, request.hnswEfSearch, version, db_service.data_version
+    )
+    with stage("search"):
+        similar_institutions = search_result_cache.get(search_key)
+        if similar_institutions is None and two_stage_retriever:
+            # dense_candidates / sparse_candidates / rerank 단계로 따로 기록됨
+            similar_institutions = await two_stage_retriever.search(
+                backend, profile_lexical,
+                limit=fetch_limit,
+                filters=filters,
+                version=version,
+                probes=request.ivfflatProbes,
+                ef_search=request.hnswEfSearch
+            )
+            search_result_cache.set(search_key, similar_institutions)
+        elif similar_institutions is None:
+            similar_institutions = await run_in_threadpool(
+                backend.search_similar_institutions,
+                user_embedding=user_embedding,
+                limit=fetch_limit,
+                min_similarity=0.0,
+                probes=request.ivfflatProbes,
+                ef_search=request.hnswEfSearch,
+                filters=filters,
+                version=version
+            )
+            search_result_cache.set(search_key, similar_institutions)
+    
+    # 4. 위치 재정렬 + 추천 이유 → RecommendationItem 형식으로 변환
+    with stage("rank"):
+        recommendations = build_recommendation_items(request, similar_institutions, origin, distance_weight, version)
+    
+    return RecommendationResponse(
+        success=True,
+        institutions=recommendations,
+        totalCount=len(recommendations)
+    )
+
+
+@app.post("/api/v1/recommendations", response_model=RecommendationResponse, dependencies=[Depends(require_ready)])
 async def get_recommendations(request: RecommendationRequest):
     """
     기능 3: 사용자 프로필 기반 기관 추천
@@ -251,6 +1050,9 @@ async def get_recommendations(request: RecommendationRequest):
     Spring의 RecommendationRequest 형식으로 요청을 받아
     사용자 정보를 임베딩으로 변환한 후 pgvector로 유사한 기관을 검색하고
     RecommendationItem 형식으로 반환합니다.
+    
+    내용이 같은 요청이 동시에 들어오면(재시도, 여러 위젯, 연타) 먼저 온 요청의 계산 결과를
+    함께 기다립니다 (GET /metrics의 caring_coalesced_requests_total, Server-Timing의 coalesced 단계).
     """
     try:
         start_time = time.time()
@@ -258,76 +1060,22 @@ async def get_recommendations(request: RecommendationRequest):
         member = request.member
         elderly = request.elderly
         
-        logger.info(f"📥 기관 추천 요청: 회원={member.name}, 어르신={elderly.name}, limit={request.limit}")
-        
-        # 1. 사용자 프로필 → 텍스트 변환
-        user_text = create_user_profile_text(
-            member_name=member.name,
-            elderly_name=elderly.name,
-            gender=elderly.gender,
-            birth_date=elderly.birthDate or "",
-            activity_level=elderly.activityLevel or "",
-            cognitive_level=elderly.cognitiveLevel or "",
-            long_term_care_grade=elderly.longTermCareGrade or "",
-            notes=elderly.notes or "",
-            address=elderly.address or "",
-            preferred_specialized_diseases=member.preferredSpecializedDiseases,
-            preferred_service_types=member.preferredServiceTypes,
-            preferred_operational_features=member.preferredOperationalFeatures,
-            preferred_facility_features=member.preferredFacilityFeatures,
-            additional_text=request.additionalText or ""
+        logger.info(
+            f"📥 기관 추천 요청: 회원={member.name}, 어르신={elderly.name}, limit={request.limit}, "
+            f"필터={'있음' if request.filters else '없음'}"
         )
         
-        # 2. 텍스트 → 임베딩 변환
-        user_embedding = embedding_service.encode_text(user_text)
-        
-        # 3. 유사 기관 검색 (limit보다 많이 가져와서 필터링 여유 확보)
-        similar_institutions = db_service.search_similar_institutions(
-            user_embedding=user_embedding,
-            limit=request.limit * 2,  # 필터링을 위해 2배로 조회
-            min_similarity=0.0
-        )
-        
-        # 4. RecommendationItem 형식으로 변환
-        recommendations = []
-        for inst in similar_institutions[:request.limit]:  # limit만큼만 반환
-            metadata = inst.get("metadata", {})
-            
-            # 태그 리스트 생성 (전문질환, 서비스, 운영특성, 시설 모두 합침)
-            tags = []
-            tags.extend(metadata.get("specialized_diseases", []))
-            tags.extend(metadata.get("service_types", []))
-            tags.extend(metadata.get("operational_features", []))
-            tags.extend(metadata.get("facility_features", []))
-            
-            # TODO: 추천 이유는 나중에 LLM으로 생성 (기능 9)
-            # 지금은 임시로 간단한 텍스트 생성
-            recommendation_reason = f"유사도 {inst['similarity']:.2%}로 매칭되었습니다."
-            
-            recommendation_item = RecommendationItem(
-                institutionId=inst["institutionId"],
-                similarity=inst["similarity"],
-                name=metadata.get("name", ""),
-                type=metadata.get("type", ""),
-                address=metadata.get("address", ""),
-                isAvailable=True,  # TODO: Spring에서 입소 가능 여부 정보 필요
-                tags=tags,
-                recommendationReason=recommendation_reason
-            )
-            
-            recommendations.append(recommendation_item)
+        # 1~4. 같은 버전 / 같은 내용의 요청이 계산 중이면 합류
+        flight_key = (active_version, hash_request(request))
+        response = await recommendation_flight.run(flight_key, lambda: compute_recommendations(request))
         
         # 5. 응답 시간 계산
         response_time = int((time.time() - start_time) * 1000)  # ms 단위
         
-        logger.info(f"✅ 기관 추천 완료: {len(recommendations)}개 반환 (응답시간: {response_time}ms)")
-        
-        return RecommendationResponse(
-            success=True,
-            institutions=recommendations,
-            totalCount=len(recommendations)
-        )
+        logger.info(f"✅ 기관 추천 완료: {response.totalCount}개 반환 (응답시간: {response_time}ms)")
         
+        return TimedJSONResponse(response)
+    
     except Exception as e:
         logger.error(f"❌ 기관 추천 실패: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -336,6 +1084,320 @@ async def get_recommendations(request: RecommendationRequest):
         )
 
 
+async def get_bulk_search_index(version: int) -> VectorIndex:
+    """
+    대량 추천에 쓸 기관 행렬
+    
+    memory 모드면 검색 중인 인메모리 인덱스를 그대로 사용하고, pgvector 모드면 처음 호출할 때
+    DB에서 binary COPY로 파일 없는 스냅샷을 만들어 저장 리스너로 최신 상태를 유지합니다.
+    """
+    global bulk_index
+    
+    if vector_index is not None and vector_index.version == version:
+        return vector_index
+    
+    async with bulk_index_lock:
+        if bulk_index is None or bulk_index.version != version:
+            index = VectorIndex(db_service, version, persist=False)
+            await run_in_threadpool(index.load)
+            db_service.add_write_listener(index.on_write)
+            if bulk_index is not None:
+                db_service.remove_write_listener(bulk_index.on_write)
+            bulk_index = index
+        return bulk_index
+
+
+def bulk_recommendation_line(index: int, request: RecommendationRequest, **fields) -> str:
+    """대량 추천 결과 한 줄 (NDJSON)"""
+    with stage("serialize"):
+        return BulkRecommendationResult(
+            index=index,
+            memberId=request.member.memberId,
+            elderlyProfileId=request.elderly.elderlyProfileId,
+            **fields
+        ).model_dump_json() + "\n"
+
+
+async def stream_bulk_recommendations(requests: List[RecommendationRequest], version: int, index: VectorIndex):
+    """
+    BULK_RECOMMENDATION_CHUNK_SIZE개씩: 프로필 텍스트 → 배치 임베딩 → 행렬 곱 검색 → 결과 줄 전송
+    
+    임베딩은 청크 단위로 추론 스레드에 넣으므로 실시간 추천 배치가 청크 사이사이 실행되고,
+    동시에 실행되는 대량 추천은 BULK_RECOMMENDATION_CONCURRENCY개로 제한합니다.
+    """
+    start_time = time.time()
+    succeeded = 0
+    
+    async with bulk_recommendation_semaphore:
+        for start in range(0, len(requests), BULK_RECOMMENDATION_CHUNK_SIZE):
+            chunk = requests[start:start + BULK_RECOMMENDATION_CHUNK_SIZE]
+            
+            try:
+                with stage("text"):
+                    texts = [build_recommendation_profile_text(request) for request in chunk]
+                    plans = [plan_recommendation_search(request) for request in chunk]
+                with stage("embed"):
+                    embeddings = await inference_queue.encode_many(
+                        texts, version, batch_size=EMBEDDING_BATCH_SIZE, kind="profile"
+                    )
+                with stage("search"):
+                    results = await run_in_threadpool(
+                        index.search_many,
+                        embeddings,
+                        [fetch_limit for _, _, _, fetch_limit in plans],
+                        [filters for filters, _, _, _ in plans],
+                        version=version
+                    )
+            except Exception as e:
+                logger.error(f"❌ 대량 추천 청크 실패 ({start}~{start + len(chunk) - 1}): {str(e)}")
+                for offset, request in enumerate(chunk):
+                    yield bulk_recommendation_line(start + offset, request, success=False, error=str(e))
+                continue
+            
+            for offset, (request, (_, origin, distance_weight, _), similar_institutions) in enumerate(
+                zip(chunk, plans, results)
+            ):
+                try:
+                    with stage("rank"):
+                        recommendations = build_recommendation_items(
+                            request, similar_institutions, origin, distance_weight, version
+                        )
+                except Exception as e:
+                    yield bulk_recommendation_line(start + offset, request, success=False, error=str(e))
+                    continue
+                
+                succeeded += 1
+                yield bulk_recommendation_line(
+                    start + offset, request,
+                    success=True, institutions=recommendations, totalCount=len(recommendations)
+                )
+    
+    logger.info(
+        f"✅ 대량 추천 완료: {succeeded}/{len(requests)}개 성공 "
+        f"({time.time() - start_time:.1f}s, v{version})"
+    )
+
+
+@app.post("/api/v1/recommendations/bulk", dependencies=[Depends(require_ready)])
+async def get_bulk_recommendations(requests: List[RecommendationRequest]):
+    """
+    여러 어르신 프로필의 기관 추천 (야간 다이제스트, 케어 매니저 대시보드)
+    
+    프로필을 청크 단위로 배치 임베딩하고, 기관 행렬과의 행렬-행렬 곱 1번 + 행별 top-k로
+    검색합니다. 결과는 요청 순서대로 한 줄에 하나씩 NDJSON으로 스트리밍되며
+    청크가 끝날 때마다 전송됩니다 (index = 요청 목록에서의 위치).
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="추천 요청 목록이 비어 있습니다.")
+    if len(requests) > BULK_RECOMMENDATION_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"한 번에 최대 {BULK_RECOMMENDATION_MAX_REQUESTS}개까지 요청할 수 있습니다."
+        )
+    
+    logger.info(f"📥 대량 추천 요청: {len(requests)}개")
+    version = active_version
+    with stage("index"):
+        index = await get_bulk_search_index(version)
+    return StreamingResponse(
+        stream_bulk_recommendations(requests, version, index),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.post(
+    "/api/v1/embeddings/batch-update",
+    response_model=BatchUpdateStatus,
+    status_code=202,
+    dependencies=[Depends(require_ready)]
+)
+async def start_batch_update(request: BatchUpdateRequest):
+    """
+    기능 4: 저장된 기관 전체(또는 since 이후 수정분) 재임베딩
+    
+    텍스트 템플릿이나 모델(EMBEDDING_VERSION)을 바꾼 뒤 호출합니다.
+    EMBEDDING_VERSION이 검색 중인 버전과 다르면 새 버전 행과 인덱스를 옆에 만들고
+    (기존 버전은 계속 검색에 사용), activate면 끝난 뒤 검색 버전을 전환합니다.
+    작업은 백그라운드에서 실행되고 바로 202와 작업 상태를 반환하며,
+    진행 상황은 GET /api/v1/embeddings/batch-update/{job_id}로 확인합니다.
+    """
+    global reembedding_job
+    
+    if reembedding_job and reembedding_job.running:
+        raise HTTPException(status_code=409, detail=f"재임베딩 작업 #{reembedding_job.job_id}이 실행 중입니다.")
+    
+    latest = await run_in_threadpool(db_service.get_embedding_job)
+    if latest and latest["status"] in ("running", "indexing") and latest["heartbeat_age"] < REEMBEDDING_STALE_SECONDS:
+        raise HTTPException(
+            status_code=409,
+            detail=f"재임베딩 작업 #{latest['job_id']}이 다른 서버({latest['owner']})에서 실행 중입니다."
+        )
+    
+    logger.info(
+        f"📥 재임베딩 요청 수신: mode={request.mode}, since={request.since}, force={request.force}, "
+        f"activate={request.activate} (v{active_version} → v{db_service.embedding_version})"
+    )
+    since = request.since if request.mode == "modified_only" else None
+    total = await run_in_threadpool(db_service.count_institutions, since)
+    job = await run_in_threadpool(
+        db_service.create_embedding_job, request.mode, since, request.force, request.activate, total, JOB_OWNER
+    )
+    
+    reembedding_job = ReembeddingJob(db_service, inference_queue, job)
+    reembedding_job.start()
+    return reembedding_job.status()
+
+
+@app.get("/api/v1/embeddings/batch-update/{job_id}", response_model=BatchUpdateStatus, dependencies=[Depends(require_ready)])
+async def get_batch_update_status(job_id: int):
+    """재임베딩 작업 진행 상황 (처리 수, 진행률, 처리 속도, 남은 시간)"""
+    if reembedding_job and reembedding_job.running and reembedding_job.job_id == job_id:
+        return reembedding_job.status()
+    
+    job = await run_in_threadpool(db_service.get_embedding_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"재임베딩 작업 #{job_id}을 찾을 수 없습니다.")
+    return job_status(job)
+
+
+@app.post(
+    "/api/v1/embeddings/batch-update/{job_id}/resume",
+    response_model=BatchUpdateStatus,
+    status_code=202,
+    dependencies=[Depends(require_ready)]
+)
+async def resume_batch_update(job_id: int):
+    """실패/중단된 재임베딩 작업을 마지막 체크포인트 다음부터 이어서 실행"""
+    global reembedding_job
+    
+    if reembedding_job and reembedding_job.running:
+        raise HTTPException(status_code=409, detail=f"재임베딩 작업 #{reembedding_job.job_id}이 실행 중입니다.")
+    
+    job = await run_in_threadpool(db_service.claim_embedding_job, job_id, JOB_OWNER, REEMBEDDING_STALE_SECONDS)
+    if job is None:
+        existing = await run_in_threadpool(db_service.get_embedding_job, job_id)
+        if existing is None:
+            raise HTTPException(status_code=404, detail=f"재임베딩 작업 #{job_id}을 찾을 수 없습니다.")
+        raise HTTPException(
+            status_code=409,
+            detail=f"재임베딩 작업 #{job_id}은 재개할 수 없는 상태입니다 (status={existing['status']})."
+        )
+    
+    reembedding_job = ReembeddingJob(db_service, inference_queue, job)
+    reembedding_job.start()
+    return reembedding_job.status()
+
+
+def embedding_versions_response(versions: List[dict]) -> dict:
+    """임베딩 버전 상태 응답"""
+    return {
+        "activeVersion": db_service.active_version,
+        "buildVersion": db_service.embedding_version,
+        "servingVersion": active_version,
+        "loadedVersions": inference_queue.loaded_versions(),
+        "versions": versions
+    }
+
+
+@app.get("/api/v1/embeddings/versions", dependencies=[Depends(require_ready)])
+async def get_embedding_versions():
+    """버전별 행 수 / 부분 ANN 인덱스, 검색 중인 버전과 빌드 버전"""
+    versions = await run_in_threadpool(db_service.version_stats)
+    return embedding_versions_response(versions)
+
+
+@app.post("/api/v1/embeddings/versions/{version}/activate", dependencies=[Depends(require_ready)])
+async def activate_embedding_version(version: int, force: bool = False):
+    """
+    검색에 사용할 임베딩 버전 전환
+    
+    새 버전에 모든 기관과 ANN 인덱스가 준비되어 있어야 합니다 (force면 확인 생략).
+    이 서버는 바로, 다른 서버는 EMBEDDING_VERSION_REFRESH_SECONDS 안에 전환됩니다.
+    """
+    try:
+        await run_in_threadpool(db_service.activate_version, version, force)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    await apply_active_version()
+    versions = await run_in_threadpool(db_service.version_stats)
+    return embedding_versions_response(versions)
+
+
+@app.delete("/api/v1/embeddings/versions/{version}", dependencies=[Depends(require_ready)])
+async def drop_embedding_version(version: int):
+    """
+    전환이 끝난 이전 버전의 행과 인덱스 삭제
+    
+    다른 서버가 아직 이전 버전으로 검색 중일 수 있으므로 전환 후
+    EMBEDDING_VERSION_REFRESH_SECONDS의 2배가 지나야 삭제합니다.
+    """
+    try:
+        deleted = await run_in_threadpool(db_service.drop_version, version, EMBEDDING_VERSION_REFRESH_SECONDS * 2)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    versions = await run_in_threadpool(db_service.version_stats)
+    return {"deleted": deleted, **embedding_versions_response(versions)}
+
+
+@app.get("/api/v1/embeddings/snapshot", dependencies=[Depends(require_ready)])
+async def export_embedding_snapshot(version: Optional[int] = None):
+    """
+    institution_embeddings 스냅샷 다운로드 (스테이징 시드, 새 리전 준비, 오프라인 인덱스 빌드)
+    
+    version(없으면 검색 중인 버전)의 기관 벡터 / 원본 텍스트 / metadata를 청크 단위로 스트리밍합니다.
+    python -m scripts.embedding_snapshot export와 같은 파일 형식입니다 (utils/snapshot).
+    """
+    version = version or db_service.active_version
+    snapshot = EmbeddingSnapshot(db_service)
+    # 동기 제너레이터이므로 청크마다 스레드풀에서 DB 페이지를 읽음
+    return StreamingResponse(
+        snapshot.export(version),
+        media_type=SNAPSHOT_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="institution-embeddings-v{version}.cemb"'}
+    )
+
+
+@app.post("/api/v1/embeddings/snapshot", dependencies=[Depends(require_ready)])
+async def import_embedding_snapshot(request: Request, version: Optional[int] = None):
+    """
+    스냅샷 업로드 → institution_embeddings에 저장 (재임베딩 없음)
+    
+    요청 본문을 읽는 대로 디코딩해 청크가 완성될 때마다 binary COPY + UPSERT로 저장하므로
+    본문 전체를 메모리에 올리지 않습니다. version이 없으면 스냅샷의 버전으로 저장하며,
+    검색 중인 버전이 아니면 인덱스 생성 / 버전 전환은 따로 해야 합니다.
+    """
+    start_time = time.time()
+    snapshot = EmbeddingSnapshot(db_service)
+    decoder = SnapshotDecoder()
+    target = None
+    imported = 0
+    
+    logger.info("📥 임베딩 스냅샷 가져오기 요청")
+    try:
+        async for data in request.stream():
+            for rows in decoder.feed(data):
+                target = target or snapshot.target_version(decoder, version)
+                imported += await run_in_threadpool(snapshot.import_chunk, rows, target)
+        decoder.close()
+        target = target or snapshot.target_version(decoder, version)
+    except ValueError as e:
+        logger.error(f"❌ 임베딩 스냅샷 가져오기 실패 ({imported}개 저장 후): {str(e)}")
+        raise HTTPException(status_code=400, detail=f"{str(e)} ({imported}개 저장됨)")
+    
+    elapsed = time.time() - start_time
+    logger.info(f"✅ 임베딩 스냅샷 가져오기 완료: {imported}개 ({elapsed:.1f}s, v{target})")
+    return {
+        "success": True,
+        "rows": imported,
+        "embeddingVersion": target,
+        "activeVersion": db_service.active_version,
+        "seconds": round(elapsed, 2)
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # 워커가 여러 개면 각 워커가 main:app을 import하므로 문자열로 지정
+    uvicorn.run("main:app", host="0.0.0.0", port=8001, workers=API_WORKERS)
\ No newline at end of file
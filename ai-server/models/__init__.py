@@ -1,9 +1,17 @@
-from .institution import InstitutionRequest, InstitutionResponse
+from .institution import (
+    InstitutionRequest,
+    InstitutionResponse,
+    InstitutionBulkItemResult,
+    InstitutionBulkResponse
+)
 from .user import Member, ElderlyProfile
+from .embedding_job import BatchUpdateRequest, BatchUpdateStatus
 from .recommendation import (
     RecommendationRequest, 
     RecommendationResponse, 
     RecommendationItem,
+    RecommendationFilters,
+    BulkRecommendationResult,
     MemberInfo,
     ElderlyInfo
 )
@@ -11,11 +19,17 @@ from .recommendation import (
 __all__ = [
     "InstitutionRequest", 
     "InstitutionResponse",
+    "InstitutionBulkItemResult",
+    "InstitutionBulkResponse",
     "Member",
     "ElderlyProfile",
     "RecommendationRequest",
     "RecommendationResponse",
     "RecommendationItem",
+    "RecommendationFilters",
+    "BulkRecommendationResult",
     "MemberInfo",
-    "ElderlyInfo"
+    "ElderlyInfo",
+    "BatchUpdateRequest",
+    "BatchUpdateStatus"
 ]
@@ -0,0 +1,70 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+
+
+class BatchUpdateRequest(BaseModel):
+    """재임베딩 작업 시작 요청 (Scheduler / 운영자 → AI)"""
+    mode: Literal["modified_only", "all"] = Field(default="all", description="all: 전체, modified_only: since 이후 수정된 기관만")
+    since: Optional[str] = Field(default=None, description="modified_only 기준 시각 (ISO 8601)")
+    force: bool = Field(default=False, description="텍스트와 임베딩 버전이 같아도 다시 임베딩 (같은 버전에서 모델만 바꾼 경우)")
+    activate: bool = Field(default=False, description="새 임베딩 버전이면 재임베딩/인덱스 생성 후 검색 버전까지 전환")
+    
+    @model_validator(mode="after")
+    def check_since(self):
+        if self.mode == "modified_only" and not self.since:
+            raise ValueError("modified_only 모드에는 since가 필요합니다.")
+        return self
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "mode": "modified_only",
+                "since": "2024-01-01T00:00:00Z",
+                "force": False,
+                "activate": False
+            }
+        }
+
+
+class BatchUpdateStatus(BaseModel):
+    """재임베딩 작업 진행 상황"""
+    jobId: int
+    mode: str
+    since: Optional[str] = None
+    status: str  # running / indexing / completed / failed / interrupted
+    embeddingVersion: int
+    total: int
+    processed: int
+    reembedded: int
+    skipped: int  # 텍스트와 버전이 이미 최신이라 건너뛴 수 (작업 중 다른 요청이 먼저 갱신한 기관 포함)
+    failed: int  # 텍스트를 만들 수 없거나 추론에 실패한 수
+    progress: float  # 0 ~ 1
+    rowsPerSecond: float
+    etaSeconds: Optional[float] = None
+    lastInstitutionId: int  # 체크포인트 (재개 시 이 ID 다음부터)
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    error: Optional[str] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "jobId": 3,
+                "mode": "all",
+                "since": None,
+                "status": "running",
+                "embeddingVersion": 2,
+                "total": 12000,
+                "processed": 4096,
+                "reembedded": 4050,
+                "skipped": 40,
+                "failed": 6,
+                "progress": 0.3413,
+                "rowsPerSecond": 85.2,
+                "etaSeconds": 92.8,
+                "lastInstitutionId": 4311,
+                "startedAt": "2024-01-01T03:00:00",
+                "finishedAt": None,
+                "error": None
+            }
+        }
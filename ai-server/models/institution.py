@@ -8,6 +8,8 @@ class InstitutionRequest(BaseModel):
     name: str = Field(..., description="기관명", alias="name")
     institution_type: str = Field(..., description="기관 유형 (요양원, 주간보호센터 등)", alias="institutionType")
     address: str = Field(..., description="주소")
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90, description="위도")
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180, description="경도")
     
     # 태그 정보
     specialized_diseases: Optional[List[str]] = Field(default=[], description="전문 질환 (치매, 당뇨 등)", alias="specializedDiseases")
@@ -26,6 +28,8 @@ class InstitutionRequest(BaseModel):
                 "name": "사랑재 요양원",
                 "institution_type": "요양원",
                 "address": "서울시 송파구 올림픽로 123",
+                "latitude": 37.5145,
+                "longitude": 127.1059,
                 "region": "서울시 송파구",
                 "specialized_diseases": ["치매", "당뇨"],
                 "service_types": ["주간보호", "장기요양"],
@@ -43,6 +47,8 @@ class InstitutionResponse(BaseModel):
     institution_id: int
     message: str
     embedding_dimension: int = 1024
+    # False면 임베딩 텍스트가 바뀌지 않아 추론 없이 metadata만 갱신함
+    reembedded: bool = True
     
     class Config:
         json_schema_extra = {
@@ -50,6 +56,40 @@ class InstitutionResponse(BaseModel):
                 "success": True,
                 "institution_id": 1,
                 "message": "기관 임베딩이 성공적으로 생성되었습니다.",
-                "embedding_dimension": 1024
+                "embedding_dimension": 1024,
+                "reembedded": True
+            }
+        }
+
+
+class InstitutionBulkItemResult(BaseModel):
+    """대량 등록 시 기관별 처리 결과"""
+    institution_id: int
+    success: bool
+    message: str
+    reembedded: bool = False
+
+
+class InstitutionBulkResponse(BaseModel):
+    """기관 대량 등록 응답"""
+    success: bool
+    total: int
+    succeeded: int
+    failed: int
+    skipped: int = 0  # 성공 중 텍스트 변경이 없어 재임베딩을 건너뛴 수
+    results: List[InstitutionBulkItemResult]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "success": True,
+                "total": 2,
+                "succeeded": 1,
+                "failed": 1,
+                "skipped": 0,
+                "results": [
+                    {"institution_id": 1, "success": True, "message": "저장 완료", "reembedded": True},
+                    {"institution_id": 2, "success": False, "message": "임베딩 생성 실패: ...", "reembedded": False}
+                ]
             }
         }
@@ -37,6 +37,30 @@ class ElderlyInfo(BaseModel):
         populate_by_name = True
 
 
+class RecommendationFilters(BaseModel):
+    """추천 검색 필터 (모두 선택, 지정한 조건은 AND로 적용)"""
+    institutionTypes: List[str] = Field(default=[], description="기관 유형 (하나라도 일치)")
+    regionPrefix: Optional[str] = Field(default=None, description="주소 접두어 (예: 서울시 송파구)")
+    requiredSpecializedDiseases: List[str] = Field(default=[], description="반드시 포함해야 하는 전문 질환 태그")
+    requiredServiceTypes: List[str] = Field(default=[], description="반드시 포함해야 하는 서비스 유형 태그")
+    excludedInstitutionIds: List[int] = Field(default=[], description="제외할 기관 ID")
+    
+    class Config:
+        populate_by_name = True
+    
+    def to_search_filters(self) -> Optional[dict]:
+        """검색 백엔드에 넘길 필터 dict (지정한 조건이 없으면 None)"""
+        filters = {
+            "institution_types": sorted(set(self.institutionTypes)),
+            "region_prefix": self.regionPrefix or None,
+            "required_specialized_diseases": sorted(set(self.requiredSpecializedDiseases)),
+            "required_service_types": sorted(set(self.requiredServiceTypes)),
+            "excluded_institution_ids": sorted(set(self.excludedInstitutionIds))
+        }
+        filters = {key: value for key, value in filters.items() if value}
+        return filters or None
+
+
 class RecommendationRequest(BaseModel):
     """추천 요청 (Spring에서 전달)"""
     member: MemberInfo = Field(..., description="회원 정보")
@@ -44,6 +68,16 @@ class RecommendationRequest(BaseModel):
     additionalText: Optional[str] = Field(default="", description="추가 요구사항")
     limit: int = Field(default=5, description="추천 기관 수")
     
+    # 벡터 검색 recall/latency 조절 (없으면 서버 기본값)
+    ivfflatProbes: Optional[int] = Field(default=None, ge=1, description="IVFFlat 탐색 리스트 수 (클수록 정확, 느림)")
+    hnswEfSearch: Optional[int] = Field(default=None, ge=1, description="HNSW 탐색 후보 수 (클수록 정확, 느림)")
+    
+    filters: Optional[RecommendationFilters] = Field(default=None, description="기관 유형/지역/필수 태그/제외 기관 필터")
+    
+    # 위치 기반 정렬 (기준점: 어르신 위치, 없으면 회원 위치)
+    maxDistanceKm: Optional[float] = Field(default=None, gt=0, description="최대 반경 (km, 없으면 제한 없음)")
+    distanceWeight: Optional[float] = Field(default=None, ge=0, le=1, description="거리 가중치 (0이면 유사도만, 없으면 서버 기본값)")
+    
     class Config:
         populate_by_name = True
 
@@ -55,6 +89,7 @@ class RecommendationItem(BaseModel):
     name: str = Field(..., description="기관 이름")
     type: str = Field(..., description="기관 유형")
     address: str = Field(..., description="주소")
+    distanceKm: Optional[float] = Field(default=None, description="기준 위치에서의 거리 (km, 좌표가 없으면 null)")
     isAvailable: bool = Field(..., description="입소 가능 여부")
     tags: List[str] = Field(default=[], description="기관의 태그들")
     recommendationReason: str = Field(..., description="추천의 이유 설명 텍스트")
@@ -67,6 +102,7 @@ class RecommendationItem(BaseModel):
                 "name": "사랑재 요양원",
                 "type": "NURSING_HOME",
                 "address": "서울시 송파구 올림픽로 123",
+                "distanceKm": 3.2,
                 "isAvailable": True,
                 "tags": ["치매", "당뇨", "장기요양", "치매전담", "24시간간호사"],
                 "recommendationReason": "치매 전문 케어와 24시간 간호사 상주로 어르신의 인지 상태에 맞는 전문적인 돌봄이 가능합니다."
@@ -99,3 +135,38 @@ class RecommendationResponse(BaseModel):
                 ]
             }
         }
+
+
+class BulkRecommendationResult(BaseModel):
+    """대량 추천 결과 한 줄 (NDJSON, 요청 하나당 한 줄)"""
+    index: int = Field(..., description="요청 목록에서의 위치")
+    memberId: int = Field(..., description="회원 ID")
+    elderlyProfileId: int = Field(..., description="어르신 프로필 ID")
+    success: bool = Field(..., description="성공 여부")
+    institutions: List[RecommendationItem] = Field(default=[], description="추천 기관 리스트")
+    totalCount: int = Field(default=0, description="총 결과 수")
+    error: Optional[str] = Field(default=None, description="실패 사유")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "index": 0,
+                "memberId": 1,
+                "elderlyProfileId": 1,
+                "success": True,
+                "institutions": [
+                    {
+                        "institutionId": 1,
+                        "similarity": 0.92,
+                        "name": "사랑재 요양원",
+                        "type": "NURSING_HOME",
+                        "address": "서울시 송파구 올림픽로 123",
+                        "isAvailable": True,
+                        "tags": ["치매", "당뇨", "장기요양", "치매전담"],
+                        "recommendationReason": "선호하신 치매, 치매전담 조건을 갖추고 있습니다. (프로필 유사도 92%)"
+                    }
+                ],
+                "totalCount": 1,
+                "error": None
+            }
+        }
@@ -0,0 +1,62 @@
+"""
+2단계 검색(RETRIEVAL_MODE=two_stage)용 sparse / multi-vector 채우기
+
+database/two_stage_retrieval.sql 적용 직후, 재임베딩 / 스냅샷 가져오기 뒤처럼
+sparse / multi-vector가 없거나 텍스트(content_hash)가 바뀐 기관만 original_text로 다시 계산합니다.
+dense 임베딩은 건드리지 않으며, 중간에 멈춰도 다시 실행하면 남은 기관부터 이어집니다.
+
+실행 (ai-server 디렉토리에서, DB_* / EMBEDDING_* 환경변수는 서버와 동일):
+    python -m scripts.build_lexical_index
+    python -m scripts.build_lexical_index --version 2 --chunk-size 128
+"""
+import argparse
+import logging
+import time
+
+from services.database_service import DatabaseService
+from services.embedding_service import load_encoders
+from utils.lexical import colbert_to_int8
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sparse / multi-vector 채우기")
+    parser.add_argument("--version", type=int, default=None, help="임베딩 버전 (없으면 검색 중인 버전)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="한 번에 조회 / 저장할 기관 수")
+    parser.add_argument("--batch-size", type=int, default=32, help="모델 forward pass 한 번에 넣을 텍스트 수")
+    args = parser.parse_args()
+    
+    db_service = DatabaseService()
+    version = args.version or db_service.active_version
+    encoder = load_encoders([version])[version]
+    
+    start = time.time()
+    after_id = -1
+    total = 0
+    try:
+        while True:
+            rows = db_service.fetch_lexical_backlog(version, after_id, args.chunk_size)
+            if not rows:
+                break
+            
+            embeddings = encoder.encode_batch_lexical(
+                [original_text for _, original_text, _ in rows], batch_size=args.batch_size, kind="institution"
+            )
+            db_service.save_lexical_embeddings([
+                (institution_id, content_hash, embedding.sparse, colbert_to_int8(embedding.colbert))
+                for (institution_id, _, content_hash), embedding in zip(rows, embeddings)
+            ], version)
+            
+            after_id = rows[-1][0]
+            total += len(rows)
+            logger.info(f"🔄 {total}개 처리 (institution_id ≤ {after_id}, {time.time() - start:.1f}s)")
+        
+        logger.info(f"✅ v{version} sparse / multi-vector 채우기 완료: {total}개 ({time.time() - start:.1f}s)")
+    finally:
+        db_service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+institution_embeddings 스냅샷 내보내기 / 가져오기 (재임베딩 없이 환경 간 이동)
+
+DB_* 환경변수의 DB에 직접 연결합니다. 파일 형식은 utils/snapshot 참고.
+실행 중인 서버를 거치려면 HTTP 엔드포인트를 사용합니다.
+    GET  /api/v1/embeddings/snapshot?version=N   (내보내기)
+    POST /api/v1/embeddings/snapshot?version=N   (가져오기, 본문 = 스냅샷 파일)
+
+실행 (ai-server 디렉토리에서):
+    python -m scripts.embedding_snapshot export --output ./institution-embeddings.cemb
+    python -m scripts.embedding_snapshot import --input ./institution-embeddings.cemb
+    python -m scripts.embedding_snapshot export --version 2 --output - | ssh staging "... import --input -"
+
+가져온 버전이 검색 중인 버전이 아니면 ANN 인덱스 생성 / 버전 전환은 따로 합니다
+(POST /api/v1/embeddings/versions/{version}/activate).
+"""
+import argparse
+import logging
+import sys
+import time
+
+from services.database_service import DatabaseService
+from services.embedding_snapshot import EmbeddingSnapshot
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="institution_embeddings 스냅샷 내보내기 / 가져오기")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="DB → 스냅샷 파일")
+    export_parser.add_argument("--output", required=True, help="스냅샷 파일 (-면 stdout)")
+    export_parser.add_argument("--version", type=int, default=None, help="임베딩 버전 (없으면 검색 중인 버전)")
+    export_parser.add_argument("--chunk-size", type=int, default=None, help="청크(DB 페이지) 행 수")
+    
+    import_parser = subparsers.add_parser("import", help="스냅샷 파일 → DB")
+    import_parser.add_argument("--input", required=True, help="스냅샷 파일 (-면 stdin)")
+    import_parser.add_argument("--version", type=int, default=None, help="저장할 임베딩 버전 (없으면 스냅샷의 버전)")
+    args = parser.parse_args()
+    
+    db_service = DatabaseService()
+    snapshot = EmbeddingSnapshot(db_service, chunk_size=getattr(args, "chunk_size", None))
+    start = time.time()
+    try:
+        if args.command == "export":
+            if args.output == "-":
+                written = snapshot.export_to(sys.stdout.buffer, args.version)
+            else:
+                with open(args.output, "wb") as f:
+                    written = snapshot.export_to(f, args.version)
+            logger.info(f"✅ 스냅샷 저장: {args.output} ({written / 1024 / 1024:.1f}MB, {time.time() - start:.1f}s)")
+        else:
+            if args.input == "-":
+                result = snapshot.import_from(sys.stdin.buffer, args.version)
+            else:
+                with open(args.input, "rb") as f:
+                    result = snapshot.import_from(f, args.version)
+            if result["embedding_version"] != db_service.active_version:
+                logger.warning(
+                    f"⚠️ v{result['embedding_version']}는 검색 중인 버전(v{db_service.active_version})이 아닙니다. "
+                    "인덱스 생성 / 버전 전환이 필요합니다."
+                )
+    finally:
+        db_service.close()
+
+
+if __name__ == "__main__":
+    main()
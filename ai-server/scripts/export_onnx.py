@@ -0,0 +1,58 @@
+"""
+bge-m3 → ONNX 내보내기 (+ 선택: 동적 int8 양자화)
+
+EMBEDDING_BACKEND=onnx / onnx-int8에서 사용할 모델을 EMBEDDING_ONNX_DIR에 생성합니다.
+EMBEDDING_MODEL_PATH가 있으면 그 로컬 스냅샷을 변환합니다.
+    {output}/onnx/model.onnx                          (float32, onnx)
+    {output}/onnx/model_qint8_{config}.onnx           (int8, onnx-int8)
+
+실행 (ai-server 디렉토리에서):
+    python -m scripts.export_onnx --output ./onnx_model
+    python -m scripts.export_onnx --output ./onnx_model --quantize avx512_vnni
+
+양자화 설정은 서버 CPU에 맞춰 선택합니다 (arm64, avx2, avx512, avx512_vnni).
+avx512_vnni 이외의 설정이면 서버에 EMBEDDING_ONNX_FILE=onnx/model_qint8_{config}.onnx를 지정하세요.
+"""
+import argparse
+import logging
+import os
+import time
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+from services.embedding_service import MODEL_NAME
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bge-m3 ONNX 내보내기")
+    parser.add_argument("--output", default="./onnx_model", help="저장 디렉토리 (EMBEDDING_ONNX_DIR)")
+    parser.add_argument(
+        "--quantize",
+        choices=["arm64", "avx2", "avx512", "avx512_vnni"],
+        default=None,
+        help="동적 int8 양자화 설정 (없으면 float32만 내보냄)"
+    )
+    args = parser.parse_args()
+    
+    start = time.time()
+    logger.info(f"🔄 {MODEL_NAME} → ONNX 변환 시작...")
+    # backend="onnx"는 저장소에 ONNX 파일이 없으면 PyTorch 모델을 내보내서 로드함
+    model = SentenceTransformer(os.getenv("EMBEDDING_MODEL_PATH") or MODEL_NAME, backend="onnx")
+    model.save(args.output)
+    logger.info(f"✅ ONNX 저장 완료: {args.output}/onnx/model.onnx ({time.time() - start:.0f}s)")
+    
+    if args.quantize:
+        start = time.time()
+        logger.info(f"🔄 동적 int8 양자화 시작 ({args.quantize})...")
+        export_dynamic_quantized_onnx_model(model, args.quantize, args.output)
+        logger.info(
+            f"✅ int8 모델 저장 완료: {args.output}/onnx/model_qint8_{args.quantize}.onnx "
+            f"({time.time() - start:.0f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
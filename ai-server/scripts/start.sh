@@ -0,0 +1,44 @@
+#!/bin/sh
+# 컨테이너 진입점
+#   INFERENCE_MODE=local (기본): uvicorn 워커가 각자 모델을 로드 (API_WORKERS=1 권장)
+#   INFERENCE_MODE=remote: 추론 서버 1개가 모델을 들고, API_WORKERS개의 uvicorn 워커가 Unix 소켓으로 요청
+set -e
+
+# 프로세스가 여러 개면 Prometheus 지표를 파일로 남겨 /metrics에서 합산 (추론 서버의 배치/대기 지표 포함)
+if [ "${INFERENCE_MODE:-local}" = "remote" ] || [ "${API_WORKERS:-1}" -gt 1 ]; then
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/caring-metrics}"
+    # 이전 실행의 지표 파일은 누적되지 않도록 정리
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+if [ "${INFERENCE_MODE:-local}" != "remote" ]; then
+    exec uvicorn main:app --host 0.0.0.0 --port 8001 --workers "${API_WORKERS:-1}"
+fi
+
+# remote: 추론 서버와 uvicorn 중 하나라도 종료되면 나머지도 종료하고 컨테이너를 끝냄
+# (추론 서버만 죽은 채 워커가 모든 요청에 실패하지 않도록, 재시작은 오케스트레이터가 담당)
+python -m services.inference_server &
+INFERENCE_PID=$!
+uvicorn main:app --host 0.0.0.0 --port 8001 --workers "${API_WORKERS:-1}" &
+API_PID=$!
+
+shutdown() {
+    kill -TERM "$API_PID" "$INFERENCE_PID" 2>/dev/null || true
+    wait || true
+    exit 0
+}
+trap shutdown TERM INT
+
+while kill -0 "$INFERENCE_PID" 2>/dev/null && kill -0 "$API_PID" 2>/dev/null; do
+    sleep 1
+done
+
+if kill -0 "$API_PID" 2>/dev/null; then
+    echo "❌ 추론 서버가 종료되었습니다. 컨테이너를 종료합니다." >&2
+else
+    echo "❌ uvicorn이 종료되었습니다. 컨테이너를 종료합니다." >&2
+fi
+kill -TERM "$API_PID" "$INFERENCE_PID" 2>/dev/null || true
+wait || true
+exit 1
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from utils.metrics import record_coalesced, stage
+
+logger = logging.getLogger(__name__)
+
+
+class LRUTTLCache:
+    """
+    크기 제한(LRU) + 만료 시간(TTL)을 가진 스레드 안전 인메모리 캐시
+    
+    maxsize를 넘으면 가장 오래 사용되지 않은 항목부터 제거하고,
+    ttl_seconds가 지난 항목은 조회 시점에 만료 처리합니다.
+    """
+    
+    def __init__(self, name: str, maxsize: int, ttl_seconds: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any):
+        """캐시 저장 (가득 차면 LRU 항목 제거)"""
+        if self.maxsize <= 0:
+            return
+        
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """전체 비우기"""
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> dict:
+        """hit/miss/eviction 통계"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 실행 중인 비동기 계산을 하나로 합치는 single-flight
+    
+    키의 계산이 진행 중이면 새로 시작하지 않고 그 결과(또는 예외)를 함께 기다립니다.
+    결과는 보관하지 않으므로 계산이 끝난 뒤 같은 키로 오면 다시 계산합니다 (캐시는 LRUTTLCache).
+    계산은 별도 태스크로 실행하므로 처음 요청한 클라이언트가 연결을 끊어도
+    기다리던 다른 요청은 계속 결과를 받습니다.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        
+        # 통계
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """key 계산이 진행 중이면 합류, 없으면 fn()을 실행"""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            record_coalesced(self.name)
+            # 기다린 시간은 이 요청의 coalesced 단계로 기록 (계산 단계는 처음 요청에 기록됨)
+            with stage("coalesced"):
+                return await asyncio.shield(task)
+        
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+    
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": len(self._inflight)
+        }
+
+
+def hash_text(text: str) -> str:
+    """프로필 텍스트 → 캐시 키"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_embedding(embedding: np.ndarray) -> str:
+    """임베딩 벡터 → 캐시 키 (float32 바이트 기준)"""
+    return hashlib.sha1(np.ascontiguousarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+
+
+def hash_request(request: BaseModel) -> str:
+    """요청 모델 → 정규화된 JSON(키 정렬)의 해시 (같은 내용이면 필드 순서와 관계없이 같은 키)"""
+    canonical = json.dumps(request.model_dump(mode="json"), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
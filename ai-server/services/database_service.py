@@ -1,100 +1,641 @@
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from pgvector.psycopg2 import register_vector
+import io
+import math
+import re
 import numpy as np
 import logging
-from typing import Optional, List, Dict
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Tuple, Callable, TypeVar, Iterator
 import os
 from dotenv import load_dotenv
 
+from utils.pg_binary import encode_copy_rows, decode_copy_rows
+from utils.lexical import SPARSE_DIMENSION, sparsevec_literal
+from utils.quantization import quantize_int8
+from utils.geo import bounding_box, EARTH_RADIUS_KM
+from utils.metrics import observe_db
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 연결이 끊겼다고 판단하는 예외 (재연결 대상)
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# embedding_jobs 조회 컬럼
+EMBEDDING_JOB_COLUMNS = """
+    job_id, mode, since, force, activate, embedding_version, status, total, last_institution_id,
+    processed, reembedded, skipped, failed, failed_ids, owner, error, started_at, heartbeat_at, finished_at,
+    EXTRACT(EPOCH FROM NOW() - heartbeat_at)::float8 AS heartbeat_age,
+    EXTRACT(EPOCH FROM COALESCE(finished_at, heartbeat_at) - started_at)::float8 AS elapsed_seconds
+"""
+
+# 일괄 저장용 트랜잭션 임시 테이블
+STAGING_TABLE = "institution_embeddings_staging"
+LEXICAL_STAGING_TABLE = "institution_lexical_staging"
+
+# 기관 좌표 (schema.sql의 idx_metadata_location과 같은 식이어야 GiST 인덱스 사용)
+LOCATION_POINT = "point((metadata->>'longitude')::float8, (metadata->>'latitude')::float8)"
+
+# sparse / multi-vector가 없거나 계산 후 텍스트가 바뀐 행 (2단계 검색에서 dense 점수만 쓰이는 행)
+LEXICAL_BACKLOG_CONDITION = (
+    "original_text IS NOT NULL AND (embedding_sparse IS NULL OR lexical_hash IS DISTINCT FROM content_hash)"
+)
+
 
 class DatabaseService:
-    """PostgreSQL + pgvector 연결 및 저장 서비스"""
+    """PostgreSQL + pgvector 연결 및 저장 서비스 (커넥션 풀 기반)"""
     
     def __init__(self):
-        self.conn = None
+        self.min_size = int(os.getenv("DB_POOL_MIN", "1"))
+        self.max_size = int(os.getenv("DB_POOL_MAX", "10"))
+        # 풀이 가득 찼을 때 커넥션을 기다리는 최대 시간 (초)
+        self.checkout_timeout = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+        # 이 시간(초) 이상 놀고 있던 커넥션은 빌려줄 때 SELECT 1로 확인
+        self.health_check_interval = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+        self.connect_retries = int(os.getenv("DB_CONNECT_RETRIES", "5"))
+        self.backoff_base = float(os.getenv("DB_RECONNECT_BACKOFF", "0.5"))
+        
+        # 벡터 인덱스 종류와 recall/latency 조절값 (요청별로 덮어쓸 수 있음)
+        self.vector_index_type = os.getenv("VECTOR_INDEX_TYPE", "ivfflat").lower()
+        if self.vector_index_type not in ("ivfflat", "hnsw"):
+            raise ValueError(f"지원하지 않는 VECTOR_INDEX_TYPE: {self.vector_index_type}")
+        self.ivfflat_probes = int(os.getenv("IVFFLAT_PROBES", "10"))
+        self.hnsw_ef_search = int(os.getenv("HNSW_EF_SEARCH", "40"))
+        
+        # 임베딩 저장/검색 모드
+        #   full: vector(1024)만 저장, 그대로 검색 (기본)
+        #   halfvec / binary: 압축 컬럼(halfvec, int8, binary)도 함께 저장하고
+        #                     1차 후보 검색은 압축 컬럼, 최종 순위는 원본 벡터로 재계산
+        self.storage_mode = os.getenv("EMBEDDING_STORAGE_MODE", "full").lower()
+        if self.storage_mode not in ("full", "halfvec", "binary"):
+            raise ValueError(f"지원하지 않는 EMBEDDING_STORAGE_MODE: {self.storage_mode}")
+        self.quantized_storage = self.storage_mode != "full"
+        # 압축 검색 시 limit의 몇 배를 1차 후보로 가져올지
+        self.rerank_factor = int(os.getenv("QUANTIZED_RERANK_FACTOR", "4"))
+        # RETRIEVAL_MODE=two_stage면 버전별 sparse 인덱스를 만들고, sparse / multi-vector가 다 채워진 버전만 전환
+        self.two_stage = os.getenv("RETRIEVAL_MODE", "dense").lower() == "two_stage"
+        # 필터 검색에서 결과가 limit보다 적을 때 탐색 범위를 2배씩 넓히는 최대 횟수
+        # (모두 실패하면 인덱스 없이 정확 검색)
+        self.filter_max_widening = int(os.getenv("FILTER_SEARCH_MAX_WIDENING", "3"))
+        
+        # 임베딩 버전: 모델/템플릿/INSTITUTION_MAX_SEQ_LENGTH 등 결과가 달라지는 설정을 바꾸면 올림
+        # (content_hash가 같아도 버전이 다르면 다시 임베딩)
+        # 이 서버가 만드는(build) 버전이며, 검색에 쓰는 버전(active_version)은 embedding_settings에서 읽음.
+        # 두 버전이 다르면 전환 중이므로 새 기관은 두 버전 모두에 저장됩니다.
+        self.embedding_version = int(os.getenv("EMBEDDING_VERSION", "1"))
+        self.active_version = self.embedding_version
+        
+        self.pool: Optional[ThreadedConnectionPool] = None
+        # ThreadedConnectionPool은 가득 차면 즉시 예외를 던지므로 세마포어로 대기시킴
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._stats_lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        
+        # 풀 통계
+        self.in_use = 0
+        self.checkouts = 0
+        self.reconnects = 0
+        self.health_check_failures = 0
+        self.checkout_timeouts = 0
+        
+        # 기관 데이터 버전 (저장할 때마다 증가, 검색 결과 캐시 무효화에 사용)
+        # 이 프로세스의 값이며, 다른 워커/서버의 저장은 공유 시퀀스로 알아챔 (refresh_data_version)
+        self.data_version = 0
+        self._shared_data_version: Optional[int] = None
+        # 저장 후 호출되는 콜백 (메모리 벡터 인덱스 등)
+        # 인자: ([(institution_id, embedding, metadata)], 임베딩 버전 (None이면 모든 버전의 metadata 갱신))
+        self._write_listeners: List[Callable[[List[Tuple[int, np.ndarray, dict]], Optional[int]], None]] = []
+        
         self.connect()
+        self.refresh_active_version()
+        self._check_vector_indexes()
     
     def connect(self):
-        """DB 연결"""
+        """커넥션 풀 생성 (실패 시 backoff 재시도)"""
         try:
-            self.conn = psycopg2.connect(
-                host=os.getenv("DB_HOST", "localhost"),
-                port=os.getenv("DB_PORT", "5432"),
-                database=os.getenv("DB_NAME", "caring"),
-                user=os.getenv("DB_USER", "mychan"),
-                password=os.getenv("DB_PASSWORD", "na58745874@")
+            self.pool = self._with_backoff(
+                lambda: ThreadedConnectionPool(
+                    self.min_size,
+                    self.max_size,
+                    host=os.getenv("DB_HOST", "localhost"),
+                    port=os.getenv("DB_PORT", "5432"),
+                    database=os.getenv("DB_NAME", "caring"),
+                    user=os.getenv("DB_USER", "mychan"),
+                    password=os.getenv("DB_PASSWORD", "na58745874@")
+                ),
+                "커넥션 풀 생성"
             )
-            logger.info("✅ PostgreSQL 연결 성공")
+            self._register_vector_type()
+            logger.info(f"✅ PostgreSQL 연결 성공 (pool min={self.min_size}, max={self.max_size})")
         except Exception as e:
             logger.error(f"❌ DB 연결 실패: {str(e)}")
             raise
     
+    def _register_vector_type(self):
+        """
+        pgvector 어댑터 등록
+        
+        numpy 배열을 그대로 파라미터로 넘길 수 있고(.tolist() 불필요),
+        vector 컬럼을 조회하면 바로 float32 numpy 배열로 받습니다.
+        타입 OID 기준 전역 등록이라 풀의 모든 커넥션에 적용됩니다.
+        """
+        conn = self.pool.getconn()
+        try:
+            register_vector(conn)
+            conn.commit()
+        finally:
+            self.pool.putconn(conn)
+    
+    def _with_backoff(self, fn: Callable[[], T], action: str) -> T:
+        """연결 관련 작업을 지수 backoff로 재시도"""
+        for attempt in range(1, self.connect_retries + 1):
+            try:
+                return fn()
+            except CONNECTION_ERRORS as e:
+                if attempt == self.connect_retries:
+                    raise
+                delay = self.backoff_base * (2 ** (attempt - 1))
+                logger.warning(
+                    f"⚠️ {action} 실패 ({attempt}/{self.connect_retries}), "
+                    f"{delay:.1f}초 후 재시도: {str(e).strip()}"
+                )
+                time.sleep(delay)
+    
+    def _is_healthy(self, conn) -> bool:
+        """빌려줄 커넥션이 살아 있는지 확인"""
+        if conn.closed:
+            return False
+        
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle < self.health_check_interval:
+            return True
+        
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+    
+    def _checkout(self):
+        """풀에서 건강한 커넥션을 꺼냄 (죽은 커넥션은 버리고 새로 연결)"""
+        def get_healthy():
+            conn = self.pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            
+            with self._stats_lock:
+                self.health_check_failures += 1
+                self.reconnects += 1
+            self._last_used.pop(id(conn), None)
+            self.pool.putconn(conn, close=True)
+            logger.warning("⚠️ 끊어진 DB 커넥션 폐기 후 재연결")
+            raise psycopg2.OperationalError("health check failed")
+        
+        conn = self._with_backoff(get_healthy, "DB 커넥션 확보")
+        with self._stats_lock:
+            self.in_use += 1
+            self.checkouts += 1
+        return conn
+    
+    def _release(self, conn, broken: bool):
+        """커넥션 반납 (깨진 커넥션은 닫아서 버림)"""
+        with self._stats_lock:
+            self.in_use -= 1
+        
+        if broken or conn.closed:
+            self._last_used.pop(id(conn), None)
+            self.pool.putconn(conn, close=True)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+            self.pool.putconn(conn)
+    
+    @contextmanager
+    def connection(self):
+        """
+        요청 단위 커넥션 (트랜잭션 1개)
+        
+        정상 종료 시 commit, 예외 시 rollback 후 반납합니다.
+        """
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._stats_lock:
+                self.checkout_timeouts += 1
+            raise PoolError(f"DB 커넥션 대기 시간 초과 ({self.checkout_timeout}s)")
+        
+        try:
+            conn = self._checkout()
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except Exception as e:
+                broken = isinstance(e, CONNECTION_ERRORS) or conn.closed
+                if not broken:
+                    try:
+                        conn.rollback()
+                    except CONNECTION_ERRORS:
+                        broken = True
+                raise
+            finally:
+                self._release(conn, broken)
+        finally:
+            self._slots.release()
+    
+    def _run(self, work: Callable[..., T], operation: Optional[str] = None, retry: bool = True) -> T:
+        """
+        커넥션을 빌려 work(conn)을 실행
+        
+        쿼리 도중 연결이 끊기면(Postgres 재시작 등) 새 커넥션으로 한 번 더 시도하므로
+        work는 재실행해도 안전해야 합니다 (SELECT / UPSERT).
+        커밋 후 결과를 읽기 전에 끊기면 두 번 적용될 수 있는 쓰기(INSERT ... RETURNING 등)는
+        retry=False로 호출해 연결 오류를 그대로 올립니다.
+        
+        operation을 주면 소요 시간(커넥션 대기 포함)과 행 수를 caring_db_* 지표로 기록합니다.
+        행 수는 work가 반환한 리스트/집합의 길이, 정수면 그 값입니다.
+        """
+        start = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                result = work(conn)
+        except CONNECTION_ERRORS as e:
+            if not retry:
+                raise
+            with self._stats_lock:
+                self.reconnects += 1
+            logger.warning(f"⚠️ DB 연결 끊김 감지, 재연결 후 재시도: {str(e).strip()}")
+            time.sleep(self.backoff_base)
+            with self.connection() as conn:
+                result = work(conn)
+        
+        if operation:
+            rows = len(result) if isinstance(result, (list, set)) else result if isinstance(result, int) else None
+            observe_db(operation, time.perf_counter() - start, rows)
+        return result
+    
+    def add_write_listener(self, listener: Callable[[List[Tuple[int, np.ndarray, dict]], Optional[int]], None]):
+        """기관 임베딩 저장 시 호출될 콜백 등록"""
+        self._write_listeners.append(listener)
+    
+    def remove_write_listener(self, listener: Callable[[List[Tuple[int, np.ndarray, dict]], Optional[int]], None]):
+        """등록한 콜백 해제 (버전 전환으로 교체된 메모리 인덱스 등)"""
+        if listener in self._write_listeners:
+            self._write_listeners.remove(listener)
+    
+    def _notify_write(self, rows: List[Tuple[int, Optional[np.ndarray], dict]], version: Optional[int]):
+        """저장 완료 후 리스너에 전달 (리스너 실패는 저장 결과에 영향 없음, 메타데이터만 바뀐 행은 embedding=None)"""
+        for listener in list(self._write_listeners):
+            try:
+                listener(rows, version)
+            except Exception as e:
+                logger.error(f"❌ 저장 리스너 실행 실패: {str(e)}", exc_info=True)
+    
+    def _bump_data_version(self):
+        """
+        기관 데이터가 바뀌었음을 알림 (이전 버전으로 캐시된 검색 결과는 더 이상 조회되지 않음)
+        
+        이 프로세스는 바로 반영하고, 공유 시퀀스(institution_data_version)를 올려
+        다른 워커/서버도 다음 refresh_data_version에서 반영하게 합니다.
+        """
+        self.invalidate_local_results()
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT nextval('institution_data_version')")
+                return cursor.fetchone()[0]
+        
+        try:
+            shared = self._run(work)
+        except Exception as e:
+            logger.warning(f"⚠️ 공유 데이터 버전 갱신 실패 (다른 워커의 캐시는 TTL 안에 만료): {str(e)}")
+            return
+        with self._stats_lock:
+            self._shared_data_version = max(shared, self._shared_data_version or 0)
+    
+    def invalidate_local_results(self):
+        """이 프로세스의 data_version만 올림 (메모리 인덱스가 다른 서버의 변경분을 반영했을 때 등)"""
+        with self._stats_lock:
+            self.data_version += 1
+    
+    def refresh_data_version(self) -> int:
+        """
+        다른 워커/서버의 저장 반영: 공유 시퀀스가 마지막으로 본 값과 다르면 data_version을 올림
+        
+        Returns:
+            이 프로세스의 data_version
+        """
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT last_value FROM institution_data_version")
+                return cursor.fetchone()[0]
+        
+        shared = self._run(work)
+        with self._stats_lock:
+            if shared != self._shared_data_version:
+                self._shared_data_version = shared
+                self.data_version += 1
+            return self.data_version
+    
+    def pool_stats(self) -> dict:
+        """/health에 노출할 풀 통계"""
+        idle = len(self.pool._pool) if self.pool else 0
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_use": self.in_use,
+            "idle": idle,
+            "checkouts": self.checkouts,
+            "reconnects": self.reconnects,
+            "health_check_failures": self.health_check_failures,
+            "checkout_timeouts": self.checkout_timeouts
+        }
+    
+    def _upsert_query(self, source: str) -> str:
+        """
+        source의 행들을 institution_embeddings에 UPSERT하는 쿼리
+        
+        source 컬럼: institution_id, embedding, original_text, metadata, embedding_version,
+                     content_hash, embedding_int8
+        압축 저장 모드면 halfvec / binary 표현은 DB에서 원본 벡터로부터 계산합니다.
+        """
+        columns = ["institution_id", "embedding", "original_text", "metadata", "embedding_version", "content_hash"]
+        values = list(columns)
+        if self.quantized_storage:
+            columns += ["embedding_half", "embedding_bin", "embedding_int8"]
+            values += [
+                "embedding::halfvec(1024)",
+                "binary_quantize(embedding)::bit(1024)",
+                "embedding_int8"
+            ]
+        updates = ",\n            ".join(
+            f"{column} = EXCLUDED.{column}" for column in columns if column not in ("institution_id", "embedding_version")
+        )
+        
+        return f"""
+        INSERT INTO institution_embeddings
+            ({", ".join(columns)})
+        SELECT {", ".join(values)}
+        FROM {source}
+        ON CONFLICT (institution_id, embedding_version)
+        DO UPDATE SET
+            {updates},
+            updated_at = NOW()
+        """
+    
+    def _stage_embeddings(
+        self,
+        cursor,
+        rows: List[Tuple[int, np.ndarray, str, dict, Optional[str], Optional[str]]],
+        version: int
+    ):
+        """
+        (institution_id, embedding, original_text, metadata, content_hash, expected_updated_at) 행들을
+        version 임베딩으로 트랜잭션 임시 테이블(STAGING_TABLE)에 binary COPY로 적재
+        """
+        payload = encode_copy_rows(
+            [
+                (
+                    institution_id, embedding, original_text, metadata,
+                    version, content_hash, self._int8_code(embedding), expected_updated_at
+                )
+                for institution_id, embedding, original_text, metadata, content_hash, expected_updated_at in rows
+            ],
+            ("int8", "vector", "text", "jsonb", "int4", "text", "bytea", "text")
+        )
+        cursor.execute(f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            institution_id BIGINT,
+            embedding vector(1024),
+            original_text TEXT,
+            metadata JSONB,
+            embedding_version INT,
+            content_hash TEXT,
+            embedding_int8 BYTEA,
+            expected_updated_at TEXT
+        ) ON COMMIT DROP
+        """)
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT binary)",
+            io.BytesIO(payload)
+        )
+    
+    def _int8_code(self, embedding: np.ndarray) -> Optional[bytes]:
+        """스칼라 양자화 int8 표현 (압축 저장 모드에서만)"""
+        if not self.quantized_storage:
+            return None
+        return quantize_int8(np.asarray(embedding, dtype=np.float32)).tobytes()
+    
+    def refresh_metadata_if_unchanged(self, institution_id: int, content_hash: str, metadata: dict) -> bool:
+        """
+        임베딩 텍스트(content_hash)가 현재 버전(EMBEDDING_VERSION)으로 저장된 값과 같으면 metadata만 갱신
+        (전환 중이라 다른 버전의 행이 있으면 그 행들의 metadata도 함께 갱신)
+        
+        Returns:
+            True면 갱신 완료 (재임베딩 불필요), False면 신규 기관이거나 텍스트/버전이 달라 재임베딩 필요
+        """
+        return institution_id in self.refresh_metadata_if_unchanged_batch([(institution_id, content_hash, metadata)])
+    
+    def refresh_metadata_if_unchanged_batch(self, rows: List[Tuple[int, str, dict]]) -> set:
+        """
+        여러 기관에 대해 refresh_metadata_if_unchanged를 한 문장으로 실행
+        
+        텍스트 비교와 갱신이 한 UPDATE 안에서 일어나므로, 그 사이에 다른 요청이
+        텍스트를 바꿔도 옛 임베딩에 새 메타데이터가 붙는 일은 없습니다.
+        
+        Args:
+            rows: (institution_id, content_hash, metadata) 튜플 리스트
+        
+        Returns:
+            metadata만 갱신된 institution_id 집합
+        """
+        if not rows:
+            return set()
+        
+        deduped = {
+            institution_id: (institution_id, content_hash, Json(metadata), self.embedding_version)
+            for institution_id, content_hash, metadata in rows
+        }
+        query = """
+        UPDATE institution_embeddings AS target
+        SET metadata = source.metadata,
+            updated_at = NOW()
+        FROM (VALUES %s) AS source (institution_id, content_hash, metadata, embedding_version)
+        WHERE target.institution_id = source.institution_id
+          AND EXISTS (
+              SELECT 1 FROM institution_embeddings AS current
+              WHERE current.institution_id = source.institution_id
+                AND current.embedding_version = source.embedding_version
+                AND current.content_hash = source.content_hash
+          )
+        RETURNING target.institution_id
+        """
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                returned = execute_values(
+                    cursor,
+                    query,
+                    list(deduped.values()),
+                    template="(%s::bigint, %s::text, %s::jsonb, %s::int)",
+                    fetch=True
+                )
+                return {row[0] for row in returned}
+        
+        try:
+            refreshed = self._run(work, "refresh_metadata")
+            if refreshed:
+                self._bump_data_version()
+                self._notify_write([
+                    (institution_id, None, rows_metadata)
+                    for institution_id, _, rows_metadata in rows
+                    if institution_id in refreshed
+                ], None)
+            logger.info(f"✅ 메타데이터만 갱신 (텍스트 변경 없음): {len(refreshed)}/{len(deduped)}개")
+            return refreshed
+        
+        except Exception as e:
+            logger.error(f"❌ 메타데이터 갱신 실패: {str(e)}")
+            raise
+    
     def save_institution_embedding(
         self,
         institution_id: int,
         embedding: np.ndarray,
         original_text: str,
-        metadata: dict
+        metadata: dict,
+        content_hash: Optional[str] = None,
+        version: Optional[int] = None
     ) -> bool:
-        """기관 임베딩 저장"""
+        """
+        기관 임베딩 저장 (content_hash: 임베딩 텍스트 해시, 다음 요청에서 변경 여부 판단용)
+        
+        version: 저장할 임베딩 버전 (None이면 EMBEDDING_VERSION)
+        """
+        version = version or self.embedding_version
+        # UPSERT 쿼리 ((institution_id, 버전)이 있으면 UPDATE, 없으면 INSERT)
+        query = self._upsert_query("""
+            (VALUES (%s::bigint, %s::vector(1024), %s::text, %s::jsonb, %s::int, %s::text, %s::bytea))
+            AS source (institution_id, embedding, original_text, metadata, embedding_version, content_hash, embedding_int8)
+        """)
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(query, (
+                    institution_id,
+                    embedding,  # pgvector 어댑터가 numpy 배열을 직접 변환
+                    original_text,
+                    Json(metadata),
+                    version,
+                    content_hash,
+                    self._int8_code(embedding)
+                ))
+                return cursor.rowcount
+        
         try:
-            cursor = self.conn.cursor()
-            
-            # numpy array를 list로 변환
-            embedding_list = embedding.tolist()
-            
-            # UPSERT 쿼리 (institution_id가 있으면 UPDATE, 없으면 INSERT)
-            query = """
-            INSERT INTO institution_embeddings 
-                (institution_id, embedding, original_text, metadata, embedding_version)
-            VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (institution_id) 
-            DO UPDATE SET
-                embedding = EXCLUDED.embedding,
-                original_text = EXCLUDED.original_text,
-                metadata = EXCLUDED.metadata,
-                embedding_version = EXCLUDED.embedding_version,
-                updated_at = NOW()
-            """
-            
-            cursor.execute(query, (
-                institution_id,
-                embedding_list,
-                original_text,
-                Json(metadata),
-                1  # embedding_version
-            ))
-            
-            self.conn.commit()
-            cursor.close()
-            
-            logger.info(f"✅ 기관 ID {institution_id} 임베딩 저장 완료")
+            self._run(work, "save_embedding")
+            self._bump_data_version()
+            self._notify_write([(institution_id, embedding, metadata)], version)
+            logger.info(f"✅ 기관 ID {institution_id} 임베딩 저장 완료 (v{version})")
             return True
-            
+        
         except Exception as e:
-            self.conn.rollback()
             logger.error(f"❌ 임베딩 저장 실패: {str(e)}")
             raise
     
+    def save_institution_embeddings_batch(
+        self,
+        rows: List[Tuple[int, np.ndarray, str, dict, Optional[str]]],
+        version: Optional[int] = None
+    ) -> int:
+        """
+        여러 기관 임베딩을 한 번의 쿼리 / 한 번의 트랜잭션으로 저장
+        
+        Args:
+            rows: (institution_id, embedding, original_text, metadata, content_hash) 튜플 리스트
+            version: 저장할 임베딩 버전 (None이면 EMBEDDING_VERSION)
+        
+        Returns:
+            저장된 행 수
+        """
+        if not rows:
+            return 0
+        version = version or self.embedding_version
+        
+        # 같은 institution_id가 한 문장에 두 번 나오면 ON CONFLICT가 실패하므로 마지막 값만 남김
+        deduped = {}
+        for institution_id, embedding, original_text, metadata, content_hash in rows:
+            deduped[institution_id] = (institution_id, embedding, original_text, metadata, content_hash)
+        
+        # 1) binary COPY로 임시 테이블에 적재 (벡터는 float32 바이트 그대로 전송)
+        # 2) 한 문장으로 UPSERT
+        query = self._upsert_query(STAGING_TABLE)
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                self._stage_embeddings(cursor, [
+                    (institution_id, embedding, original_text, metadata, content_hash, None)
+                    for institution_id, embedding, original_text, metadata, content_hash in deduped.values()
+                ], version)
+                cursor.execute(query)
+                return cursor.rowcount
+        
+        try:
+            self._run(work, "save_embeddings_batch")
+            self._bump_data_version()
+            self._notify_write([
+                (institution_id, embedding, metadata)
+                for institution_id, embedding, _, metadata, _ in deduped.values()
+            ], version)
+            logger.info(f"✅ 기관 임베딩 일괄 저장 완료 ({len(deduped)}개, v{version})")
+            return len(deduped)
+        
+        except Exception as e:
+            logger.error(f"❌ 임베딩 일괄 저장 실패: {str(e)}")
+            raise
+    
     def search_similar_institutions(
         self,
         user_embedding: np.ndarray,
         limit: int = 10,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[dict] = None,
+        version: Optional[int] = None
     ) -> List[Dict]:
         """
         기능 7: 사용자 임베딩과 유사한 기관 검색
         
         pgvector의 코사인 유사도를 사용하여 검색합니다.
-        <=> 연산자는 코사인 거리를 계산하며, IVFFlat 인덱스로 최적화됩니다.
+        <=> 연산자는 코사인 거리를 계산하며, IVFFlat 또는 HNSW 인덱스로 최적화됩니다.
+        압축 저장 모드에서는 압축 컬럼으로 후보를 고른 뒤 원본 벡터로 재정렬합니다.
+        
+        거리는 한 번만 계산하고, 안쪽 쿼리는 ORDER BY 거리 LIMIT 형태라
+        플래너가 ANN 인덱스 스캔을 그대로 사용합니다.
+        min_similarity는 인덱스 스캔이 끝난 후보에만 적용합니다.
+        
+        필터는 같은 쿼리의 WHERE 절로 들어갑니다. ANN 인덱스는 probes / ef_search
+        범위 안의 후보만 보고 필터를 적용하므로 조건이 까다로우면 결과가 limit보다
+        적을 수 있습니다. 이 경우 같은 트랜잭션에서 탐색 범위를 2배씩 넓혀 다시 찾고,
+        그래도 모자라면 ANN 인덱스를 끄고 정확 검색합니다 (필터 인덱스로 대상 행을
+        먼저 줄인 뒤 거리 정렬). 따라서 조건을 만족하는 기관이 limit개 이상이면
+        항상 limit개를 반환합니다.
         
         Args:
             user_embedding: 사용자 프로필 임베딩 벡터 (1024차원)
             limit: 반환할 최대 기관 수 (기본 10개)
             min_similarity: 최소 유사도 threshold (0~1, 기본 0.0)
+            probes: IVFFlat 탐색 리스트 수 (None이면 IVFFLAT_PROBES)
+            ef_search: HNSW 탐색 후보 수 (None이면 HNSW_EF_SEARCH)
+            filters: RecommendationFilters.to_search_filters() 형식의 필터 (None이면 전체)
+            version: 검색할 임베딩 버전 (None이면 active_version, user_embedding과 같은 모델이어야 함)
         
         Returns:
             유사 기관 리스트 [
@@ -107,37 +648,56 @@ class DatabaseService:
                 ...
             ]
         """
+        version = version or self.active_version
+        where, filter_params = self._filter_clause(filters, version)
+        
+        # pgvector 코사인 유사도 검색 쿼리
+        # <=> 연산자: 코사인 거리 (0에 가까울수록 유사)
+        # 1 - 코사인 거리 = 코사인 유사도 (1에 가까울수록 유사, 0~1 범위)
+        query = f"""
+        SELECT
+            institution_id,
+            1 - distance AS similarity,
+            metadata,
+            original_text
+        FROM (
+            {self._candidate_query(where)}
+        ) AS candidates
+        ORDER BY distance
+        """
+        
+        knob_name, knob_value = self._search_knob(probes, ef_search)
+        params = {
+            "query": user_embedding,  # pgvector 어댑터가 numpy 배열을 직접 변환
+            "limit": limit,
+            **filter_params
+        }
+        attempts = []
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                widening = self.filter_max_widening if filters else 0
+                for attempt in range(widening + 1):
+                    scale = 2 ** attempt
+                    # SET LOCAL: 이 트랜잭션(요청)에만 적용
+                    cursor.execute(f"SET LOCAL {knob_name} = %s", (knob_value * scale,))
+                    cursor.execute(query, {**params, "candidates": limit * self.rerank_factor * scale})
+                    rows = cursor.fetchall()
+                    attempts.append(f"{knob_name}={knob_value * scale}")
+                    if len(rows) >= limit or not filters:
+                        return rows
+                
+                # 넓혀도 모자라면 ANN 인덱스 없이 정확 검색 (필터 인덱스 → 거리 정렬)
+                cursor.execute("SET LOCAL enable_indexscan = off")
+                cursor.execute(self._exact_query(where), params)
+                attempts.append("exact")
+                return cursor.fetchall()
+        
         try:
-            cursor = self.conn.cursor()
-            
-            # numpy array를 list로 변환
-            embedding_list = user_embedding.tolist()
-            
-            # pgvector 코사인 유사도 검색 쿼리
-            # <=> 연산자: 코사인 거리 (0에 가까울수록 유사)
-            # 1 - 코사인 거리 = 코사인 유사도 (1에 가까울수록 유사, 0~1 범위)
-            query = """
-            SELECT 
-                institution_id,
-                1 - (embedding <=> %s::vector) AS similarity,
-                metadata,
-                original_text
-            FROM institution_embeddings
-            WHERE 1 - (embedding <=> %s::vector) >= %s
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-            """
-            
-            cursor.execute(query, (
-                embedding_list,
-                embedding_list,
-                min_similarity,
-                embedding_list,
-                limit
-            ))
-            
             results = []
-            for row in cursor.fetchall():
+            for row in self._run(work, "search"):
+                if row[1] < min_similarity:
+                    continue
                 results.append({
                     "institutionId": row[0],
                     "similarity": float(row[1]),
@@ -145,18 +705,956 @@ class DatabaseService:
                     "originalText": row[3]
                 })
             
-            cursor.close()
-            
             top_similarity = results[0]['similarity'] if results else 0
-            logger.info(f"✅ 유사 기관 검색 완료: {len(results)}개 발견 (상위 유사도: {top_similarity:.4f})")
+            logger.info(
+                f"✅ 유사 기관 검색 완료: {len(results)}개 발견 (상위 유사도: {top_similarity:.4f}, "
+                f"v{version}, 인덱스={self.vector_index_type}, {' → '.join(attempts)}, 저장 모드={self.storage_mode}, "
+                f"필터={filters or '없음'})"
+            )
             return results
-            
+        
         except Exception as e:
             logger.error(f"❌ 유사도 검색 실패: {str(e)}")
             raise
     
+    def _candidate_query(self, where: str = "") -> str:
+        """
+        필터를 만족하는 거리순 상위 limit개 후보 쿼리
+        
+        full: 원본 벡터 ANN 인덱스로 바로 상위 limit개
+        halfvec / binary: 압축 컬럼으로 limit * rerank_factor개를 먼저 고르고
+                          원본 벡터 거리로 다시 정렬해 limit개
+        """
+        if not self.quantized_storage:
+            return f"""
+            SELECT
+                institution_id,
+                metadata,
+                original_text,
+                embedding <=> %(query)s::vector AS distance
+            FROM institution_embeddings
+            {where}
+            ORDER BY distance
+            LIMIT %(limit)s
+            """
+        
+        if self.storage_mode == "halfvec":
+            first_stage_order = "embedding_half <=> %(query)s::vector::halfvec(1024)"
+        else:
+            first_stage_order = "embedding_bin <~> binary_quantize(%(query)s::vector)::bit(1024)"
+        
+        return f"""
+            SELECT
+                institution_id,
+                metadata,
+                original_text,
+                embedding <=> %(query)s::vector AS distance
+            FROM (
+                SELECT institution_id, metadata, original_text, embedding
+                FROM institution_embeddings
+                {where}
+                ORDER BY {first_stage_order}
+                LIMIT %(candidates)s
+            ) AS first_stage
+            ORDER BY distance
+            LIMIT %(limit)s
+            """
+    
+    def _exact_query(self, where: str) -> str:
+        """필터를 만족하는 행 전체에서 원본 벡터 거리로 정확히 상위 limit개"""
+        return f"""
+        SELECT
+            institution_id,
+            1 - (embedding <=> %(query)s::vector) AS similarity,
+            metadata,
+            original_text
+        FROM institution_embeddings
+        {where}
+        ORDER BY embedding <=> %(query)s::vector
+        LIMIT %(limit)s
+        """
+    
+    @staticmethod
+    def _filter_clause(filters: Optional[dict], version: int) -> Tuple[str, dict]:
+        """
+        검색 필터 → WHERE 절과 파라미터
+        
+        embedding_version: 항상 포함 (버전별 부분 ANN 인덱스의 조건과 같은 식)
+        institution_types: metadata->>'type' 일치 (idx_metadata_type)
+        region_prefix: metadata->>'address' 접두어 (idx_metadata_address)
+        required_*: metadata @> 포함 조건, 태그를 모두 가져야 함 (GIN idx_metadata)
+        excluded_institution_ids: 제외
+        max_distance_km: origin_latitude/longitude 기준 반경, 위경도 사각형으로 먼저
+                         거른 뒤(GiST idx_metadata_location) 실제 거리로 다시 확인
+        """
+        # 값을 쿼리에 직접 넣어야(psycopg2는 클라이언트에서 치환) 플래너가 부분 인덱스 조건과 일치시킴
+        conditions = ["embedding_version = %(embedding_version)s"]
+        params = {"embedding_version": int(version)}
+        filters = filters or {}
+        
+        if filters.get("institution_types"):
+            conditions.append("metadata->>'type' = ANY(%(institution_types)s)")
+            params["institution_types"] = list(filters["institution_types"])
+        
+        if filters.get("region_prefix"):
+            escaped = (
+                filters["region_prefix"]
+                .replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            conditions.append("metadata->>'address' LIKE %(region_prefix)s")
+            params["region_prefix"] = escaped + "%"
+        
+        required_tags = {
+            field: list(filters[key])
+            for field, key in (
+                ("specialized_diseases", "required_specialized_diseases"),
+                ("service_types", "required_service_types")
+            )
+            if filters.get(key)
+        }
+        if required_tags:
+            conditions.append("metadata @> %(required_tags)s::jsonb")
+            params["required_tags"] = Json(required_tags)
+        
+        if filters.get("excluded_institution_ids"):
+            conditions.append("institution_id <> ALL(%(excluded_institution_ids)s::bigint[])")
+            params["excluded_institution_ids"] = list(filters["excluded_institution_ids"])
+        
+        if filters.get("max_distance_km") is not None:
+            latitude, longitude = filters["origin_latitude"], filters["origin_longitude"]
+            min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, filters["max_distance_km"])
+            conditions.append(
+                f"{LOCATION_POINT} <@ box(point(%(min_lon)s, %(min_lat)s), point(%(max_lon)s, %(max_lat)s))"
+            )
+            conditions.append(f"""2 * {EARTH_RADIUS_KM} * asin(sqrt(
+                    power(sin(radians((metadata->>'latitude')::float8 - %(origin_lat)s) / 2), 2)
+                    + cos(radians(%(origin_lat)s)) * cos(radians((metadata->>'latitude')::float8))
+                    * power(sin(radians((metadata->>'longitude')::float8 - %(origin_lon)s) / 2), 2)
+                  )) <= %(max_distance_km)s""")
+            params.update({
+                "min_lat": min_lat, "min_lon": min_lon, "max_lat": max_lat, "max_lon": max_lon,
+                "origin_lat": float(latitude), "origin_lon": float(longitude),
+                "max_distance_km": float(filters["max_distance_km"])
+            })
+        
+        return "WHERE " + "\n              AND ".join(conditions), params
+    
+    def _search_knob(self, probes: Optional[int], ef_search: Optional[int]) -> Tuple[str, int]:
+        """사용 중인 인덱스 종류에 맞는 recall 설정 (요청 값 > 배포 기본값)"""
+        if self.vector_index_type == "hnsw":
+            return "hnsw.ef_search", int(ef_search or self.hnsw_ef_search)
+        return "ivfflat.probes", int(probes or self.ivfflat_probes)
+    
+    def _check_vector_indexes(self):
+        """active 버전의 ANN 인덱스를 확인하고 설정과 다르면 경고"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                names = self._version_index_names(cursor, self.active_version)
+                cursor.execute(
+                    "SELECT indexname, indexdef FROM pg_indexes WHERE indexname = ANY(%s)", (names,)
+                )
+                return cursor.fetchall()
+        
+        indexes = self._run(work)
+        found = {
+            "hnsw" if "using hnsw" in indexdef.lower() else "ivfflat": name
+            for name, indexdef in indexes
+            if "(embedding vector_" in indexdef
+        }
+        logger.info(
+            f"🔎 벡터 인덱스 (v{self.active_version}): 설정={self.vector_index_type} "
+            f"(ivfflat.probes={self.ivfflat_probes}, hnsw.ef_search={self.hnsw_ef_search}), "
+            f"DB={found or '없음'}, 빌드 버전=v{self.embedding_version}"
+        )
+        if not self.quantized_storage and self.vector_index_type not in found:
+            logger.warning(
+                f"⚠️ v{self.active_version}의 {self.vector_index_type} 인덱스가 없습니다. "
+                f"database/schema.sql을 확인하세요."
+            )
+        if len(found) > 1:
+            logger.warning("⚠️ IVFFlat/HNSW 인덱스가 모두 있어 플래너가 임의로 선택할 수 있습니다. 사용하지 않는 인덱스를 삭제하세요.")
+    
+    def save_lexical_embeddings(
+        self,
+        rows: List[Tuple[int, Optional[str], Dict[int, float], bytes]],
+        version: Optional[int] = None
+    ) -> int:
+        """
+        2단계 검색용 sparse / multi-vector 표현 저장 (database/two_stage_retrieval.sql)
+        
+        dense 임베딩이 이미 저장된 행만 갱신합니다. lexical_hash에 계산 당시 content_hash를 남겨
+        텍스트가 바뀐 뒤 아직 다시 계산하지 않은 표현은 검색에서 쓰지 않습니다.
+        
+        Args:
+            rows: (institution_id, content_hash, sparse {token_id: 가중치}, int8 multi-vector 바이트) 리스트
+            version: 임베딩 버전 (None이면 EMBEDDING_VERSION)
+        
+        Returns:
+            갱신된 행 수
+        """
+        if not rows:
+            return 0
+        version = version or self.embedding_version
+        
+        payload = encode_copy_rows(
+            [
+                (institution_id, content_hash, (SPARSE_DIMENSION, sparse), colbert)
+                for institution_id, content_hash, sparse, colbert in {row[0]: row for row in rows}.values()
+            ],
+            ("int8", "text", "sparsevec", "bytea")
+        )
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                CREATE TEMP TABLE {LEXICAL_STAGING_TABLE} (
+                    institution_id BIGINT,
+                    content_hash TEXT,
+                    embedding_sparse sparsevec({SPARSE_DIMENSION}),
+                    embedding_colbert BYTEA
+                ) ON COMMIT DROP
+                """)
+                cursor.copy_expert(
+                    f"COPY {LEXICAL_STAGING_TABLE} FROM STDIN WITH (FORMAT binary)",
+                    io.BytesIO(payload)
+                )
+                cursor.execute(f"""
+                UPDATE institution_embeddings AS target
+                SET embedding_sparse = staging.embedding_sparse,
+                    embedding_colbert = staging.embedding_colbert,
+                    lexical_hash = staging.content_hash
+                FROM {LEXICAL_STAGING_TABLE} AS staging
+                WHERE target.institution_id = staging.institution_id
+                  AND target.embedding_version = %s
+                """, (version,))
+                return cursor.rowcount
+        
+        try:
+            updated = self._run(work, "save_lexical")
+            self._bump_data_version()
+            logger.info(f"✅ sparse / multi-vector 저장 완료 ({updated}개, v{version})")
+            return updated
+        
+        except Exception as e:
+            logger.error(f"❌ sparse / multi-vector 저장 실패: {str(e)}")
+            raise
+    
+    def search_sparse_institutions(
+        self,
+        query_sparse: Dict[int, float],
+        limit: int = 50,
+        filters: Optional[dict] = None,
+        version: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        sparse(어휘 가중치) 내적 상위 limit개 후보 (sparsevec HNSW 인덱스)
+        
+        <#>는 음의 내적이므로 점수는 부호를 바꿔 반환합니다.
+        sparse 표현이 없거나 텍스트가 바뀐 뒤 다시 계산하지 않은 행은 제외합니다.
+        
+        Returns:
+            [(institution_id, sparse 점수), ...] 점수 내림차순
+        """
+        if not query_sparse:
+            return []
+        version = version or self.active_version
+        where, params = self._filter_clause(filters, version)
+        query = f"""
+        SELECT institution_id, -(embedding_sparse <#> %(sparse)s::sparsevec) AS score
+        FROM institution_embeddings
+        {where}
+          AND embedding_sparse IS NOT NULL
+          AND lexical_hash IS NOT DISTINCT FROM content_hash
+        ORDER BY embedding_sparse <#> %(sparse)s::sparsevec
+        LIMIT %(limit)s
+        """
+        params.update({"sparse": sparsevec_literal(query_sparse), "limit": limit})
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        
+        return [(row[0], float(row[1])) for row in self._run(work, "search_sparse")]
+    
+    def fetch_rerank_candidates(
+        self,
+        institution_ids: List[int],
+        query_embedding: np.ndarray,
+        query_sparse: Dict[int, float],
+        version: Optional[int] = None
+    ) -> List[Tuple[int, float, Optional[float], Optional[bytes], dict, str]]:
+        """
+        후보 기관들의 재정렬 재료를 한 번에 조회
+        
+        Returns:
+            [(institution_id, dense 유사도, sparse 점수, int8 multi-vector 바이트, metadata, original_text), ...]
+            sparse / multi-vector가 없거나 오래된 행은 None
+        """
+        if not institution_ids:
+            return []
+        version = version or self.active_version
+        query = """
+        SELECT
+            institution_id,
+            1 - (embedding <=> %(query)s::vector) AS similarity,
+            CASE WHEN lexical_hash IS NOT DISTINCT FROM content_hash AND %(sparse)s::sparsevec IS NOT NULL
+                 THEN -(embedding_sparse <#> %(sparse)s::sparsevec) END AS sparse_score,
+            CASE WHEN lexical_hash IS NOT DISTINCT FROM content_hash THEN embedding_colbert END AS colbert,
+            metadata,
+            original_text
+        FROM institution_embeddings
+        WHERE embedding_version = %(version)s
+          AND institution_id = ANY(%(ids)s::bigint[])
+        """
+        params = {
+            "query": query_embedding,
+            "sparse": sparsevec_literal(query_sparse) if query_sparse else None,
+            "version": version,
+            "ids": list(institution_ids)
+        }
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        
+        return [
+            (row[0], float(row[1]), None if row[2] is None else float(row[2]),
+             None if row[3] is None else bytes(row[3]), row[4], row[5])
+            for row in self._run(work, "fetch_rerank")
+        ]
+    
+    def fetch_lexical_backlog(
+        self,
+        version: Optional[int] = None,
+        after_id: int = -1,
+        limit: int = 256
+    ) -> List[Tuple[int, str, Optional[str]]]:
+        """
+        sparse / multi-vector가 없거나 텍스트가 바뀐 행 (institution_id > after_id, limit개)
+        
+        Returns:
+            [(institution_id, original_text, content_hash), ...]
+        """
+        version = version or self.active_version
+        query = f"""
+        SELECT institution_id, original_text, content_hash
+        FROM institution_embeddings
+        WHERE embedding_version = %s
+          AND institution_id > %s
+          AND {LEXICAL_BACKLOG_CONDITION}
+        ORDER BY institution_id
+        LIMIT %s
+        """
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(query, (version, after_id, limit))
+                return cursor.fetchall()
+        
+        return self._run(work, "fetch_lexical_backlog")
+    
+    def fetch_reembedding_chunk(
+        self,
+        after_id: int,
+        since: Optional[str],
+        chunk_size: int,
+        source_version: int,
+        target_version: int
+    ) -> List[Tuple[int, str, dict, Optional[str], str]]:
+        """
+        재임베딩 작업용: source_version 행 중 institution_id > after_id인 것을 chunk_size개 (keyset 페이지)
+        
+        Returns:
+            [(institution_id, original_text, metadata, target_version 행의 content_hash (없으면 None),
+              source 행의 updated_at 텍스트), ...]
+        """
+        query = """
+        SELECT source.institution_id, source.original_text, source.metadata,
+               target.content_hash, source.updated_at::text
+        FROM institution_embeddings AS source
+        LEFT JOIN institution_embeddings AS target
+          ON target.institution_id = source.institution_id
+         AND target.embedding_version = %(target_version)s
+        WHERE source.embedding_version = %(source_version)s
+          AND source.institution_id > %(after_id)s
+          AND (%(since)s::timestamp IS NULL OR source.updated_at >= %(since)s::timestamp)
+        ORDER BY source.institution_id
+        LIMIT %(chunk_size)s
+        """
+        params = {
+            "after_id": after_id,
+            "since": since,
+            "chunk_size": chunk_size,
+            "source_version": source_version,
+            "target_version": target_version
+        }
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        
+        return self._run(work, "fetch_reembedding_chunk")
+    
+    def fetch_reembedding_rows(
+        self,
+        institution_ids: List[int],
+        source_version: int,
+        target_version: int
+    ) -> List[Tuple[int, str, dict, Optional[str], str]]:
+        """재임베딩 작업용: 지정한 기관의 source_version 행 (fetch_reembedding_chunk와 같은 형식, 실패한 기관 재시도)"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT source.institution_id, source.original_text, source.metadata,
+                       target.content_hash, source.updated_at::text
+                FROM institution_embeddings AS source
+                LEFT JOIN institution_embeddings AS target
+                  ON target.institution_id = source.institution_id
+                 AND target.embedding_version = %(target_version)s
+                WHERE source.embedding_version = %(source_version)s
+                  AND source.institution_id = ANY(%(institution_ids)s::bigint[])
+                ORDER BY source.institution_id
+                """, {
+                    "institution_ids": list(institution_ids),
+                    "source_version": source_version,
+                    "target_version": target_version
+                })
+                return cursor.fetchall()
+        
+        return self._run(work, "fetch_reembedding_rows")
+    
+    def count_institutions(self, since: Optional[str] = None, version: Optional[int] = None) -> int:
+        """version(기본 active_version) 행 수 (재임베딩 진행률 계산용)"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT COUNT(*) FROM institution_embeddings
+                WHERE embedding_version = %s
+                  AND (%s::timestamp IS NULL OR updated_at >= %s::timestamp)
+                """, (version or self.active_version, since, since))
+                return cursor.fetchone()[0]
+        
+        return self._run(work)
+    
+    def save_reembedded_batch(
+        self,
+        rows: List[Tuple[int, np.ndarray, str, dict, str, str]],
+        source_version: int,
+        target_version: int
+    ) -> set:
+        """
+        재임베딩 결과를 target_version 행으로 저장
+        
+        source_version 행을 읽은 뒤 다른 요청이 그 기관을 수정했다면(updated_at이 바뀜)
+        저장하지 않습니다. 실시간 저장은 모든 버전에 쓰므로 이미 최신 텍스트가 들어 있습니다.
+        
+        Args:
+            rows: (institution_id, embedding, original_text, metadata, content_hash, 읽을 때의 updated_at 텍스트)
+        
+        Returns:
+            실제로 저장된 institution_id 집합
+        """
+        if not rows:
+            return set()
+        
+        query = self._upsert_query(f"""
+            (
+                SELECT staged.*
+                FROM {STAGING_TABLE} AS staged
+                JOIN institution_embeddings AS current
+                  ON current.institution_id = staged.institution_id
+                 AND current.embedding_version = %(source_version)s
+                 AND current.updated_at = staged.expected_updated_at::timestamp
+            ) AS source
+        """) + "RETURNING institution_id"
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                self._stage_embeddings(cursor, rows, target_version)
+                cursor.execute(query, {"source_version": source_version})
+                return {row[0] for row in cursor.fetchall()}
+        
+        try:
+            saved = self._run(work, "save_reembedded_batch")
+            if saved:
+                self._bump_data_version()
+                self._notify_write([
+                    (institution_id, embedding, metadata)
+                    for institution_id, embedding, _, metadata, _, _ in rows
+                    if institution_id in saved
+                ], target_version)
+            return saved
+        
+        except Exception as e:
+            logger.error(f"❌ 재임베딩 결과 저장 실패: {str(e)}")
+            raise
+    
+    def refresh_active_version(self) -> int:
+        """
+        embedding_settings에서 검색에 사용할 임베딩 버전을 읽음
+        
+        설정 행이 없으면(최초 배포) EMBEDDING_VERSION을 active로 기록합니다.
+        """
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                INSERT INTO embedding_settings (id, active_version)
+                VALUES (TRUE, %s)
+                ON CONFLICT (id) DO NOTHING
+                """, (self.embedding_version,))
+                cursor.execute("SELECT active_version FROM embedding_settings WHERE id")
+                return cursor.fetchone()[0]
+        
+        active_version = self._run(work)
+        if active_version != self.active_version:
+            logger.info(f"🔄 활성 임베딩 버전: v{self.active_version} → v{active_version}")
+            self.active_version = active_version
+            self._bump_data_version()
+        return active_version
+    
+    def activate_version(self, version: int, force: bool = False) -> int:
+        """
+        검색에 사용할 임베딩 버전 전환 (embedding_settings 한 행 UPDATE이므로 원자적)
+        
+        force가 아니면 현재 active 버전의 모든 기관이 새 버전에도 있고
+        새 버전의 ANN 인덱스가 준비되어 있어야 합니다.
+        2단계 검색(two_stage)이면 새 버전의 sparse / multi-vector와 sparse 인덱스도 준비되어 있어야 합니다.
+        
+        Returns:
+            이전 active 버전
+        """
+        def work(conn):
+            with conn.cursor() as cursor:
+                # 동시 전환 방지
+                cursor.execute("SELECT active_version FROM embedding_settings WHERE id FOR UPDATE")
+                previous = cursor.fetchone()[0]
+                if previous == version:
+                    return previous
+                
+                if not force:
+                    cursor.execute("""
+                    SELECT COUNT(*)
+                    FROM institution_embeddings AS active
+                    WHERE active.embedding_version = %s
+                      AND NOT EXISTS (
+                          SELECT 1 FROM institution_embeddings AS candidate
+                          WHERE candidate.institution_id = active.institution_id
+                            AND candidate.embedding_version = %s
+                      )
+                    """, (previous, version))
+                    missing = cursor.fetchone()[0]
+                    if missing:
+                        raise ValueError(f"v{version}에 아직 없는 기관이 {missing}개 있습니다. 재임베딩을 먼저 완료하세요.")
+                    if not self._version_index_names(cursor, version, sparse=False):
+                        raise ValueError(f"v{version}의 벡터 인덱스가 없습니다. 재임베딩 작업을 완료하거나 build_version_index를 실행하세요.")
+                    if self.two_stage:
+                        self._check_lexical_ready(cursor, version)
+                
+                cursor.execute("""
+                UPDATE embedding_settings
+                SET active_version = %s, previous_version = %s, switched_at = NOW()
+                WHERE id
+                """, (version, previous))
+                return previous
+        
+        previous = self._run(work)
+        self.refresh_active_version()
+        logger.info(f"✅ 임베딩 버전 전환 완료: v{previous} → v{version}")
+        return previous
+    
+    def _check_lexical_ready(self, cursor, version: int):
+        """2단계 검색: version의 sparse / multi-vector가 모두 채워졌고 sparse 인덱스가 있는지 (아니면 ValueError)"""
+        cursor.execute(
+            f"SELECT COUNT(*) FROM institution_embeddings WHERE embedding_version = %s AND {LEXICAL_BACKLOG_CONDITION}",
+            (version,)
+        )
+        backlog = cursor.fetchone()[0]
+        if backlog:
+            raise ValueError(
+                f"v{version}에 sparse / multi-vector가 없는 기관이 {backlog}개 있습니다. "
+                f"재임베딩 작업을 완료하거나 scripts.build_lexical_index --version {version}을 실행하세요."
+            )
+        if not self._version_index_names(cursor, version, sparse=True):
+            raise ValueError(f"v{version}의 sparse 인덱스가 없습니다. 재임베딩 작업을 완료하거나 build_version_index를 실행하세요.")
+    
+    def drop_version(self, version: int, grace_seconds: float = 0.0) -> int:
+        """
+        사용하지 않는 임베딩 버전의 행과 부분 인덱스 삭제 (active / EMBEDDING_VERSION은 거부)
+        
+        방금 전환된 이전 버전은 다른 서버가 아직 검색 중일 수 있으므로
+        전환 후 grace_seconds가 지나기 전에는 거부합니다.
+        
+        Returns:
+            삭제된 행 수
+        """
+        self.refresh_active_version()
+        if version in (self.active_version, self.embedding_version):
+            raise ValueError(f"v{version}은 사용 중인 버전이라 삭제할 수 없습니다.")
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT 1 FROM embedding_settings
+                WHERE id AND previous_version = %s
+                  AND switched_at > NOW() - %s * INTERVAL '1 second'
+                """, (version, grace_seconds))
+                if cursor.fetchone():
+                    raise ValueError(f"v{version}에서 전환된 지 {grace_seconds:.0f}초가 지나지 않았습니다. 잠시 후 다시 시도하세요.")
+                
+                cursor.execute("DELETE FROM institution_embeddings WHERE embedding_version = %s", (version,))
+                deleted = cursor.rowcount
+                names = self._version_index_names(cursor, version, valid_only=False)
+            return deleted, names
+        
+        deleted, names = self._run(work)
+        for name in names:
+            self._run_autocommit(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+        
+        self._bump_data_version()
+        logger.info(f"✅ 임베딩 v{version} 삭제 완료 (행 {deleted}개, 인덱스 {names or '없음'})")
+        return deleted
+    
+    def build_version_index(self, version: int) -> str:
+        """
+        version 행만 대상으로 하는 부분 ANN 인덱스를 CREATE INDEX CONCURRENTLY로 생성
+        
+        IVFFlat은 있는 데이터로 lists를 학습하므로 재임베딩이 끝난 뒤에 만들고,
+        CONCURRENTLY라 빌드 중에도 기존 버전 검색과 저장은 막히지 않습니다.
+        검색에 쓰는 컬럼(압축 저장 모드면 압축 컬럼)의 인덱스만 만들고,
+        2단계 검색(two_stage)이면 sparse 후보 검색용 sparse 인덱스도 만듭니다.
+        
+        Returns:
+            dense 인덱스 이름
+        """
+        if self.storage_mode == "halfvec":
+            name, definition = f"idx_embedding_half_v{version}_hnsw", "hnsw (embedding_half halfvec_cosine_ops)"
+        elif self.storage_mode == "binary":
+            name, definition = f"idx_embedding_bin_v{version}_hnsw", "hnsw (embedding_bin bit_hamming_ops)"
+        elif self.vector_index_type == "hnsw":
+            name, definition = (
+                f"idx_embedding_v{version}_hnsw",
+                "hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+            )
+        else:
+            rows = self.count_institutions(version=version)
+            # schema.sql과 같은 기준: 행 수 / 1000 (100만 행 이상이면 sqrt(행 수))
+            lists = max(int(math.sqrt(rows)) if rows > 1_000_000 else rows // 1000, 10)
+            name, definition = (
+                f"idx_embedding_v{version}_ivfflat",
+                f"ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+            )
+        
+        self._create_version_index(name, definition, version)
+        if self.two_stage:
+            self._create_version_index(
+                f"idx_embedding_sparse_v{version}_hnsw", "hnsw (embedding_sparse sparsevec_ip_ops)", version
+            )
+        return name
+    
+    def _create_version_index(self, name: str, definition: str, version: int):
+        """WHERE embedding_version = version 부분 인덱스를 CREATE INDEX CONCURRENTLY로 생성"""
+        start = time.time()
+        # 이전 빌드가 중단되어 남은 INVALID 인덱스는 IF NOT EXISTS에 걸리므로 먼저 삭제
+        # 단, 다른 세션이 아직 CONCURRENTLY로 만드는 중인 인덱스도 INVALID로 보이므로
+        # pg_stat_progress_create_index에 빌드 중인 backend가 있으면 지우지 않고 실패로 처리
+        # (같은 DB 사용자의 세션만 보임, 다른 사용자의 빌드까지 보려면 pg_read_all_stats 권한이 필요)
+        self._run_autocommit(f"""
+        DO $$
+        DECLARE
+            invalid_index oid;
+        BEGIN
+            SELECT pg_class.oid INTO invalid_index
+            FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+            WHERE pg_class.relname = '{name}' AND NOT pg_index.indisvalid;
+            IF invalid_index IS NULL THEN
+                RETURN;
+            END IF;
+            IF EXISTS (SELECT 1 FROM pg_stat_progress_create_index WHERE index_relid = invalid_index) THEN
+                RAISE EXCEPTION '인덱스 %를 다른 세션에서 생성 중입니다.', '{name}';
+            END IF;
+            EXECUTE 'DROP INDEX "{name}"';
+        END $$
+        """)
+        self._run_autocommit(f"""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}"
+        ON institution_embeddings
+        USING {definition}
+        WHERE embedding_version = {int(version)}
+        """)
+        logger.info(f"✅ 임베딩 v{version} 벡터 인덱스 생성 완료: {name} ({time.time() - start:.1f}s)")
+    
+    def version_stats(self) -> List[dict]:
+        """버전별 행 수와 부분 ANN 인덱스"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT embedding_version, COUNT(*), MAX(updated_at)::text
+                FROM institution_embeddings
+                GROUP BY embedding_version
+                ORDER BY embedding_version
+                """)
+                counts = cursor.fetchall()
+                return [
+                    {
+                        "version": version,
+                        "rows": rows,
+                        "lastUpdatedAt": last_updated_at,
+                        "active": version == self.active_version,
+                        "build": version == self.embedding_version,
+                        "indexes": self._version_index_names(cursor, version)
+                    }
+                    for version, rows, last_updated_at in counts
+                ]
+        
+        return self._run(work)
+    
+    @staticmethod
+    def _version_index_names(cursor, version: int, valid_only: bool = True, sparse: Optional[bool] = None) -> List[str]:
+        """WHERE embedding_version = version 조건의 벡터 인덱스 이름 (sparse: True면 sparse 인덱스만, False면 dense만)"""
+        cursor.execute("""
+        SELECT pg_class.relname, pg_index.indisvalid, pg_get_indexdef(pg_index.indexrelid)
+        FROM pg_index
+        JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+        WHERE pg_index.indrelid = 'institution_embeddings'::regclass
+          AND pg_get_expr(pg_index.indpred, pg_index.indrelid) IS NOT NULL
+        """)
+        return [
+            name
+            for name, valid, indexdef in cursor.fetchall()
+            if (valid or not valid_only)
+            and re.search(r"USING (ivfflat|hnsw)", indexdef, re.IGNORECASE)
+            and re.search(rf"embedding_version = {int(version)}\b", indexdef)
+            and (sparse is None or sparse == ("(embedding_sparse " in indexdef))
+        ]
+    
+    def _run_autocommit(self, statement: str):
+        """트랜잭션 밖에서 실행해야 하는 문장 (CREATE/DROP INDEX CONCURRENTLY 등)"""
+        def work(conn):
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(statement)
+            finally:
+                conn.autocommit = False
+        
+        self._run(work)
+    
+    def create_embedding_job(
+        self,
+        mode: str,
+        since: Optional[str],
+        force: bool,
+        activate: bool,
+        total: int,
+        owner: str
+    ) -> dict:
+        """재임베딩 작업 생성 (embedding_jobs, 작업 버전은 EMBEDDING_VERSION)"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                INSERT INTO embedding_jobs (mode, since, force, activate, embedding_version, total, owner)
+                VALUES (%s, %s::timestamp, %s, %s, %s, %s, %s)
+                RETURNING {EMBEDDING_JOB_COLUMNS}
+                """, (mode, since, force, activate, self.embedding_version, total, owner))
+                return self._job_row(cursor, cursor.fetchone())
+        
+        # 재시도하면 작업 행이 두 개 생길 수 있음
+        return self._run(work, retry=False)
+    
+    def claim_embedding_job(self, job_id: int, owner: str, stale_seconds: float) -> Optional[dict]:
+        """
+        중단된 작업을 이 프로세스가 이어서 실행하도록 가져옴
+        
+        failed / interrupted 작업, 또는 heartbeat가 stale_seconds 이상 갱신되지 않은
+        running 작업(프로세스가 비정상 종료됨)만 가져오므로
+        여러 서버가 동시에 재개를 시도해도 한 곳에서만 실행됩니다.
+        """
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                UPDATE embedding_jobs
+                SET owner = %s, heartbeat_at = NOW(), status = 'running', error = NULL
+                WHERE job_id = %s
+                  AND (status IN ('failed', 'interrupted')
+                       OR (status IN ('running', 'indexing') AND heartbeat_at < NOW() - %s * INTERVAL '1 second'))
+                RETURNING {EMBEDDING_JOB_COLUMNS}
+                """, (owner, job_id, stale_seconds))
+                row = cursor.fetchone()
+                return self._job_row(cursor, row) if row else None
+        
+        return self._run(work)
+    
+    def checkpoint_embedding_job(self, job_id: int, finished: bool = False, **fields) -> None:
+        """진행 상황 저장 (last_institution_id, 카운터, failed_ids, status 등) + heartbeat 갱신"""
+        assignments = "".join(f"{column} = %({column})s, " for column in fields)
+        if finished:
+            assignments += "finished_at = NOW(), "
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                UPDATE embedding_jobs
+                SET {assignments}heartbeat_at = NOW()
+                WHERE job_id = %(job_id)s
+                """, {**fields, "job_id": job_id})
+        
+        self._run(work)
+    
+    def get_embedding_job(self, job_id: Optional[int] = None) -> Optional[dict]:
+        """작업 조회 (job_id가 없으면 가장 최근 작업)"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                if job_id is None:
+                    cursor.execute(f"SELECT {EMBEDDING_JOB_COLUMNS} FROM embedding_jobs ORDER BY job_id DESC LIMIT 1")
+                else:
+                    cursor.execute(f"SELECT {EMBEDDING_JOB_COLUMNS} FROM embedding_jobs WHERE job_id = %s", (job_id,))
+                row = cursor.fetchone()
+                return self._job_row(cursor, row) if row else None
+        
+        return self._run(work)
+    
+    @staticmethod
+    def _job_row(cursor, row) -> dict:
+        """embedding_jobs 행 → dict (시각은 ISO 문자열)"""
+        job = {column.name: value for column, value in zip(cursor.description, row)}
+        for key in ("since", "started_at", "heartbeat_at", "finished_at"):
+            if job.get(key) is not None:
+                job[key] = job[key].isoformat()
+        return job
+    
+    def current_timestamp(self) -> str:
+        """DB 서버 기준 현재 시각 (증분 동기화 기준점)"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT NOW()::text")
+                return cursor.fetchone()[0]
+        
+        return self._run(work)
+    
+    def sync_watermark(self) -> str:
+        """
+        증분 동기화 기준점: NOW()와 진행 중인 다른 트랜잭션의 시작 시각 중 가장 이른 시각
+        
+        updated_at은 트랜잭션 시작 시각(NOW())으로 기록되므로, 지금 진행 중인 트랜잭션이
+        나중에 커밋하더라도 그 행의 updated_at은 이 기준점 이후가 되어 다음 동기화에서 빠지지 않습니다.
+        (다른 DB 사용자의 세션까지 보려면 pg_read_all_stats 권한이 필요)
+        """
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT LEAST(NOW(), MIN(xact_start))::text
+                FROM pg_stat_activity
+                WHERE datname = current_database()
+                  AND pid <> pg_backend_pid()
+                  AND xact_start IS NOT NULL
+                """)
+                return cursor.fetchone()[0]
+        
+        return self._run(work)
+    
+    def fetch_institution_ids(self, version: Optional[int] = None) -> np.ndarray:
+        """버전의 임베딩이 있는 institution_id 전체 (메모리 인덱스의 삭제 반영용)"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT institution_id FROM institution_embeddings "
+                    "WHERE embedding IS NOT NULL AND embedding_version = %s",
+                    (version or self.active_version,)
+                )
+                return np.fromiter((row[0] for row in cursor), dtype=np.int64)
+        
+        return self._run(work, "fetch_ids")
+    
+    def iter_institution_embeddings(
+        self,
+        since: Optional[str] = None,
+        chunk_size: int = 1000,
+        version: Optional[int] = None
+    ) -> Iterator[List[Tuple[int, np.ndarray, dict]]]:
+        """
+        institution_embeddings를 chunk_size개씩 binary COPY로 읽음
+        
+        institution_id 기준 keyset 페이지마다 COPY (...) TO STDOUT (FORMAT binary)를
+        실행하므로 벡터는 텍스트 변환 없이 float32 numpy 배열로 바로 디코딩되고,
+        메모리는 chunk 크기만큼만 사용합니다.
+        
+        Args:
+            since: 이 시각 이후 수정된 행만 (None이면 전체)
+            version: 임베딩 버전 (None이면 active_version)
+        
+        Yields:
+            [(institution_id, embedding, metadata), ...]
+        """
+        query = """
+        SELECT institution_id, embedding, metadata
+        FROM institution_embeddings
+        WHERE embedding IS NOT NULL
+          AND embedding_version = %s
+          AND institution_id > %s
+          AND (%s::timestamp IS NULL OR updated_at >= %s::timestamp)
+        ORDER BY institution_id
+        LIMIT %s
+        """
+        
+        version = version or self.active_version
+        last_id = -1
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                while True:
+                    start = time.perf_counter()
+                    select = cursor.mogrify(query, (version, last_id, since, since, chunk_size)).decode("utf-8")
+                    buffer = io.BytesIO()
+                    cursor.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT binary)", buffer)
+                    rows = decode_copy_rows(buffer.getvalue(), ("int8", "vector", "jsonb"))
+                    observe_db("copy_embeddings", time.perf_counter() - start, len(rows))
+                    if not rows:
+                        break
+                    
+                    yield rows
+                    last_id = rows[-1][0]
+                    if len(rows) < chunk_size:
+                        break
+    
+    def fetch_snapshot_page(
+        self,
+        version: int,
+        after_id: int = -1,
+        limit: int = 2000
+    ) -> List[Tuple[int, np.ndarray, Optional[str], dict, Optional[str]]]:
+        """
+        스냅샷 내보내기용 한 페이지 (institution_id > after_id, limit개) binary COPY 조회
+        
+        페이지마다 커넥션을 빌렸다 돌려주므로 느린 클라이언트로 스트리밍해도 커넥션을 오래 잡지 않습니다.
+        
+        Returns:
+            [(institution_id, embedding, original_text, metadata, content_hash), ...]
+        """
+        query = """
+        SELECT institution_id, embedding, original_text, metadata, content_hash
+        FROM institution_embeddings
+        WHERE embedding IS NOT NULL
+          AND embedding_version = %s
+          AND institution_id > %s
+        ORDER BY institution_id
+        LIMIT %s
+        """
+        
+        def work(conn):
+            with conn.cursor() as cursor:
+                select = cursor.mogrify(query, (version, after_id, limit)).decode("utf-8")
+                buffer = io.BytesIO()
+                cursor.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT binary)", buffer)
+                return decode_copy_rows(buffer.getvalue(), ("int8", "vector", "text", "jsonb", "text"))
+        
+        return self._run(work, "copy_snapshot")
+    
     def close(self):
-        """DB 연결 종료"""
-        if self.conn:
-            self.conn.close()
+        """DB 커넥션 풀 종료"""
+        if self.pool:
+            self.pool.closeall()
             logger.info("DB 연결 종료")
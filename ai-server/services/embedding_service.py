@@ -1,35 +1,380 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List
+from typing import Dict, List, Optional
 import logging
+import os
+import threading
+import time
+
+from utils.lexical import LexicalEmbedding, normalize_rows, pool_tokens, sparse_weights
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'BAAI/bge-m3'
+
+# 워밍업 문장 (반복 횟수로 시퀀스 길이 조절)
+WARMUP_SENTENCE = "어르신의 건강 상태와 선호에 맞는 요양 기관을 추천합니다."
+
+# EMBEDDING_BACKEND별 기본 ONNX 파일 (scripts/export_onnx.py가 EMBEDDING_ONNX_DIR 아래에 생성)
+ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_qint8_avx512_vnni.onnx"
+}
+
+# 워밍업할 시퀀스 길이(토큰) / 배치 크기 (빈 값이면 워밍업 생략)
+WARMUP_SEQ_LENGTHS = [int(v) for v in os.getenv("WARMUP_SEQ_LENGTHS", "32,128,512").split(",") if v.strip()]
+WARMUP_BATCH_SIZES = [int(v) for v in os.getenv("WARMUP_BATCH_SIZES", "1,8").split(",") if v.strip()]
+
+# 임베딩 버전별 모델 경로 ("2=/models/bge-m3-v2,3=/models/other"), 없는 버전은 기본 모델
+# 같은 경로를 쓰는 버전(템플릿만 바꾼 경우)은 모델 인스턴스를 공유
+EMBEDDING_VERSION_MODELS = {
+    int(version): path.strip()
+    for version, path in (
+        item.split("=", 1) for item in os.getenv("EMBEDDING_VERSION_MODELS", "").split(",") if "=" in item
+    )
+}
+
+# bge-m3 sparse / multi-vector 출력 헤드 (모델 저장소 루트의 파일, RETRIEVAL_MODE=two_stage에서 사용)
+LEXICAL_HEAD_FILES = ("sparse_linear.pt", "colbert_linear.pt")
+
+# 추론(forward pass) 스레드 수, 0이면 라이브러리 기본값(물리 코어 수)
+# API 워커 수(API_WORKERS)와 별개로 설정
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+
 
 class EmbeddingService:
-    """bge-m3 임베딩 생성 서비스"""
+    """
+    bge-m3 임베딩 생성 서비스
+    
+    EMBEDDING_BACKEND로 추론 백엔드를 선택합니다.
+        torch: PyTorch eager (기본)
+        onnx: ONNX Runtime (float32)
+        onnx-int8: ONNX Runtime + 동적 int8 양자화 모델 (CPU 권장)
+    어느 백엔드든 encode_text / encode_batch는 정규화된 1024차원 float32 벡터를 반환합니다.
+    
+    EMBEDDING_MODEL_PATH를 지정하면 이미지에 미리 저장한 스냅샷(safetensors)에서만 로드하고
+    HF Hub에는 접속하지 않습니다. 지정하지 않으면 기존처럼 HF 캐시/Hub에서 로드합니다.
+    model_path를 넘기면(임베딩 버전별 모델, EMBEDDING_VERSION_MODELS) 그 경로를 대신 사용합니다.
+    (ONNX 백엔드에서는 EMBEDDING_ONNX_DIR 대신 사용할 디렉토리)
+    
+    encode_batch_lexical은 같은 forward pass의 토큰 hidden state로 sparse / multi-vector 표현도
+    함께 계산합니다 (utils/lexical). 출력 헤드(sparse_linear.pt, colbert_linear.pt)는 처음 사용할 때
+    EMBEDDING_LEXICAL_HEADS_DIR → 모델 디렉토리 → HF Hub 순서로 찾아 로드합니다.
+    """
+    
+    def __init__(self, model_path: Optional[str] = None):
+        self.backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        if self.backend not in ("torch", *ONNX_FILES):
+            raise ValueError(f"지원하지 않는 EMBEDDING_BACKEND: {self.backend}")
+        
+        # 용도별 최대 토큰 수 (초과분은 잘림). 기관 설명이 길어도 한 건이 배치 전체를 지배하지 않도록 제한
+        self.max_seq_lengths: Dict[str, int] = {
+            "institution": int(os.getenv("INSTITUTION_MAX_SEQ_LENGTH", "1024")),
+            "profile": int(os.getenv("PROFILE_MAX_SEQ_LENGTH", "512"))
+        }
+        # 길이별 묶음 하나의 최대 (패딩 포함) 토큰 수
+        self.max_batch_tokens = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "16384"))
+        # max_seq_length는 모델 속성이므로 설정 ~ encode를 한 번에 실행
+        self._encode_lock = threading.Lock()
+        
+        # 기관 multi-vector 최대 토큰 수 (넘으면 인접 토큰 평균), sparse 최대 토큰 수 (sparsevec 인덱스는 1000개 이하)
+        self.multivector_max_tokens = int(os.getenv("MULTIVECTOR_MAX_TOKENS", "64"))
+        self.sparse_max_terms = int(os.getenv("SPARSE_MAX_TERMS", "256"))
+        # 출력 헤드 이름 → (weight.T, bias) numpy, 처음 encode_batch_lexical 때 로드
+        self._lexical_heads: Optional[Dict[str, tuple]] = None
+        
+        self.model_path = model_path or os.getenv("EMBEDDING_MODEL_PATH") or None
+        self.onnx_dir = model_path or os.getenv("EMBEDDING_ONNX_DIR", "./onnx_model")
+        if self.model_path:
+            # transformers / huggingface_hub가 버전 확인 등으로 네트워크를 쓰지 않도록 차단
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+            os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        
+        start = time.time()
+        logger.info(f"🔄 bge-m3 모델 로드 시작... (backend={self.backend}, 경로={self.model_path or MODEL_NAME})")
+        if self.backend == "torch":
+            self.model = self._load_torch_model()
+        else:
+            self.model = self._load_onnx_model()
+        self.load_seconds = time.time() - start
+        logger.info(f"✅ bge-m3 모델 로드 완료 (1024차원, backend={self.backend}, {self.load_seconds:.1f}s)")
+    
+    def _load_torch_model(self) -> SentenceTransformer:
+        """PyTorch 모델 로드 (로컬 스냅샷이면 safetensors를 memory-map으로 바로 읽음)"""
+        if INFERENCE_THREADS:
+            import torch
+            torch.set_num_threads(INFERENCE_THREADS)
+        
+        if not self.model_path:
+            return SentenceTransformer(MODEL_NAME)
+        
+        return SentenceTransformer(
+            self.model_path,
+            local_files_only=True,
+            model_kwargs={
+                # 빈 모델을 먼저 만들지 않고 safetensors 텐서를 그대로 올려 로드 시간/피크 메모리 절감
+                "use_safetensors": True,
+                "low_cpu_mem_usage": True
+            }
+        )
+    
+    def _load_onnx_model(self) -> SentenceTransformer:
+        """내보낸 ONNX 모델을 ONNX Runtime 세션 옵션과 함께 로드"""
+        import onnxruntime as ort
+        
+        onnx_dir = self.onnx_dir
+        file_name = os.getenv("EMBEDDING_ONNX_FILE", ONNX_FILES[self.backend])
+        if not os.path.exists(os.path.join(onnx_dir, file_name)):
+            raise FileNotFoundError(
+                f"ONNX 모델이 없습니다: {os.path.join(onnx_dir, file_name)} "
+                f"(python -m scripts.export_onnx --output {onnx_dir} 로 생성)"
+            )
+        
+        # intra: 연산 하나를 나눠 쓰는 스레드 수 (0이면 물리 코어 수)
+        # inter: 독립 연산을 동시에 돌리는 스레드 수 (순차 실행이면 1로 충분)
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = int(os.getenv("ONNX_INTRA_OP_THREADS", str(INFERENCE_THREADS)))
+        session_options.inter_op_num_threads = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+        session_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        
+        logger.info(
+            f"ONNX Runtime: {file_name} (intra_op_threads={session_options.intra_op_num_threads}, "
+            f"inter_op_threads={session_options.inter_op_num_threads})"
+        )
+        return SentenceTransformer(
+            onnx_dir,
+            backend="onnx",
+            local_files_only=True,
+            model_kwargs={
+                "file_name": file_name,
+                "provider": "CPUExecutionProvider",
+                "session_options": session_options
+            }
+        )
     
-    def __init__(self):
-        logger.info("🔄 bge-m3 모델 로드 시작...")
-        self.model = SentenceTransformer('BAAI/bge-m3')
-        logger.info("✅ bge-m3 모델 로드 완료 (1024차원)")
+    def warm_up(self, seq_lengths: List[int], batch_sizes: List[int]):
+        """
+        시퀀스 길이 / 배치 크기별로 forward pass를 미리 실행
+        
+        첫 요청에서 발생하는 커널 선택, 메모리 할당, ONNX 그래프 최적화 비용을
+        ready 전에 치르도록 합니다.
+        """
+        start = time.time()
+        tokenizer = self.model.tokenizer
+        sentence_tokens = max(len(tokenizer([WARMUP_SENTENCE], add_special_tokens=False)["input_ids"][0]), 1)
+        
+        for seq_length in seq_lengths:
+            text = " ".join([WARMUP_SENTENCE] * max(seq_length // sentence_tokens, 1))
+            for batch_size in batch_sizes:
+                pass_start = time.time()
+                self.model.encode([text] * batch_size, batch_size=batch_size, normalize_embeddings=True)
+                logger.info(
+                    f"🔥 워밍업: 시퀀스 약 {seq_length} 토큰 x {batch_size}개 "
+                    f"({(time.time() - pass_start) * 1000:.0f}ms)"
+                )
+        
+        logger.info(f"✅ 워밍업 완료 ({time.time() - start:.1f}s)")
     
-    def encode_text(self, text: str) -> np.ndarray:
-        """텍스트를 임베딩 벡터로 변환"""
+    def encode_text(self, text: str, kind: str = "profile") -> np.ndarray:
+        """텍스트를 임베딩 벡터로 변환 (kind: institution / profile, 용도별 최대 토큰 수 적용)"""
         try:
-            embedding = self.model.encode(text, normalize_embeddings=True)
+            with self._encode_lock:
+                self.model.max_seq_length = self.max_seq_lengths[kind]
+                embedding = self.model.encode(text, normalize_embeddings=True)
             logger.info(f"✅ 임베딩 생성 완료 (차원: {len(embedding)})")
             return embedding
         except Exception as e:
             logger.error(f"❌ 임베딩 생성 실패: {str(e)}")
             raise
     
-    def encode_batch(self, texts: List[str]) -> np.ndarray:
-        """여러 텍스트를 배치로 변환"""
+    def encode_batch(self, texts: List[str], batch_size: int = 32, kind: str = "institution") -> np.ndarray:
+        """
+        여러 텍스트를 배치로 변환 (결과는 입력 순서와 동일한 (N, 1024) 배열)
+        
+        배치는 가장 긴 텍스트 길이로 패딩되므로, 먼저 토큰 수를 세어 길이순으로 정렬한 뒤
+        비슷한 길이끼리 묶어 실행하고 원래 순서로 되돌립니다.
+        한 묶음은 batch_size개 이하이면서 (최대 토큰 수 x 개수)가 EMBEDDING_MAX_BATCH_TOKENS를
+        넘지 않도록 잘라서, 긴 기관 설명이 섞여도 다른 텍스트까지 길게 패딩되지 않게 합니다.
+        """
+        if not texts:
+            return np.zeros((0, 1024), dtype=np.float32)
+        
         try:
-            embeddings = self.model.encode(texts, normalize_embeddings=True)
-            logger.info(f"✅ 배치 임베딩 생성 완료 ({len(texts)}개)")
+            max_seq_length = self.max_seq_lengths[kind]
+            with self._encode_lock:
+                self.model.max_seq_length = max_seq_length
+                
+                lengths = np.array([
+                    len(ids) for ids in self.model.tokenizer(
+                        texts, truncation=True, max_length=max_seq_length
+                    )["input_ids"]
+                ])
+                order = np.argsort(lengths, kind="stable")
+                
+                embeddings = np.zeros((len(texts), 1024), dtype=np.float32)
+                buckets = 0
+                padded_tokens = 0
+                for bucket in self._length_buckets(lengths[order], batch_size):
+                    rows = order[bucket]
+                    embeddings[rows] = self.model.encode(
+                        [texts[row] for row in rows],
+                        batch_size=len(rows),
+                        normalize_embeddings=True
+                    )
+                    buckets += 1
+                    padded_tokens += int(lengths[rows].max()) * len(rows)
+            
+            logger.info(
+                f"✅ 배치 임베딩 생성 완료 ({len(texts)}개, {kind}, 묶음 {buckets}개, "
+                f"토큰 min/avg/max={lengths.min()}/{lengths.mean():.0f}/{lengths.max()}, "
+                f"최대 길이 도달 {int((lengths >= max_seq_length).sum())}개, "
+                f"패딩 효율 {lengths.sum() / padded_tokens:.0%})"
+            )
             return embeddings
         except Exception as e:
             logger.error(f"❌ 배치 임베딩 생성 실패: {str(e)}")
             raise
+    
+    def encode_batch_lexical(self, texts: List[str], batch_size: int = 32, kind: str = "institution") -> List[LexicalEmbedding]:
+        """
+        여러 텍스트 → dense / sparse / multi-vector 표현 (입력 순서와 동일)
+        
+        encode_batch와 같이 길이순으로 묶어 forward pass는 텍스트당 한 번이며,
+        기관(kind=institution) multi-vector는 MULTIVECTOR_MAX_TOKENS개 이하로 줄여서 반환합니다.
+        """
+        if not texts:
+            return []
+        
+        try:
+            heads = self._load_lexical_heads()
+            max_seq_length = self.max_seq_lengths[kind]
+            max_tokens = self.multivector_max_tokens if kind == "institution" else 0
+            with self._encode_lock:
+                self.model.max_seq_length = max_seq_length
+                
+                lengths = np.array([
+                    len(ids) for ids in self.model.tokenizer(
+                        texts, truncation=True, max_length=max_seq_length
+                    )["input_ids"]
+                ])
+                order = np.argsort(lengths, kind="stable")
+                
+                results: List[Optional[LexicalEmbedding]] = [None] * len(texts)
+                for bucket in self._length_buckets(lengths[order], batch_size):
+                    rows = order[bucket]
+                    # output_value=None: 문장 벡터와 함께 토큰 hidden state / attention_mask / input_ids 반환
+                    outputs = self.model.encode(
+                        [texts[row] for row in rows],
+                        batch_size=len(rows),
+                        output_value=None
+                    )
+                    for row, output in zip(rows, outputs):
+                        results[row] = self._lexical_output(output, heads, max_tokens)
+            
+            logger.info(f"✅ dense / sparse / multi-vector 임베딩 생성 완료 ({len(texts)}개, {kind})")
+            return results
+        except Exception as e:
+            logger.error(f"❌ dense / sparse / multi-vector 임베딩 생성 실패: {str(e)}")
+            raise
+    
+    def _lexical_output(self, output: dict, heads: Dict[str, tuple], max_tokens: int) -> LexicalEmbedding:
+        """encode(output_value=None)의 텍스트 하나 → LexicalEmbedding"""
+        mask = _to_numpy(output["attention_mask"]).astype(bool)
+        hidden = _to_numpy(output["token_embeddings"])[mask]
+        input_ids = _to_numpy(output["input_ids"])[mask]
+        
+        sparse_weight, sparse_bias = heads["sparse_linear"]
+        token_weights = np.maximum(hidden @ sparse_weight + sparse_bias, 0.0)[:, 0]
+        
+        colbert_weight, colbert_bias = heads["colbert_linear"]
+        colbert = normalize_rows(hidden[1:] @ colbert_weight + colbert_bias)  # [CLS] 제외
+        
+        return LexicalEmbedding(
+            dense=normalize_rows(_to_numpy(output["sentence_embedding"])),
+            sparse=sparse_weights(token_weights, input_ids, self._special_token_ids(), self.sparse_max_terms),
+            colbert=pool_tokens(colbert, max_tokens)
+        )
+    
+    def _special_token_ids(self) -> set:
+        tokenizer = self.model.tokenizer
+        return {
+            token_id for token_id in (
+                tokenizer.cls_token_id, tokenizer.eos_token_id, tokenizer.pad_token_id, tokenizer.unk_token_id
+            )
+            if token_id is not None
+        }
+    
+    def _load_lexical_heads(self) -> Dict[str, tuple]:
+        """sparse_linear.pt / colbert_linear.pt → {이름: (weight.T, bias)} (한 번만 로드)"""
+        if self._lexical_heads is not None:
+            return self._lexical_heads
+        
+        import torch
+        
+        heads = {}
+        for file_name in LEXICAL_HEAD_FILES:
+            state = torch.load(self._lexical_head_path(file_name), map_location="cpu", weights_only=True)
+            heads[file_name[:-3]] = (
+                state["weight"].float().numpy().T.copy(),
+                state["bias"].float().numpy()
+            )
+        self._lexical_heads = heads
+        logger.info("✅ bge-m3 sparse / multi-vector 출력 헤드 로드 완료")
+        return heads
+    
+    def _lexical_head_path(self, file_name: str) -> str:
+        model_dir = self.model_path if self.backend == "torch" else self.onnx_dir
+        for directory in (os.getenv("EMBEDDING_LEXICAL_HEADS_DIR"), model_dir):
+            if directory and os.path.exists(os.path.join(directory, file_name)):
+                return os.path.join(directory, file_name)
+        
+        if self.model_path:
+            raise FileNotFoundError(
+                f"{file_name}이 없습니다: {model_dir} (bge-m3 저장소의 {file_name}을 모델 디렉토리나 "
+                "EMBEDDING_LEXICAL_HEADS_DIR에 두세요)"
+            )
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(MODEL_NAME, file_name)
+    
+    def _length_buckets(self, sorted_lengths: np.ndarray, batch_size: int) -> List[slice]:
+        """길이순으로 정렬된 토큰 수 → batch_size / 토큰 예산을 넘지 않는 연속 구간들"""
+        buckets = []
+        start = 0
+        for end in range(1, len(sorted_lengths) + 1):
+            count = end - start
+            # 정렬되어 있으므로 구간의 마지막 원소가 그 묶음의 패딩 길이
+            over_budget = count > 1 and sorted_lengths[end - 1] * count > self.max_batch_tokens
+            if count > batch_size or over_budget:
+                buckets.append(slice(start, end - 1))
+                start = end - 1
+        buckets.append(slice(start, len(sorted_lengths)))
+        return buckets
+
+
+def _to_numpy(value) -> np.ndarray:
+    """encode 출력(torch 텐서 또는 numpy) → float32 / 정수 numpy 배열"""
+    if hasattr(value, "detach"):
+        value = value.detach().cpu()
+        if value.is_floating_point():
+            value = value.float()
+        return value.numpy()
+    return np.asarray(value)
+
+
+def load_encoders(versions: List[int], loaded: Optional[Dict[int, EmbeddingService]] = None) -> Dict[int, EmbeddingService]:
+    """
+    임베딩 버전별 모델 로드 (같은 모델 경로는 한 번만)
+    
+    loaded(이미 로드된 버전 → 모델)에 같은 경로의 모델이 있으면 새로 로드하지 않고 재사용합니다.
+    """
+    by_path: Dict[Optional[str], EmbeddingService] = {
+        EMBEDDING_VERSION_MODELS.get(version): encoder for version, encoder in (loaded or {}).items()
+    }
+    encoders = {}
+    for version in versions:
+        path = EMBEDDING_VERSION_MODELS.get(version)
+        if path not in by_path:
+            by_path[path] = EmbeddingService(model_path=path)
+        encoders[version] = by_path[path]
+    return encoders
@@ -0,0 +1,100 @@
+import logging
+import os
+import time
+from typing import BinaryIO, Iterator, List, Optional
+
+from utils.snapshot import SnapshotDecoder, SnapshotRow, encode_chunk, encode_footer, encode_header
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷 청크(= DB 페이지) 행 수: 1024차원이면 2000행에 벡터 약 8MB
+SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", "2000"))
+# 파일에서 한 번에 읽는 크기
+SNAPSHOT_READ_SIZE = 1 << 20
+
+
+class EmbeddingSnapshot:
+    """
+    institution_embeddings 스냅샷 내보내기 / 가져오기 (utils/snapshot 형식)
+    
+    내보내기는 institution_id keyset 페이지마다 binary COPY로 읽어 청크로 바로 내보내고,
+    가져오기는 청크마다 save_institution_embeddings_batch(binary COPY → 임시 테이블 → UPSERT)로 저장하므로
+    추론 없이 I/O만으로 코퍼스를 옮기며 메모리는 청크 하나만큼만 사용합니다.
+    가져온 행은 일반 저장과 같이 저장 리스너(인메모리 인덱스)와 데이터 버전(검색 캐시)에 반영됩니다.
+    
+    내보내기는 페이지마다 따로 조회하므로 도중에 저장된 기관은 포함되지 않을 수 있습니다 (일관된 시점 스냅샷 아님).
+    """
+    
+    def __init__(self, db_service, chunk_size: Optional[int] = None, dimension: int = 1024):
+        self.db_service = db_service
+        self.chunk_size = chunk_size or SNAPSHOT_CHUNK_SIZE
+        self.dimension = dimension
+    
+    def export(self, version: Optional[int] = None) -> Iterator[bytes]:
+        """version(없으면 검색 중인 버전) 스냅샷을 청크 단위 바이트로 생성"""
+        version = version or self.db_service.active_version
+        start = time.time()
+        logger.info(f"📤 임베딩 스냅샷 내보내기 시작 (v{version})")
+        
+        yield encode_header(version, self.dimension, created_at=self.db_service.current_timestamp())
+        
+        total = 0
+        last_id = -1
+        while True:
+            rows = self.db_service.fetch_snapshot_page(version, last_id, self.chunk_size)
+            if not rows:
+                break
+            yield encode_chunk(rows, self.dimension)
+            total += len(rows)
+            last_id = rows[-1][0]
+            if len(rows) < self.chunk_size:
+                break
+        
+        yield encode_footer(total)
+        logger.info(f"✅ 임베딩 스냅샷 내보내기 완료: {total}개 ({time.time() - start:.1f}s, v{version})")
+    
+    def export_to(self, fileobj: BinaryIO, version: Optional[int] = None) -> int:
+        """스냅샷을 파일에 기록, 기록한 바이트 수 반환"""
+        written = 0
+        for data in self.export(version):
+            fileobj.write(data)
+            written += len(data)
+        return written
+    
+    def target_version(self, decoder: SnapshotDecoder, version: Optional[int] = None) -> int:
+        """가져올 버전 (지정하지 않으면 스냅샷의 버전), 차원이 다르면 ValueError"""
+        if decoder.dimension != self.dimension:
+            raise ValueError(f"스냅샷 차원({decoder.dimension})이 DB 차원({self.dimension})과 다릅니다.")
+        return version or decoder.header["embedding_version"]
+    
+    def import_chunk(self, rows: List[SnapshotRow], version: int) -> int:
+        """청크 하나 저장 (스냅샷 행은 save_institution_embeddings_batch 행과 같은 형식)"""
+        return self.db_service.save_institution_embeddings_batch(rows, version)
+    
+    def import_from(self, fileobj: BinaryIO, version: Optional[int] = None) -> dict:
+        """
+        파일의 스냅샷을 DB에 저장
+        
+        Args:
+            version: 저장할 임베딩 버전 (None이면 스냅샷의 버전)
+        
+        Returns:
+            {"rows", "embedding_version", "seconds"}
+        """
+        start = time.time()
+        decoder = SnapshotDecoder()
+        target = None
+        imported = 0
+        while True:
+            data = fileobj.read(SNAPSHOT_READ_SIZE)
+            for rows in decoder.feed(data):
+                target = target or self.target_version(decoder, version)
+                imported += self.import_chunk(rows, target)
+            if not data:
+                break
+        decoder.close()
+        
+        target = target or self.target_version(decoder, version)
+        seconds = time.time() - start
+        logger.info(f"✅ 임베딩 스냅샷 가져오기 완료: {imported}개 ({seconds:.1f}s, v{target})")
+        return {"rows": imported, "embedding_version": target, "seconds": round(seconds, 2)}
@@ -0,0 +1,239 @@
+import asyncio
+import itertools
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.ipc import DEFAULT_SOCKET, encode_frame, read_frame
+from utils.lexical import unpack_lexical
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteInferenceClient:
+    """
+    추론 서버(services/inference_server.py)에 추론을 맡기는 InferenceQueue 대체 클라이언트
+    
+    INFERENCE_MODE=remote인 API 워커는 모델을 로드하지 않고 이 클라이언트로
+    encode / encode_many / ensure_versions를 호출합니다 (InferenceQueue와 같은 인터페이스).
+    Unix 소켓 연결 하나에 요청 id를 붙여 여러 요청을 동시에 보내고,
+    응답 벡터는 float32 바이트 그대로 받습니다.
+    추론 서버가 재시작되면 다음 요청에서 다시 연결합니다.
+    
+    응답 대기 시간은 요청 종류별로 다릅니다.
+        encode / stats: INFERENCE_REQUEST_TIMEOUT
+        encode_many: INFERENCE_REQUEST_TIMEOUT + 텍스트 수 x INFERENCE_ITEM_TIMEOUT (대량 등록 / 재임베딩)
+        ensure_versions: INFERENCE_CONNECT_TIMEOUT (모델 로드 + 워밍업)
+    시간이 지나거나 호출이 취소되면 추론 서버에 cancel을 보내 남은 추론을 멈춥니다.
+    """
+    
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or os.getenv("INFERENCE_SOCKET", DEFAULT_SOCKET)
+        self.request_timeout = float(os.getenv("INFERENCE_REQUEST_TIMEOUT", "30"))
+        # encode_many 텍스트 1개당 추가 대기 시간 (CPU에서 1024토큰 텍스트 기준 여유 있게)
+        self.item_timeout = float(os.getenv("INFERENCE_ITEM_TIMEOUT", "2"))
+        # 시작 시 추론 서버의 모델 로드/워밍업을 기다리는 최대 시간
+        self.connect_timeout = float(os.getenv("INFERENCE_CONNECT_TIMEOUT", "600"))
+        
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        # 추론 서버에 로드된 버전 (마지막 ensure_versions 응답 기준)
+        self._versions: List[int] = []
+        
+        # 통계
+        self.requests = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self.cancels = 0
+    
+    async def start(self):
+        """추론 서버 소켓이 열릴 때까지 기다린 뒤 연결"""
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout
+        while True:
+            try:
+                await self._connect()
+                break
+            except (FileNotFoundError, ConnectionError):
+                if loop.time() >= deadline:
+                    raise RuntimeError(f"추론 서버에 연결할 수 없습니다: {self.socket_path}")
+                await asyncio.sleep(0.5)
+        logger.info(f"✅ 추론 서버 연결 ({self.socket_path})")
+    
+    async def stop(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+        self._fail_pending(RuntimeError("추론 클라이언트가 종료되었습니다."))
+    
+    async def encode(self, text: str, version: int, kind: str = "profile", lexical: bool = False):
+        """텍스트 1개 추론 (추론 서버에서 다른 워커의 요청과 배치로 묶임)"""
+        embeddings = await self._encode([text], version, kind, batch_size=1, lexical=lexical)
+        return embeddings[0]
+    
+    async def encode_many(
+        self,
+        texts: List[str],
+        version: int,
+        batch_size: int = 32,
+        kind: str = "institution",
+        lexical: bool = False
+    ):
+        return await self._encode(texts, version, kind, batch_size=batch_size, lexical=lexical)
+    
+    async def ensure_versions(self, versions: List[int]) -> List[int]:
+        """추론 서버에 versions 모델을 미리 로드시킴 (첫 요청이 모델 로드를 기다리지 않도록)"""
+        header, _ = await self._request(
+            {"op": "ensure_versions", "versions": list(versions)}, timeout=self.connect_timeout
+        )
+        missing = sorted(set(versions) - set(self._versions))
+        self._versions = header["versions"]
+        return missing
+    
+    def release_versions(self, keep: List[int]):
+        """다른 워커가 아직 이전 버전을 쓸 수 있으므로 해제는 추론 서버가 유휴 시간 기준으로 판단"""
+    
+    def loaded_versions(self) -> List[int]:
+        return list(self._versions)
+    
+    async def healthy(self) -> bool:
+        """추론 서버가 stats 요청에 응답하는지 (끊겼으면 다시 연결해 확인, /ready에서 사용)"""
+        try:
+            await self._request({"op": "stats"}, timeout=min(self.request_timeout, 5.0))
+            return True
+        except Exception:
+            return False
+    
+    async def server_stats(self) -> dict:
+        header, _ = await self._request({"op": "stats"})
+        return header["stats"]
+    
+    def stats(self) -> dict:
+        return {
+            "mode": "remote",
+            "socket": self.socket_path,
+            "connected": self._connected(),
+            "requests": self.requests,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "timeouts": self.timeouts,
+            "cancels": self.cancels,
+            "in_flight": len(self._pending),
+            "versions": self._versions,
+        }
+    
+    async def _encode(self, texts: List[str], version: int, kind: str, batch_size: int, lexical: bool = False):
+        header, body = await self._request({
+            "op": "encode",
+            "texts": texts,
+            "version": version,
+            "kind": kind,
+            "batch_size": batch_size,
+            "lexical": lexical
+        }, timeout=self.request_timeout + (self.item_timeout * len(texts) if len(texts) > 1 else 0))
+        if lexical:
+            return unpack_lexical(header["lexical"], body)
+        # frombuffer는 읽기 전용이므로 복사 (호출자가 결과를 수정할 수 있도록)
+        return np.frombuffer(body, dtype=np.float32).reshape(header["shape"]).copy()
+    
+    async def _request(self, header: dict, timeout: Optional[float] = None) -> Tuple[dict, bytes]:
+        if not self._connected():
+            async with self._connect_lock:
+                if not self._connected():
+                    self.reconnects += 1
+                    await self._connect()
+        
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.requests += 1
+        
+        try:
+            async with self._write_lock:
+                self._writer.write(encode_frame({**header, "id": request_id}))
+                await self._writer.drain()
+            response, body = await asyncio.wait_for(future, timeout or self.request_timeout)
+        except asyncio.TimeoutError:
+            self.errors += 1
+            self.timeouts += 1
+            await self._cancel(request_id)
+            raise RuntimeError(f"추론 서버 응답 시간 초과 ({header['op']}, {timeout or self.request_timeout:.1f}s)")
+        except asyncio.CancelledError:
+            # 호출한 요청이 취소됨 (클라이언트 연결 끊김 등): 추론 서버도 멈추도록
+            await asyncio.shield(self._cancel(request_id))
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+        
+        if not response["ok"]:
+            self.errors += 1
+            # 로드되지 않은 버전 등 요청 오류는 로컬 InferenceQueue와 같은 예외 타입으로
+            if response.get("error_type") == "ValueError":
+                raise ValueError(response["error"])
+            raise RuntimeError(f"추론 서버 오류: {response['error']}")
+        return response, body
+    
+    async def _cancel(self, request_id: int):
+        """더 기다리지 않는 요청을 추론 서버에서 취소 (응답 없음, 실패해도 무시)"""
+        if not self._connected():
+            return
+        self.cancels += 1
+        try:
+            async with self._write_lock:
+                self._writer.write(encode_frame({"op": "cancel", "id": request_id}))
+                await self._writer.drain()
+        except (ConnectionError, RuntimeError) as e:
+            logger.warning(f"⚠️ 추론 취소 요청 실패: {str(e)}")
+    
+    def _connected(self) -> bool:
+        # 응답 읽기 태스크가 끝났으면 쓰기는 되어도 응답을 받을 수 없으므로 끊긴 것으로 봄
+        return (
+            self._writer is not None and not self._writer.is_closing()
+            and self._reader_task is not None and not self._reader_task.done()
+        )
+    
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+        self._reader_task = asyncio.create_task(self._read_responses(self._reader, self._writer))
+    
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        응답을 id로 대기 중인 요청에 전달, 연결이 끊기면 대기 중인 요청 모두 실패
+        
+        잘못된 프레임(헤더 크기 초과, JSON 오류 등)을 받으면 이후 프레임 경계를 알 수 없으므로
+        연결을 닫고, 다음 요청에서 다시 연결합니다.
+        """
+        try:
+            while True:
+                header, body = await read_frame(reader)
+                future = self._pending.get(header.get("id"))
+                if future is not None and not future.done():
+                    future.set_result((header, body))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning(f"⚠️ 추론 서버 연결 끊김: {str(e)}")
+            error = ConnectionError("추론 서버 연결이 끊겼습니다.")
+        except Exception as e:
+            logger.error(f"❌ 추론 서버 응답을 읽을 수 없어 연결을 닫습니다: {str(e)}")
+            error = ConnectionError(f"추론 서버 응답 오류: {str(e)}")
+        writer.close()
+        self._fail_pending(error)
+    
+    def _fail_pending(self, error: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import observe_inference, observe_queue_wait
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueue:
+    """
+    동시 encode 요청을 모아서 배치로 추론하는 전용 실행기
+    
+    async 핸들러에서 SentenceTransformer.encode를 직접 호출하면 forward pass 동안
+    이벤트 루프 전체가 멈춥니다. 이 큐는 요청을 모아 최대 max_batch_size개 또는
+    max_wait_ms까지 기다린 뒤, 전용 스레드 1개에서 한 번의 배치 추론을 수행하고
+    각 요청의 future에 자기 행(row)을 돌려줍니다.
+    기관/프로필 텍스트는 최대 토큰 수가 다르므로 같은 배치 안에서도 kind별로 나눠 추론합니다.
+    lexical=True 요청은 dense 대신 dense / sparse / multi-vector(LexicalEmbedding)를 받으며
+    같은 (kind, 버전)의 lexical 요청끼리 배치로 묶습니다.
+    
+    임베딩 버전 전환 중에는 버전별 모델(EmbeddingService)을 함께 들고 있으며,
+    요청마다 지정한 버전의 모델로 추론합니다. 모든 버전이 같은 스레드를 쓰므로
+    새 버전 재임베딩이 기존 버전 추천 요청과 CPU를 두고 경쟁하지 않습니다.
+    """
+    
+    def __init__(
+        self,
+        encoders: Dict[int, object],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        loader: Optional[Callable] = None
+    ):
+        # 임베딩 버전 → EmbeddingService (같은 모델을 쓰는 버전은 같은 인스턴스)
+        self.encoders = encoders
+        # 버전 전환 시 새 버전 모델 로드 (load_encoders(versions, loaded) 형태)
+        self.loader = loader
+        self.max_batch_size = max_batch_size or int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))) / 1000
+        # encode_many를 이 개수씩 나눠 추론 스레드에 넣음
+        # (취소되면 다음 조각부터 실행하지 않고, 조각 사이에 프로필 요청 배치가 끼어들 수 있음)
+        self.many_chunk_size = int(os.getenv("INFERENCE_MANY_CHUNK_SIZE", "64"))
+        
+        # 모델은 스레드 1개에서만 실행 (forward pass끼리 CPU를 나눠 쓰지 않도록)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        
+        # 통계
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+    
+    async def start(self):
+        """배치 수집 워커 시작 (이벤트 루프 안에서 호출)"""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"✅ 추론 큐 시작 (max_batch_size={self.max_batch_size}, "
+            f"max_wait={self.max_wait * 1000:.1f}ms)"
+        )
+    
+    async def stop(self):
+        """워커 종료, 대기 중인 요청은 실패 처리"""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        
+        if self._queue:
+            while not self._queue.empty():
+                _, _, _, _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("추론 큐가 종료되었습니다."))
+        
+        self._executor.shutdown(wait=True)
+        logger.info("추론 큐 종료")
+    
+    async def encode(self, text: str, version: int, kind: str = "profile", lexical: bool = False):
+        """
+        텍스트 1개를 큐에 넣고 version 모델의 배치 추론 결과를 기다림 (kind: institution / profile)
+        
+        lexical이면 np.ndarray 대신 LexicalEmbedding을 반환합니다.
+        """
+        if self._queue is None:
+            raise RuntimeError("추론 큐가 시작되지 않았습니다.")
+        self._encoder(version)
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, kind, version, lexical, future, time.perf_counter()))
+        return await future
+    
+    async def encode_many(
+        self,
+        texts: List[str],
+        version: int,
+        batch_size: int = 32,
+        kind: str = "institution",
+        lexical: bool = False
+    ):
+        """
+        이미 모여 있는 텍스트 묶음(대량 등록 등)을 같은 추론 스레드에서 실행
+        
+        큐를 거치지 않지만 동일한 단일 스레드 executor를 사용하므로
+        동시 요청 배치와 forward pass가 겹치지 않습니다.
+        텍스트 길이순으로 many_chunk_size개씩 나눠 실행하므로, 호출이 취소되면(추론 서버의
+        cancel 요청 등) 실행 중인 조각까지만 추론하고 나머지는 추론 스레드를 쓰지 않습니다.
+        lexical이면 (N, 1024) 배열 대신 LexicalEmbedding 리스트를 반환합니다.
+        """
+        encoder = self._encoder(version)
+        encode = encoder.encode_batch_lexical if lexical else encoder.encode_batch
+        loop = asyncio.get_running_loop()
+        
+        def run(chunk: List[str], enqueued: float):
+            # 앞선 배치가 끝나 추론 스레드가 빌 때까지 기다린 시간
+            started = time.perf_counter()
+            observe_queue_wait(kind, started - enqueued)
+            embeddings = encode(chunk, batch_size=batch_size, kind=kind)
+            observe_inference(kind, len(chunk), time.perf_counter() - started)
+            return embeddings
+        
+        # 조각 안에서도 길이별 묶음(패딩 최소화)이 되도록 글자 수 순으로 나눈 뒤 원래 순서로 되돌림
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        chunk_size = max(self.many_chunk_size, batch_size)
+        results: List = [None] * len(texts)
+        for start in range(0, len(order), chunk_size):
+            rows = order[start:start + chunk_size]
+            embeddings = await loop.run_in_executor(
+                self._executor, run, [texts[row] for row in rows], time.perf_counter()
+            )
+            for row, embedding in zip(rows, embeddings):
+                results[row] = embedding
+        
+        if lexical:
+            return results
+        return np.stack(results) if results else np.zeros((0, 1024), dtype=np.float32)
+    
+    async def ensure_versions(self, versions: List[int]) -> List[int]:
+        """versions 중 로드되지 않은 버전의 모델을 로드하고, 새로 로드한 버전 목록 반환"""
+        missing = [version for version in versions if version not in self.encoders]
+        if not missing:
+            return []
+        if self.loader is None:
+            raise ValueError(f"임베딩 v{missing} 모델이 로드되지 않았습니다.")
+        
+        loop = asyncio.get_running_loop()
+        # 로드는 추론 스레드가 아닌 기본 스레드 풀에서 (그동안 기존 버전 추론은 계속)
+        loaded = await loop.run_in_executor(None, self.loader, missing, dict(self.encoders))
+        self.encoders.update(loaded)
+        return missing
+    
+    async def healthy(self) -> bool:
+        """배치 수집 워커가 살아 있는지 (/ready에서 사용, RemoteInferenceClient와 같은 인터페이스)"""
+        return self._worker is not None and not self._worker.done()
+    
+    def release_versions(self, keep: List[int]):
+        """keep에 없는 버전의 모델 해제 (다른 버전과 공유하는 모델은 그 버전이 계속 사용)"""
+        for stale in set(self.encoders) - set(keep):
+            del self.encoders[stale]
+    
+    def loaded_versions(self) -> List[int]:
+        return sorted(self.encoders)
+    
+    def _encoder(self, version: int):
+        encoder = self.encoders.get(version)
+        if encoder is None:
+            raise ValueError(f"임베딩 v{version} 모델이 로드되지 않았습니다.")
+        return encoder
+    
+    def stats(self) -> dict:
+        """배치 통계"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_observed": self.max_observed_batch,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "versions": sorted(self.encoders),
+        }
+    
+    async def _collect_batch(self) -> List[Tuple[str, str, int, bool, asyncio.Future, float]]:
+        """첫 요청이 올 때까지 기다린 후, max_wait 동안 max_batch_size개까지 추가 수집"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            # 이미 쌓여 있는 요청은 기다리지 않고 바로 가져감
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = await self._collect_batch()
+            
+            # 이미 취소된 요청(클라이언트 연결 끊김 등)은 추론하지 않음
+            batch = [item for item in batch if not item[4].done()]
+            if not batch:
+                continue
+            
+            self.batches += 1
+            self.items += len(batch)
+            self.max_observed_batch = max(self.max_observed_batch, len(batch))
+            
+            for kind, version, lexical in sorted({(kind, version, lexical) for _, kind, version, lexical, _, _ in batch}):
+                group = [
+                    (text, future, enqueued)
+                    for text, item_kind, item_version, item_lexical, future, enqueued in batch
+                    if item_kind == kind and item_version == version and item_lexical == lexical
+                ]
+                texts = [text for text, _, _ in group]
+                
+                try:
+                    encoder = self._encoder(version)
+                    encode = encoder.encode_batch_lexical if lexical else encoder.encode_batch
+                    started = time.perf_counter()
+                    for _, _, enqueued in group:
+                        observe_queue_wait(kind, started - enqueued)
+                    embeddings = await loop.run_in_executor(
+                        self._executor,
+                        lambda: encode(texts, batch_size=len(texts), kind=kind)
+                    )
+                    observe_inference(kind, len(texts), time.perf_counter() - started)
+                except Exception as e:
+                    logger.error(f"❌ 배치 추론 실패 ({len(texts)}개, {kind}, v{version}): {str(e)}")
+                    for _, future, _ in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, future, _), embedding in zip(group, embeddings):
+                    if not future.done():
+                        future.set_result(embedding)
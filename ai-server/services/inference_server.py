@@ -0,0 +1,239 @@
+"""
+모델을 혼자 들고 배치 추론만 하는 추론 전용 프로세스
+    
+    python -m services.inference_server
+
+uvicorn 워커를 여러 개(API_WORKERS) 띄우면 워커마다 lifespan에서 bge-m3(약 2GB)를
+따로 로드합니다. 이 프로세스가 모델과 추론 큐(InferenceQueue)를 하나만 들고,
+INFERENCE_MODE=remote로 실행한 API 워커들은 Unix 소켓(INFERENCE_SOCKET)으로
+텍스트를 보내고 벡터를 받습니다 (services/inference_client.py).
+여러 워커에서 동시에 온 프로필 요청도 같은 큐에서 한 배치로 묶입니다.
+
+추론 스레드 수는 INFERENCE_THREADS로 워커 수와 별개로 지정합니다.
+"""
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.embedding_service import load_encoders, WARMUP_SEQ_LENGTHS, WARMUP_BATCH_SIZES
+from services.inference_queue import InferenceQueue
+from utils.ipc import DEFAULT_SOCKET, encode_frame, read_frame
+from utils.lexical import pack_lexical
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServer:
+    """
+    Unix 소켓 추론 서버
+    
+    요청(op):
+        encode: texts를 version 모델로 추론 → 본문에 float32 (len(texts), 1024)
+                텍스트 1개면 추론 큐에 넣어 다른 요청과 배치로 묶고, 여러 개면 encode_many
+                lexical이면 응답 헤더 lexical(텍스트별 sparse / 토큰 수) + 본문 dense·multi-vector
+                (utils/lexical.pack_lexical)
+        ensure_versions: versions 모델이 없으면 로드 + 워밍업 (API 워커가 시작/버전 전환 시 호출)
+        stats: 큐 / 연결 통계
+        cancel: 같은 연결에서 보낸 id 요청을 취소 (클라이언트가 시간 초과 / 취소로 기다리지 않음, 응답 없음)
+                encode는 추론 큐에서 빠지고, encode_many는 실행 중인 조각 이후를 추론하지 않음
+    시작 시 INFERENCE_PRELOAD_VERSIONS(기본 EMBEDDING_VERSION) 모델을 로드하고,
+    그 외 버전은 요청이 오면 로드했다가 INFERENCE_IDLE_UNLOAD_SECONDS 동안 쓰이지 않으면 해제합니다.
+    (워커마다 버전 전환 시점이 조금씩 다르므로 한 워커의 전환으로 바로 해제하지 않음)
+    """
+    
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or os.getenv("INFERENCE_SOCKET", DEFAULT_SOCKET)
+        self.preload_versions = [
+            int(v) for v in os.getenv("INFERENCE_PRELOAD_VERSIONS", os.getenv("EMBEDDING_VERSION", "1")).split(",")
+            if v.strip()
+        ]
+        self.idle_unload_seconds = float(os.getenv("INFERENCE_IDLE_UNLOAD_SECONDS", "600"))
+        
+        self.queue: Optional[InferenceQueue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._unload_task: Optional[asyncio.Task] = None
+        self._load_lock = asyncio.Lock()
+        # 버전 → 마지막 사용 시각
+        self._last_used: Dict[int, float] = {}
+        
+        # 통계
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+    
+    async def start(self):
+        """모델 로드 → 워밍업 → 추론 큐 → 소켓 열기"""
+        start = time.time()
+        encoders = await asyncio.get_running_loop().run_in_executor(None, load_encoders, self.preload_versions)
+        self.queue = InferenceQueue(encoders, loader=load_encoders)
+        await self._warm_up(self.preload_versions)
+        await self.queue.start()
+        
+        # 이전 실행이 남긴 소켓 파일 정리
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self._unload_task = asyncio.create_task(self._unload_idle_versions())
+        
+        logger.info(
+            f"✅ 추론 서버 시작 ({self.socket_path}, 버전 {self.queue.loaded_versions()}, "
+            f"{time.time() - start:.1f}s)"
+        )
+    
+    async def stop(self):
+        if self._unload_task:
+            self._unload_task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.queue:
+            await self.queue.stop()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        logger.info("추론 서버 종료")
+    
+    def stats(self) -> dict:
+        return {
+            **self.queue.stats(),
+            "backend": next(iter(self.queue.encoders.values())).backend if self.queue.encoders else None,
+            "connections": self.connections,
+            "requests": self.requests,
+            "errors": self.errors,
+            "cancelled": self.cancelled
+        }
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """연결 하나 (API 워커 하나): 요청마다 태스크를 만들어 응답은 끝나는 순서대로 보냄"""
+        self.connections += 1
+        write_lock = asyncio.Lock()
+        # 요청 id → 처리 중인 태스크
+        tasks: Dict[int, asyncio.Task] = {}
+        
+        try:
+            while True:
+                header, _ = await read_frame(reader)
+                request_id = header.get("id")
+                if header.get("op") == "cancel":
+                    task = tasks.get(request_id)
+                    if task is not None and not task.done():
+                        task.cancel()
+                        self.cancelled += 1
+                    continue
+                
+                task = asyncio.create_task(self._dispatch(header, writer, write_lock))
+                tasks[request_id] = task
+                task.add_done_callback(lambda _, request_id=request_id: tasks.pop(request_id, None))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            for task in list(tasks.values()):
+                task.cancel()
+            writer.close()
+    
+    async def _dispatch(self, header: dict, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        self.requests += 1
+        response = {"id": header.get("id"), "ok": True}
+        body = b""
+        
+        try:
+            op = header.get("op")
+            if op == "encode" and header.get("lexical"):
+                response["lexical"], body = pack_lexical(await self._encode(header))
+            elif op == "encode":
+                embeddings = await self._encode(header)
+                response["shape"] = list(embeddings.shape)
+                body = np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+            elif op == "ensure_versions":
+                await self._ensure_versions(header["versions"])
+                response["versions"] = self.queue.loaded_versions()
+            elif op == "stats":
+                response["stats"] = self.stats()
+            else:
+                raise ValueError(f"알 수 없는 요청: {op}")
+        except Exception as e:
+            self.errors += 1
+            response = {"id": header.get("id"), "ok": False, "error": str(e), "error_type": type(e).__name__}
+        
+        async with write_lock:
+            writer.write(encode_frame(response, body))
+            await writer.drain()
+    
+    async def _encode(self, header: dict):
+        version = header["version"]
+        texts = header["texts"]
+        kind = header.get("kind", "institution")
+        lexical = header.get("lexical", False)
+        
+        await self._ensure_versions([version])
+        if len(texts) == 1:
+            embedding = await self.queue.encode(texts[0], version, kind=kind, lexical=lexical)
+            return [embedding] if lexical else embedding[np.newaxis, :]
+        return await self.queue.encode_many(
+            texts, version, batch_size=header.get("batch_size", 32), kind=kind, lexical=lexical
+        )
+    
+    async def _ensure_versions(self, versions: List[int]):
+        now = time.time()
+        for version in versions:
+            self._last_used[version] = now
+        if all(version in self.queue.encoders for version in versions):
+            return
+        
+        # 여러 워커가 동시에 새 버전을 요청해도 한 번만 로드
+        async with self._load_lock:
+            loaded = await self.queue.ensure_versions(versions)
+            if loaded:
+                logger.info(f"✅ 임베딩 v{loaded} 모델 로드")
+                await self._warm_up(loaded)
+    
+    async def _warm_up(self, versions: List[int]):
+        if not (WARMUP_SEQ_LENGTHS and WARMUP_BATCH_SIZES):
+            return
+        loop = asyncio.get_running_loop()
+        encoders = {id(self.queue.encoders[v]): self.queue.encoders[v] for v in versions}
+        for encoder in encoders.values():
+            await loop.run_in_executor(None, encoder.warm_up, WARMUP_SEQ_LENGTHS, WARMUP_BATCH_SIZES)
+    
+    async def _unload_idle_versions(self):
+        """미리 로드한 버전 외에 오래 쓰이지 않은 버전의 모델 해제"""
+        while True:
+            await asyncio.sleep(min(self.idle_unload_seconds, 60))
+            now = time.time()
+            keep = [
+                version for version in self.queue.loaded_versions()
+                if version in self.preload_versions
+                or now - self._last_used.get(version, now) < self.idle_unload_seconds
+            ]
+            stale = set(self.queue.loaded_versions()) - set(keep)
+            if stale:
+                self.queue.release_versions(keep)
+                logger.info(f"🔄 사용하지 않는 임베딩 v{sorted(stale)} 모델 해제")
+
+
+async def serve():
+    server = InferenceServer()
+    await server.start()
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    
+    await stop_event.wait()
+    await server.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(serve())
@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from services.cache_service import hash_text
+from utils.lexical import colbert_to_int8
+from utils.text_formatter import create_institution_text_from_metadata
+
+logger = logging.getLogger(__name__)
+
+# 이 프로세스를 나타내는 embedding_jobs.owner
+JOB_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_status(job: dict, rows_per_second: Optional[float] = None) -> dict:
+    """
+    embedding_jobs 행 → BatchUpdateStatus 응답
+    
+    rows_per_second가 없으면(다른 프로세스가 실행 중이거나 끝난 작업) 시작 ~ 마지막 heartbeat 기준으로 계산
+    """
+    if rows_per_second is None:
+        elapsed = job.get("elapsed_seconds") or 0.0
+        rows_per_second = job["processed"] / elapsed if elapsed > 0 else 0.0
+    
+    remaining = max(job["total"] - job["processed"], 0)
+    eta = None
+    if job["status"] == "running" and rows_per_second > 0:
+        eta = round(remaining / rows_per_second, 1)
+    
+    return {
+        "jobId": job["job_id"],
+        "mode": job["mode"],
+        "since": job["since"],
+        "status": job["status"],
+        "embeddingVersion": job["embedding_version"],
+        "total": job["total"],
+        "processed": job["processed"],
+        "reembedded": job["reembedded"],
+        "skipped": job["skipped"],
+        "failed": job["failed"],
+        "progress": round(min(job["processed"] / job["total"], 1.0), 4) if job["total"] else 1.0,
+        "rowsPerSecond": round(rows_per_second, 1),
+        "etaSeconds": eta,
+        "lastInstitutionId": job["last_institution_id"],
+        "startedAt": job["started_at"],
+        "finishedAt": job["finished_at"],
+        "error": job["error"]
+    }
+
+
+class ReembeddingJob:
+    """
+    institution_embeddings 전체(또는 since 이후 수정분)를 다시 임베딩하는 백그라운드 작업
+    
+    텍스트 템플릿이나 모델(EMBEDDING_VERSION)을 바꾼 뒤 Spring에서 기관을 다시 보내지 않고
+    저장된 metadata로 텍스트를 재생성해 임베딩합니다.
+        1) 검색 중인(active) 버전 행을 institution_id 순서로 REEMBEDDING_CHUNK_SIZE개씩 읽음
+           (keyset, 청크마다 짧은 트랜잭션)
+        2) 작업 버전(EMBEDDING_VERSION) 행의 텍스트가 이미 같으면 건너뜀 (force면 모두 재임베딩)
+        3) REEMBEDDING_ENCODE_CHUNK개씩 작업 버전 모델로 추론
+           (실시간 요청이 사이사이 추론 스레드를 쓸 수 있도록 작게, 실패하면 REEMBEDDING_ENCODE_RETRIES번까지 재시도)
+        4) 작업 버전 행으로 저장 (읽은 뒤 수정된 기관은 덮어쓰지 않음)
+           2단계 검색(RETRIEVAL_MODE=two_stage)이면 같은 추론으로 sparse / multi-vector도 저장
+        5) 마지막 institution_id와 카운터를 embedding_jobs에 체크포인트
+    2단계 검색이면 끝난 뒤 작업 버전에 sparse / multi-vector가 빠진 기관(건너뛴 기관 등)을 마저 채웁니다.
+    작업 버전이 active와 다르면(새 버전 빌드) 그 버전의 부분 ANN(+ sparse) 인덱스를 만들고,
+    activate면 검색 버전까지 전환합니다. 그동안 기존 버전은 계속 검색에 사용됩니다.
+    중단되면(종료/장애/추론 재시도 실패) 체크포인트 다음 기관부터 이어서 실행하고,
+    텍스트가 없어 임베딩하지 못한 기관(failed)이 있으면 인덱스 생성/전환 없이 failed로 끝납니다.
+    그 기관들은 embedding_jobs.failed_ids에 남아, 데이터를 고친 뒤 재개하면 먼저 다시 시도합니다.
+    """
+    
+    def __init__(self, db_service, inference_queue, job: dict):
+        self.db_service = db_service
+        self.inference_queue = inference_queue
+        self.job = job
+        
+        self.chunk_size = int(os.getenv("REEMBEDDING_CHUNK_SIZE", "256"))
+        self.encode_chunk = int(os.getenv("REEMBEDDING_ENCODE_CHUNK", "32"))
+        self.encode_retries = int(os.getenv("REEMBEDDING_ENCODE_RETRIES", "3"))
+        # 청크 체크포인트와 별도로 heartbeat를 갱신하는 주기 (인덱스 생성처럼 오래 걸리는 단계 동안에도
+        # REEMBEDDING_STALE_SECONDS보다 짧아야 다른 서버가 실행 중인 작업을 가져가지 않음)
+        self.heartbeat_seconds = float(os.getenv("REEMBEDDING_HEARTBEAT_SECONDS", "30"))
+        # 텍스트가 없어 임베딩하지 못한 기관 (체크포인트마다 저장, 재개 시 다시 시도)
+        self.job["failed_ids"] = list(job.get("failed_ids") or [])
+        
+        self._task: Optional[asyncio.Task] = None
+        # 처리 속도는 이 프로세스에서 실행한 구간 기준 (재개 전 구간 제외)
+        self._run_started = time.time()
+        self._run_start_processed = job["processed"]
+    
+    @property
+    def job_id(self) -> int:
+        return self.job["job_id"]
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """이벤트 루프에서 작업 시작"""
+        self._run_started = time.time()
+        self._run_start_processed = self.job["processed"]
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"🔄 재임베딩 작업 #{self.job_id} 시작 (mode={self.job['mode']}, "
+            f"since={self.job['since']}, 체크포인트={self.job['last_institution_id']})"
+        )
+    
+    async def stop(self):
+        """서버 종료 시: 현재 청크까지 버리고 interrupted로 기록 (다음 시작 시 재개)"""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+    
+    def status(self) -> dict:
+        """진행 상황 (처리 속도는 메모리 기준으로 계산)"""
+        elapsed = time.time() - self._run_started
+        processed = self.job["processed"] - self._run_start_processed
+        return job_status(self.job, processed / elapsed if elapsed > 0 else 0.0)
+    
+    async def _run(self):
+        last_id = self.job["last_institution_id"]
+        target_version = self.job["embedding_version"]
+        heartbeat = asyncio.create_task(self._heartbeat())
+        
+        try:
+            if self.job["failed_ids"]:
+                await self._retry_failed(self.db_service.active_version, target_version)
+            
+            while True:
+                source_version = self.db_service.active_version
+                rows = await run_in_threadpool(
+                    self.db_service.fetch_reembedding_chunk,
+                    last_id, self.job["since"], self.chunk_size, source_version, target_version
+                )
+                if not rows:
+                    break
+                
+                failed_ids = await self._process_chunk(rows, source_version, target_version)
+                self.job["failed_ids"].extend(failed_ids)
+                self.job["failed"] += len(failed_ids)
+                last_id = rows[-1][0]
+                self.job["last_institution_id"] = last_id
+                self.job["processed"] += len(rows)
+                await self._checkpoint()
+            
+            if self.job["failed"]:
+                # 빠진 기관이 있는 버전은 인덱스를 만들거나 검색 버전으로 전환하지 않음
+                self.job["status"] = "failed"
+                self.job["error"] = (
+                    f"{self.job['failed']}개 기관을 임베딩하지 못했습니다 (텍스트 없음, 예: {self.job['failed_ids'][:20]}). "
+                    f"데이터를 고친 뒤 재개하면 이 기관들만 다시 시도합니다."
+                )
+                await self._checkpoint(finished=True)
+                logger.error(f"❌ 재임베딩 작업 #{self.job_id} 실패: {self.job['error']}")
+                return
+            
+            if self.db_service.two_stage:
+                await self._fill_lexical_backlog(target_version)
+            
+            if target_version != self.db_service.active_version:
+                # 새 버전: 데이터가 모두 들어간 뒤 인덱스 생성 (IVFFlat은 있는 데이터로 학습)
+                self.job["status"] = "indexing"
+                await self._checkpoint()
+                await run_in_threadpool(self.db_service.build_version_index, target_version)
+                if self.job["activate"]:
+                    await run_in_threadpool(self.db_service.activate_version, target_version)
+            
+            self.job["status"] = "completed"
+            await self._checkpoint(finished=True)
+            logger.info(
+                f"✅ 재임베딩 작업 #{self.job_id} 완료 (처리 {self.job['processed']}개, "
+                f"재임베딩 {self.job['reembedded']}개, 건너뜀 {self.job['skipped']}개, 실패 {self.job['failed']}개)"
+            )
+        
+        except asyncio.CancelledError:
+            self.job["status"] = "interrupted"
+            await self._checkpoint()
+            logger.warning(f"⚠️ 재임베딩 작업 #{self.job_id} 중단 (체크포인트: institution_id={last_id})")
+            raise
+        
+        except Exception as e:
+            self.job["status"] = "failed"
+            self.job["error"] = str(e)
+            logger.error(f"❌ 재임베딩 작업 #{self.job_id} 실패 (체크포인트: institution_id={last_id}): {str(e)}")
+            try:
+                await self._checkpoint()
+            except Exception as checkpoint_error:
+                logger.error(f"❌ 재임베딩 작업 #{self.job_id} 상태 저장 실패: {str(checkpoint_error)}")
+        
+        finally:
+            heartbeat.cancel()
+    
+    async def _heartbeat(self):
+        """작업이 끝날 때까지 heartbeat 갱신 (청크 사이, 인덱스 생성, 버전 전환 중 모두)"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await run_in_threadpool(self.db_service.checkpoint_embedding_job, self.job_id)
+            except Exception as e:
+                logger.warning(f"⚠️ 재임베딩 작업 #{self.job_id} heartbeat 갱신 실패: {str(e)}")
+    
+    async def _retry_failed(self, source_version: int, target_version: int):
+        """
+        이전 실행에서 텍스트가 없어 실패한 기관(failed_ids)을 다시 시도
+        
+        여전히 텍스트가 없는 기관만 failed_ids에 남고, 그 사이 삭제된 기관은 빠집니다.
+        청크마다 체크포인트하므로 중간에 중단되어도 아직 시도하지 않은 기관은 남아 있습니다.
+        """
+        retry_ids = self.job["failed_ids"]
+        still_failed = []
+        for start in range(0, len(retry_ids), self.chunk_size):
+            part = retry_ids[start:start + self.chunk_size]
+            rows = await run_in_threadpool(self.db_service.fetch_reembedding_rows, part, source_version, target_version)
+            failed_ids = await self._process_chunk(rows, source_version, target_version)
+            
+            still_failed.extend(failed_ids)
+            self.job["failed_ids"] = still_failed + retry_ids[start + len(part):]
+            # 이번에 임베딩했거나 삭제된 기관만큼 failed에서 뺌
+            self.job["failed"] -= len(part) - len(failed_ids)
+            await self._checkpoint()
+        
+        logger.info(
+            f"🔄 재임베딩 작업 #{self.job_id}: 실패했던 기관 {len(retry_ids)}개 재시도, "
+            f"{len(still_failed)}개는 여전히 텍스트 없음"
+        )
+    
+    async def _process_chunk(self, rows: List[tuple], source_version: int, target_version: int) -> List[int]:
+        """
+        한 청크: 텍스트 재생성 → 작업 버전에 없거나 바뀐 것만 추론 → 저장
+        
+        추론이 재시도 후에도 실패하면 예외를 올려 체크포인트가 이 청크를 넘어가지 않게 하고,
+        카운터는 청크가 끝까지 처리된 뒤에만 반영합니다 (재개 시 중복 집계 방지).
+        
+        Returns:
+            텍스트가 없어 임베딩하지 못한 institution_id (failed 카운터는 호출한 쪽에서 반영)
+        """
+        failed_ids = []
+        skipped = 0
+        pending = []
+        for institution_id, original_text, metadata, target_hash, updated_at in rows:
+            text = create_institution_text_from_metadata(metadata or {}) or original_text
+            if not text:
+                failed_ids.append(institution_id)
+                continue
+            
+            new_hash = hash_text(text)
+            if not self.job["force"] and target_hash == new_hash:
+                skipped += 1
+                continue
+            pending.append((institution_id, text, metadata, new_hash, updated_at))
+        
+        to_save = []
+        for start in range(0, len(pending), self.encode_chunk):
+            part = pending[start:start + self.encode_chunk]
+            embeddings = await self._encode(
+                [text for _, text, _, _, _ in part], target_version, lexical=self.db_service.two_stage
+            )
+            to_save.extend(
+                (institution_id, embedding, text, metadata, new_hash, updated_at)
+                for (institution_id, text, metadata, new_hash, updated_at), embedding in zip(part, embeddings)
+            )
+        
+        saved = set()
+        if to_save:
+            dense_rows = to_save
+            if self.db_service.two_stage:
+                dense_rows = [(row[0], row[1].dense, *row[2:]) for row in to_save]
+            saved = await run_in_threadpool(
+                self.db_service.save_reembedded_batch, dense_rows, source_version, target_version
+            )
+            if self.db_service.two_stage and saved:
+                await run_in_threadpool(self.db_service.save_lexical_embeddings, [
+                    (institution_id, new_hash, embedding.sparse, colbert_to_int8(embedding.colbert))
+                    for institution_id, embedding, _, _, new_hash, _ in to_save
+                    if institution_id in saved
+                ], target_version)
+        
+        if failed_ids:
+            logger.warning(f"⚠️ 텍스트가 없어 재임베딩하지 못한 기관: {failed_ids}")
+        self.job["reembedded"] += len(saved)
+        # 나머지는 읽은 뒤 실시간 요청이 먼저 갱신한 기관 (이미 현재 템플릿/버전으로 저장됨)
+        self.job["skipped"] += skipped + len(to_save) - len(saved)
+        return failed_ids
+    
+    async def _fill_lexical_backlog(self, version: int):
+        """2단계 검색: version에서 sparse / multi-vector가 없거나 텍스트가 바뀐 기관을 채움 (scripts.build_lexical_index와 같은 대상)"""
+        after_id = -1
+        filled = 0
+        while True:
+            rows = await run_in_threadpool(self.db_service.fetch_lexical_backlog, version, after_id, self.chunk_size)
+            if not rows:
+                break
+            
+            for start in range(0, len(rows), self.encode_chunk):
+                part = rows[start:start + self.encode_chunk]
+                embeddings = await self._encode([original_text for _, original_text, _ in part], version, lexical=True)
+                await run_in_threadpool(self.db_service.save_lexical_embeddings, [
+                    (institution_id, content_hash, embedding.sparse, colbert_to_int8(embedding.colbert))
+                    for (institution_id, _, content_hash), embedding in zip(part, embeddings)
+                ], version)
+            after_id = rows[-1][0]
+            filled += len(rows)
+        
+        if filled:
+            logger.info(f"✅ 재임베딩 작업 #{self.job_id}: v{version} sparse / multi-vector {filled}개 추가로 채움")
+    
+    async def _encode(self, texts: List[str], target_version: int, lexical: bool = False):
+        """작업 버전 모델로 추론 (실패하면 잠시 뒤 재시도, 끝내 실패하면 RuntimeError)"""
+        for attempt in range(1, self.encode_retries + 1):
+            try:
+                return await self.inference_queue.encode_many(
+                    texts, target_version, batch_size=len(texts), kind="institution", lexical=lexical
+                )
+            except Exception as e:
+                if attempt >= self.encode_retries:
+                    raise RuntimeError(f"재임베딩 추론 실패 ({len(texts)}개, {attempt}회 시도): {str(e)}") from e
+                logger.warning(f"⚠️ 재임베딩 추론 실패 ({len(texts)}개, {attempt}회째), 재시도합니다: {str(e)}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+    
+    async def _checkpoint(self, finished: bool = False):
+        await run_in_threadpool(
+            lambda: self.db_service.checkpoint_embedding_job(
+                self.job_id,
+                finished=finished,
+                status=self.job["status"],
+                last_institution_id=self.job["last_institution_id"],
+                processed=self.job["processed"],
+                reembedded=self.job["reembedded"],
+                skipped=self.job["skipped"],
+                failed=self.job["failed"],
+                failed_ids=self.job["failed_ids"],
+                error=self.job.get("error")
+            )
+        )
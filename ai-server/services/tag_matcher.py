@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.tag_vocabulary import all_tags, normalize_tag
+
+logger = logging.getLogger(__name__)
+
+
+class TagMatcher:
+    """
+    추천 이유용 태그 매칭 (선호 태그 ↔ 기관 태그)
+    
+    태그 어휘는 닫혀 있으므로 임베딩 버전별로 어휘 전체를 한 번만 임베딩하고
+    태그 x 태그 코사인 유사도 행렬을 만들어 둡니다. 요청마다 태그를 임베딩하지 않고
+        1) 정확히 같은 태그 (띄어쓰기 무시)
+        2) 선호 태그와 유사도가 TAG_MATCH_THRESHOLD 이상인 기관 태그 (예: 재활 ↔ 재활치료실)
+    를 후보 전체에 대해 행렬 인덱싱 한 번으로 찾습니다.
+    어휘에 없는 태그는 정확히 일치하는 경우만 매칭합니다.
+    """
+    
+    def __init__(self, inference_queue, vocabulary: Optional[List[str]] = None):
+        self.inference_queue = inference_queue
+        self.threshold = float(os.getenv("TAG_MATCH_THRESHOLD", "0.75"))
+        
+        self.tags = vocabulary or all_tags()
+        self._index = {normalize_tag(tag): i for i, tag in enumerate(self.tags)}
+        # 임베딩 버전 → 태그 x 태그 유사도 (float32)
+        self._similarity: Dict[int, np.ndarray] = {}
+        self._preparing: Dict[int, asyncio.Task] = {}
+    
+    async def prepare(self, version: int):
+        """version 모델로 태그 어휘를 임베딩해 유사도 행렬 생성 (이미 있으면 생략)"""
+        if version in self._similarity:
+            return
+        
+        start = time.time()
+        embeddings = await self.inference_queue.encode_many(
+            self.tags, version, batch_size=len(self.tags), kind="profile"
+        )
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        # 정규화된 벡터이므로 내적 = 코사인 유사도
+        self._similarity[version] = embeddings @ embeddings.T
+        logger.info(f"✅ 태그 임베딩 캐시 생성 (v{version}, 태그 {len(self.tags)}개, {time.time() - start:.2f}s)")
+    
+    def ensure(self, version: int):
+        """요청 경로용: 행렬이 없으면 백그라운드로 생성만 시작 (그동안은 정확히 일치하는 태그만 매칭)"""
+        if version in self._similarity or version in self._preparing:
+            return
+        
+        task = asyncio.create_task(self.prepare(version))
+        self._preparing[version] = task
+        
+        def done(task: asyncio.Task):
+            self._preparing.pop(version, None)
+            if not task.cancelled() and task.exception():
+                logger.error(f"❌ 태그 임베딩 캐시 생성 실패 (v{version}): {str(task.exception())}")
+        
+        task.add_done_callback(done)
+    
+    def release(self, keep: List[int]):
+        """keep에 없는 버전의 유사도 행렬 해제"""
+        for stale in set(self._similarity) - set(keep):
+            del self._similarity[stale]
+    
+    def stats(self) -> dict:
+        return {
+            "tags": len(self.tags),
+            "threshold": self.threshold,
+            "versions": sorted(self._similarity)
+        }
+    
+    def match(
+        self,
+        preferred_tags: List[str],
+        candidate_tags: List[List[str]],
+        version: int
+    ) -> List[Tuple[List[str], List[Tuple[str, str]]]]:
+        """
+        후보 기관별 (정확히 일치한 선호 태그, [(선호 태그, 관련 기관 태그)]) 반환
+        
+        관련 태그는 유사도가 높은 순서이며, 이미 정확히 일치한 선호 태그는 제외합니다.
+        """
+        preferred = {}
+        for tag in preferred_tags:
+            preferred.setdefault(normalize_tag(tag), tag)
+        # 기관별 정규화 태그 → 원래 표기
+        candidates = [{normalize_tag(tag): tag for tag in tags} for tags in candidate_tags]
+        
+        exact = [[tag for key, tag in preferred.items() if key in candidate] for candidate in candidates]
+        related: List[List[Tuple[str, str]]] = [[] for _ in candidates]
+        
+        similarity = self._similarity.get(version)
+        if similarity is None:
+            self.ensure(version)
+        known_preferred = [(key, tag) for key, tag in preferred.items() if key in self._index]
+        if similarity is None or not known_preferred or not candidates:
+            return list(zip(exact, related))
+        
+        # 후보 전체에 등장한 어휘 태그 (열)
+        columns = sorted({self._index[key] for candidate in candidates for key in candidate if key in self._index})
+        if not columns:
+            return list(zip(exact, related))
+        column_of = {tag_index: j for j, tag_index in enumerate(columns)}
+        
+        membership = np.zeros((len(candidates), len(columns)), dtype=bool)
+        for c, candidate in enumerate(candidates):
+            for key in candidate:
+                if key in self._index:
+                    membership[c, column_of[self._index[key]]] = True
+        
+        rows = [self._index[key] for key, _ in known_preferred]
+        scores = similarity[np.ix_(rows, columns)]  # 선호 x 태그
+        # 후보 x 선호 x 태그, 기관에 없는 태그는 -1
+        masked = np.where(membership[:, None, :], scores[None, :, :], np.float32(-1.0))
+        best = masked.argmax(axis=2)
+        best_scores = np.take_along_axis(masked, best[:, :, None], axis=2)[:, :, 0]
+        
+        hits = np.argwhere(best_scores >= self.threshold)
+        for c, p in sorted(hits.tolist(), key=lambda hit: -best_scores[hit[0], hit[1]]):
+            key, tag = known_preferred[p]
+            if key in candidates[c]:
+                continue
+            matched = candidates[c][normalize_tag(self.tags[columns[best[c, p]]])]
+            related[c].append((tag, matched))
+        
+        return list(zip(exact, related))
@@ -0,0 +1,163 @@
+"""
+2단계 검색 (RETRIEVAL_MODE=two_stage)
+
+1단계 (싼 후보 생성): dense ANN 상위 TWO_STAGE_DENSE_CANDIDATES개 + sparse(어휘) 내적 상위
+    TWO_STAGE_SPARSE_CANDIDATES개를 동시에 조회해 RRF(Reciprocal Rank Fusion)로 합침
+    dense만으로는 놓치는 정확한 용어(치매, 주간보호, 지역명 등) 일치 기관을 sparse가 보완합니다.
+2단계 (재정렬): 합친 순위 상위 TWO_STAGE_RERANK_CANDIDATES개만 저장된 multi-vector로 MaxSim을 계산하고
+    dense / sparse / multi-vector 점수의 가중합(TWO_STAGE_WEIGHTS)으로 최종 순위를 정함
+
+각 단계 소요 시간은 dense_candidates / sparse_candidates / rerank 단계로 Server-Timing과
+/metrics에 기록됩니다. sparse / multi-vector가 아직 없는 기관(scripts/build_lexical_index로 채움)은
+있는 점수만으로 가중합을 다시 정규화합니다.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from utils.lexical import LexicalEmbedding, colbert_from_int8, maxsim
+from utils.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+class TwoStageRetriever:
+    """dense + sparse 후보 생성 → multi-vector 재정렬"""
+    
+    def __init__(self, db_service):
+        self.db_service = db_service
+        # 단계별 후보 수
+        self.dense_candidates = int(os.getenv("TWO_STAGE_DENSE_CANDIDATES", "50"))
+        self.sparse_candidates = int(os.getenv("TWO_STAGE_SPARSE_CANDIDATES", "50"))
+        self.rerank_candidates = int(os.getenv("TWO_STAGE_RERANK_CANDIDATES", "20"))
+        # RRF: 1 / (k + 순위)
+        self.rrf_k = int(os.getenv("TWO_STAGE_RRF_K", "60"))
+        # 최종 점수 가중치: dense, sparse, multi-vector (bge-m3 권장값 1 : 0.3 : 1)
+        self.weights = tuple(float(w) for w in os.getenv("TWO_STAGE_WEIGHTS", "1.0,0.3,1.0").split(","))
+        if len(self.weights) != 3:
+            raise ValueError(f"TWO_STAGE_WEIGHTS는 dense,sparse,colbert 3개여야 합니다: {self.weights}")
+        
+        # 통계
+        self.searches = 0
+        self.stage_seconds = {"dense_candidates": 0.0, "sparse_candidates": 0.0, "rerank": 0.0}
+        self.candidates = {"dense": 0, "sparse": 0, "fused": 0, "reranked": 0}
+        # 재정렬 대상 중 sparse / multi-vector가 없어 dense 점수만 쓴 기관 수
+        self.missing_lexical = 0
+    
+    async def search(
+        self,
+        backend,
+        query: LexicalEmbedding,
+        limit: int = 10,
+        filters: Optional[dict] = None,
+        version: Optional[int] = None,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Args:
+            backend: dense 후보 검색 백엔드 (DatabaseService 또는 VectorIndex)
+            query: 프로필의 dense / sparse / multi-vector (kind="profile")
+        
+        Returns:
+            search_similar_institutions와 같은 형식, similarity = 최종 가중합 점수
+            (+ scores: 단계별 점수)
+        """
+        dense_limit = max(self.dense_candidates, limit)
+        rerank_limit = max(self.rerank_candidates, limit)
+        
+        # 1단계: dense ANN과 sparse 후보를 동시에 조회
+        dense, sparse = await asyncio.gather(
+            self._timed(
+                "dense_candidates", backend.search_similar_institutions,
+                user_embedding=query.dense,
+                limit=dense_limit,
+                min_similarity=0.0,
+                probes=probes,
+                ef_search=ef_search,
+                filters=filters,
+                version=version
+            ),
+            self._timed(
+                "sparse_candidates", self.db_service.search_sparse_institutions,
+                query.sparse, self.sparse_candidates, filters, version
+            )
+        )
+        fused = self._fuse([row["institutionId"] for row in dense], [institution_id for institution_id, _ in sparse])
+        
+        # 2단계: 상위 후보만 multi-vector로 재정렬
+        rows, results = await self._timed("rerank", self._rerank, query, fused[:rerank_limit], version)
+        
+        self.searches += 1
+        self.candidates["dense"] += len(dense)
+        self.candidates["sparse"] += len(sparse)
+        self.candidates["fused"] += len(fused)
+        self.candidates["reranked"] += len(rows)
+        logger.info(
+            f"🔎 2단계 검색: dense {len(dense)}개 + sparse {len(sparse)}개 → 후보 {len(fused)}개 "
+            f"→ 재정렬 {len(rows)}개 (상위 점수: {results[0]['similarity'] if results else 0:.4f}, v{version})"
+        )
+        return results[:limit]
+    
+    def stats(self) -> dict:
+        searches = max(self.searches, 1)
+        return {
+            "searches": self.searches,
+            "candidates": {
+                "dense": self.dense_candidates,
+                "sparse": self.sparse_candidates,
+                "rerank": self.rerank_candidates
+            },
+            "weights": dict(zip(("dense", "sparse", "colbert"), self.weights)),
+            "avg_candidates": {name: round(count / searches, 1) for name, count in self.candidates.items()},
+            "avg_stage_ms": {name: round(seconds * 1000 / searches, 2) for name, seconds in self.stage_seconds.items()},
+            "missing_lexical": self.missing_lexical
+        }
+    
+    def _fuse(self, dense_ids: List[int], sparse_ids: List[int]) -> List[int]:
+        """두 순위 목록 → RRF 점수 내림차순 institution_id"""
+        scores: Dict[int, float] = {}
+        for ranking in (dense_ids, sparse_ids):
+            for rank, institution_id in enumerate(ranking, start=1):
+                scores[institution_id] = scores.get(institution_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        return sorted(scores, key=scores.get, reverse=True)
+    
+    def _rerank(self, query: LexicalEmbedding, candidate_ids: List[int], version: Optional[int]):
+        """후보 행 조회 → 가중합 점수 내림차순 결과 (없는 점수는 빼고 가중치 다시 정규화)"""
+        rows = self.db_service.fetch_rerank_candidates(candidate_ids, query.dense, query.sparse, version)
+        dense_weight, sparse_weight, colbert_weight = self.weights
+        results = []
+        for institution_id, similarity, sparse_score, colbert, metadata, original_text in rows:
+            colbert_score = None if colbert is None else maxsim(query.colbert, colbert_from_int8(colbert))
+            if sparse_score is None and colbert_score is None:
+                self.missing_lexical += 1
+            
+            total, weight_sum = dense_weight * similarity, dense_weight
+            if sparse_score is not None:
+                total += sparse_weight * sparse_score
+                weight_sum += sparse_weight
+            if colbert_score is not None:
+                total += colbert_weight * colbert_score
+                weight_sum += colbert_weight
+            
+            results.append({
+                "institutionId": institution_id,
+                "similarity": total / weight_sum if weight_sum else similarity,
+                "metadata": metadata,
+                "originalText": original_text,
+                "scores": {"dense": similarity, "sparse": sparse_score, "colbert": colbert_score}
+            })
+        results.sort(key=lambda item: item["similarity"], reverse=True)
+        return rows, results
+    
+    async def _timed(self, name: str, fn, *args, **kwargs):
+        """동기 함수를 스레드풀에서 name 단계로 계측하며 실행"""
+        start = time.perf_counter()
+        with stage(name):
+            result = await run_in_threadpool(fn, *args, **kwargs)
+        self.stage_seconds[name] += time.perf_counter() - start
+        return result
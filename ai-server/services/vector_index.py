@@ -0,0 +1,628 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.quantization import quantize_int8, int8_scores
+from utils.geo import haversine_km, bounding_box
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+METADATA_FILE = "metadata.jsonl"
+
+# 필터용 역색인을 만드는 메타데이터 필드
+POSTING_FIELDS = ("type", "specialized_diseases", "service_types")
+
+
+class VectorIndex:
+    """
+    인메모리(memory-mapped) 벡터 검색 백엔드
+    
+    institution_embeddings 전체를 연속된 float32 행렬로 올려두고
+    행렬-벡터 곱 1번 + argpartition으로 top-k를 계산합니다.
+    행렬은 VECTOR_INDEX_DIR 아래 .npy 파일에 memory-map으로 저장되므로
+    재시작 시 전체를 다시 읽지 않고 마지막 동기화 이후 변경분만 DB에서 가져옵니다.
+    행렬 / id 파일은 제자리에서 바뀌므로 save() 이후 처음 바꾸기 전에 manifest를 dirty로 기록하고,
+    save()가 끝나지 못한 채 종료된 인덱스(dirty)는 파일끼리 어긋났을 수 있어 새로 빌드합니다.
+    
+    Postgres가 원본(source of truth)이며, 이 인덱스는 읽기 전용 복제본입니다.
+    DatabaseService의 저장 리스너로 등록되어 이 프로세스의 저장은 즉시 해당 행만 갱신되고,
+    다른 서버 / 재임베딩 / 스냅샷 가져오기의 저장과 삭제는 refresh()의 주기 동기화로 반영됩니다.
+    인덱스 하나는 임베딩 버전 하나만 담고(VECTOR_INDEX_DIR/v{버전}), 버전을 전환하면
+    새 버전 인덱스를 따로 로드한 뒤 교체합니다.
+    persist=False면 파일 없이 메모리에만 올립니다 (pgvector 모드의 대량 추천용 스냅샷).
+    
+    VECTOR_INDEX_QUANTIZATION=int8이면 int8 행렬(1 byte/dim)로 후보를 고르고
+    후보 행만 float32 memmap에서 읽어 재정렬하므로 상주 메모리가 약 1/4로 줄어듭니다.
+    
+    추천 필터(기관 유형, 필수 태그)는 (필드, 값) → 행 번호 역색인으로 마스크를 만들고,
+    마스크 밖의 행은 점수 계산 후 제외하므로 필터가 있어도 결과가 모자라지 않습니다.
+    반경 필터는 메타데이터의 위경도를 모아둔 (capacity, 2) 배열로 한 번에 계산합니다.
+    """
+    
+    def __init__(
+        self,
+        db_service,
+        version: int,
+        index_dir: Optional[str] = None,
+        dimension: int = 1024,
+        persist: bool = True
+    ):
+        self.db_service = db_service
+        self.version = version
+        self.persist = persist
+        self.index_dir = os.path.join(index_dir or os.getenv("VECTOR_INDEX_DIR", "./vector_index"), f"v{version}")
+        self.dimension = dimension
+        self.quantization = os.getenv("VECTOR_INDEX_QUANTIZATION", "none").lower()
+        if self.quantization not in ("none", "int8"):
+            raise ValueError(f"지원하지 않는 VECTOR_INDEX_QUANTIZATION: {self.quantization}")
+        self.rerank_factor = int(os.getenv("QUANTIZED_RERANK_FACTOR", "4"))
+        
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dimension) memmap
+        self._ids: Optional[np.ndarray] = None     # (capacity,) memmap
+        self._codes: Optional[np.ndarray] = None   # (capacity, dimension) int8, 양자화 모드에서만
+        self._count = 0
+        self._row_of: Dict[int, int] = {}
+        self._metadata: List[dict] = []
+        self._postings: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self._coords: Optional[np.ndarray] = None  # (capacity, 2) 위도/경도, 없으면 NaN
+        self._synced_at: Optional[str] = None
+        self._dirty = False  # 디스크의 manifest가 dirty로 기록되어 있는지
+    
+    @property
+    def size(self) -> int:
+        return self._count
+    
+    def load(self):
+        """디스크의 인덱스를 열고 DB 변경분을 반영 (없으면 전체 빌드)"""
+        start = time.time()
+        if self.persist:
+            os.makedirs(self.index_dir, exist_ok=True)
+        
+        with self._lock:
+            if self.persist and self._open_existing():
+                loaded = self._count
+                changed = self.sync(since=self._synced_at)
+                logger.info(
+                    f"✅ 벡터 인덱스 로드 완료: {loaded}개 (변경분 {changed}개 반영, "
+                    f"{(time.time() - start) * 1000:.0f}ms)"
+                )
+            else:
+                self._mark_dirty()
+                self._allocate(capacity=1024)
+                count = self.sync(since=None)
+                logger.info(
+                    f"✅ 벡터 인덱스 신규 빌드 완료: {count}개 "
+                    f"({(time.time() - start) * 1000:.0f}ms)"
+                )
+            self.save()
+    
+    def sync(self, since: Optional[str]) -> int:
+        """
+        since 이후 변경된 행을 DB에서 가져와 반영 (since=None이면 전체)
+        
+        증분 동기화(since가 있을 때)는 DB에서 사라진 행도 인덱스에서 제거합니다.
+        다음 기준점은 조회 전에 sync_watermark()로 정하므로 조회 도중 커밋된 행은 다음 동기화에서 다시 읽습니다.
+        
+        Returns:
+            반영한 행 수 (추가/갱신 + 제거)
+        """
+        synced_at = self.db_service.sync_watermark()
+        count = 0
+        for rows in self.db_service.iter_institution_embeddings(since=since, version=self.version):
+            self.upsert_many(rows)
+            count += len(rows)
+        if since is not None:
+            count += self._remove_missing(self.db_service.fetch_institution_ids(self.version))
+        self._synced_at = synced_at
+        return count
+    
+    def refresh(self) -> int:
+        """
+        마지막 동기화 이후 DB 변경분 반영 (main의 주기 동기화에서 호출)
+        
+        on_write는 이 프로세스의 저장만 받으므로 다른 서버 / 재임베딩 / 스냅샷 가져오기 /
+        기관 삭제는 여기서 반영됩니다.
+        """
+        start = time.time()
+        changed = self.sync(since=self._synced_at)
+        if changed:
+            self.save()
+            logger.info(
+                f"🔄 벡터 인덱스 v{self.version} 동기화: {changed}개 반영 "
+                f"(현재 {self._count}개, {(time.time() - start) * 1000:.0f}ms)"
+            )
+        return changed
+    
+    def on_write(self, rows: List[Tuple[int, Optional[np.ndarray], dict]], version: Optional[int]):
+        """DatabaseService 저장 리스너: 이 인덱스 버전의 행만 반영 (version=None은 모든 버전의 metadata 갱신)"""
+        if version is None or version == self.version:
+            self.upsert_many(rows)
+    
+    def upsert_many(self, rows: List[Tuple[int, Optional[np.ndarray], dict]]):
+        """(institution_id, embedding, metadata) 행들을 추가/갱신 (embedding이 None이면 메타데이터만 갱신)"""
+        with self._lock:
+            if rows:
+                self._mark_dirty()
+            for institution_id, embedding, metadata in rows:
+                row = self._row_of.get(institution_id)
+                if embedding is None:
+                    if row is not None:
+                        self._unindex_metadata(row)
+                        self._metadata[row] = metadata
+                        self._index_metadata(row)
+                    continue
+                
+                vector = np.asarray(embedding, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    vector = vector / norm
+                
+                if row is None:
+                    if self._count == self._matrix.shape[0]:
+                        self._grow(self._matrix.shape[0] * 2)
+                    row = self._count
+                    self._count += 1
+                    self._row_of[institution_id] = row
+                    self._ids[row] = institution_id
+                    self._metadata.append(metadata)
+                else:
+                    self._unindex_metadata(row)
+                    self._metadata[row] = metadata
+                self._index_metadata(row)
+                
+                self._matrix[row] = vector
+                if self._codes is not None:
+                    self._codes[row] = quantize_int8(vector)
+    
+    def remove_many(self, institution_ids) -> int:
+        """institution_id들을 인덱스에서 제거 (마지막 행을 빈 자리로 옮겨 행렬을 연속으로 유지)"""
+        removed = 0
+        with self._lock:
+            for institution_id in institution_ids:
+                row = self._row_of.pop(int(institution_id), None)
+                if row is None:
+                    continue
+                
+                self._mark_dirty()
+                self._unindex_metadata(row)
+                last = self._count - 1
+                if row != last:
+                    moved_id = int(self._ids[last])
+                    self._unindex_metadata(last)
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved_id
+                    if self._codes is not None:
+                        self._codes[row] = self._codes[last]
+                    self._metadata[row] = self._metadata[last]
+                    self._row_of[moved_id] = row
+                    self._index_metadata(row)
+                
+                self._metadata.pop()
+                self._coords[last] = np.nan
+                self._count = last
+                removed += 1
+        return removed
+    
+    def _remove_missing(self, live_ids: np.ndarray) -> int:
+        """DB에 없는 institution_id를 인덱스에서 제거"""
+        live = set(live_ids.tolist())
+        with self._lock:
+            missing = [institution_id for institution_id in self._row_of if institution_id not in live]
+        return self.remove_many(missing)
+    
+    def search_similar_institutions(
+        self,
+        user_embedding: np.ndarray,
+        limit: int = 10,
+        min_similarity: float = 0.0,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[dict] = None,
+        version: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        DatabaseService.search_similar_institutions와 같은 형식으로 결과 반환
+        
+        임베딩이 정규화되어 있으므로 내적 = 코사인 유사도입니다.
+        전수 계산(exact)이므로 probes / ef_search는 사용하지 않습니다.
+        (originalText는 메모리에 두지 않으므로 None)
+        """
+        if version is not None and version != self.version:
+            raise ValueError(f"메모리 인덱스는 v{self.version}입니다 (요청: v{version}).")
+        query = np.asarray(user_embedding, dtype=np.float32)
+        
+        with self._lock:
+            n = self._count
+            mask = self._filter_mask(filters, n)
+            k = min(limit, n if mask is None else int(mask.sum()))
+            if k <= 0:
+                return []
+            
+            top, scores = self._top_k(query, n, k, mask)
+            
+            results = [
+                {
+                    "institutionId": int(self._ids[i]),
+                    "similarity": float(score),
+                    "metadata": self._metadata[i],
+                    "originalText": None
+                }
+                for i, score in zip(top, scores)
+                if score >= min_similarity
+            ]
+        
+        top_similarity = results[0]['similarity'] if results else 0
+        logger.info(f"✅ 유사 기관 검색 완료 (메모리 인덱스 v{self.version}): {len(results)}개 발견 (상위 유사도: {top_similarity:.4f})")
+        return results
+    
+    def search_many(
+        self,
+        user_embeddings: np.ndarray,
+        limits: List[int],
+        filters: List[Optional[dict]],
+        min_similarity: float = 0.0,
+        version: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """
+        여러 프로필을 한 번에 검색 (대량 추천용, 쿼리별 결과는 search_similar_institutions와 같은 형식)
+        
+        (쿼리 수, dim) 행렬과 기관 행렬의 곱 1번 + 행별 argpartition으로 top-k를 계산합니다.
+        필터가 같은 쿼리끼리는 마스크를 한 번만 만듭니다.
+        """
+        if version is not None and version != self.version:
+            raise ValueError(f"메모리 인덱스는 v{self.version}입니다 (요청: v{version}).")
+        queries = np.asarray(user_embeddings, dtype=np.float32)
+        
+        with self._lock:
+            n = self._count
+            k = min(max(limits, default=0), n)
+            if k <= 0:
+                return [[] for _ in limits]
+            
+            keys = [json.dumps(f, sort_keys=True, ensure_ascii=False) if f else None for f in filters]
+            masks_by_key = {}
+            for key, query_filters in zip(keys, filters):
+                if key not in masks_by_key:
+                    masks_by_key[key] = self._filter_mask(query_filters, n)
+            
+            top, scores = self._top_k_many(queries, n, k, [masks_by_key[key] for key in keys])
+            
+            results = []
+            for rows, row_scores, limit in zip(top, scores, limits):
+                results.append([
+                    {
+                        "institutionId": int(self._ids[i]),
+                        "similarity": float(score),
+                        "metadata": self._metadata[i],
+                        "originalText": None
+                    }
+                    for i, score in zip(rows[:limit], row_scores[:limit])
+                    # 필터로 제외된 행(-inf)은 결과에서 뺌
+                    if score >= min_similarity and np.isfinite(score)
+                ])
+        return results
+    
+    def _top_k_many(
+        self,
+        queries: np.ndarray,
+        n: int,
+        k: int,
+        masks: List[Optional[np.ndarray]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """쿼리별 상위 k개 행 번호와 코사인 유사도 ((Q, k), 유사도 내림차순, 마스크 밖은 -inf)"""
+        if self._codes is None:
+            scores = queries @ self._matrix[:n].T  # (Q, n)
+        else:
+            scores = int8_scores(self._codes[:n], queries).T
+        for q, mask in enumerate(masks):
+            if mask is not None:
+                scores[q, ~mask] = -np.inf
+        
+        if self._codes is not None:
+            # 1차: int8 근사 점수로 쿼리별 후보 선택 → 2차: 후보 행만 float32로 재계산
+            num_candidates = min(n, k * self.rerank_factor)
+            candidates = np.argpartition(-scores, num_candidates - 1, axis=1)[:, :num_candidates]
+            approx = np.take_along_axis(scores, candidates, axis=1)
+            scores = np.einsum("qd,qcd->qc", queries, self._matrix[candidates])
+            scores[~np.isfinite(approx)] = -np.inf
+        else:
+            candidates = None
+        
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        if candidates is not None:
+            top = np.take_along_axis(candidates, top, axis=1)
+        return top, top_scores
+    
+    def _top_k(
+        self,
+        query: np.ndarray,
+        n: int,
+        k: int,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """상위 k개 행 번호와 코사인 유사도 (유사도 내림차순, mask가 False인 행 제외)"""
+        if self._codes is None:
+            scores = self._matrix[:n] @ query
+            if mask is not None:
+                scores[~mask] = -np.inf
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return top, scores[top]
+        
+        # 1차: int8 근사 점수로 후보 선택 → 2차: 후보 행만 float32로 재계산
+        approx = int8_scores(self._codes[:n], query)
+        if mask is not None:
+            approx[~mask] = -np.inf
+        num_candidates = min(n, k * self.rerank_factor)
+        # 행 번호 순으로 정렬해 memmap을 순차적으로 읽음
+        candidates = np.sort(np.argpartition(-approx, num_candidates - 1)[:num_candidates])
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        exact = self._matrix[candidates] @ query
+        order = np.argsort(-exact)[:k]
+        return candidates[order], exact[order]
+    
+    def _filter_mask(self, filters: Optional[dict], n: int) -> Optional[np.ndarray]:
+        """검색 필터 → 행 마스크 (필터가 없으면 None)"""
+        if not filters:
+            return None
+        
+        mask = np.ones(n, dtype=bool)
+        
+        types = filters.get("institution_types")
+        if types:
+            allowed = set().union(*(self._postings.get(("type", value), set()) for value in types))
+            mask &= self._rows_mask(allowed, n)
+        
+        for field, key in (
+            ("specialized_diseases", "required_specialized_diseases"),
+            ("service_types", "required_service_types")
+        ):
+            for tag in filters.get(key) or []:
+                mask &= self._rows_mask(self._postings.get((field, tag), set()), n)
+        
+        excluded = [
+            self._row_of[institution_id]
+            for institution_id in filters.get("excluded_institution_ids") or []
+            if institution_id in self._row_of
+        ]
+        mask[excluded] = False
+        
+        prefix = filters.get("region_prefix")
+        if prefix:
+            rows = np.flatnonzero(mask)
+            keep = np.fromiter(
+                ((self._metadata[row].get("address") or "").startswith(prefix) for row in rows),
+                dtype=bool, count=len(rows)
+            )
+            mask[rows[~keep]] = False
+        
+        radius = filters.get("max_distance_km")
+        if radius is not None:
+            latitude, longitude = filters["origin_latitude"], filters["origin_longitude"]
+            min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius)
+            coords = self._coords[:n]
+            # 사각형으로 먼저 좁힌 뒤 남은 행만 실제 거리 계산 (NaN은 비교에서 False)
+            in_box = (
+                mask
+                & (coords[:, 0] >= min_lat) & (coords[:, 0] <= max_lat)
+                & (coords[:, 1] >= min_lon) & (coords[:, 1] <= max_lon)
+            )
+            rows = np.flatnonzero(in_box)
+            mask[:] = False
+            mask[rows] = haversine_km(latitude, longitude, coords[rows, 0], coords[rows, 1]) <= radius
+        
+        return mask
+    
+    @staticmethod
+    def _rows_mask(rows: Set[int], n: int) -> np.ndarray:
+        """행 번호 집합 → 길이 n 마스크"""
+        mask = np.zeros(n, dtype=bool)
+        if rows:
+            mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+        return mask
+    
+    def _index_metadata(self, row: int):
+        """행의 메타데이터를 필터 역색인과 좌표 배열에 추가"""
+        metadata = self._metadata[row] or {}
+        for key in self._posting_keys(metadata):
+            self._postings[key].add(row)
+        
+        latitude, longitude = metadata.get("latitude"), metadata.get("longitude")
+        if latitude is None or longitude is None:
+            self._coords[row] = np.nan
+        else:
+            self._coords[row] = (latitude, longitude)
+    
+    def _unindex_metadata(self, row: int):
+        """행의 기존 메타데이터를 필터 역색인에서 제거"""
+        for key in self._posting_keys(self._metadata[row]):
+            self._postings[key].discard(row)
+    
+    @staticmethod
+    def _posting_keys(metadata: Optional[dict]) -> List[Tuple[str, str]]:
+        """메타데이터 → 역색인 키 [(필드, 값), ...]"""
+        metadata = metadata or {}
+        keys = []
+        for field in POSTING_FIELDS:
+            values = metadata.get(field)
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            keys.extend((field, value) for value in values)
+        return keys
+    
+    def save(self):
+        """행렬 flush + 메타데이터 기록 후 manifest를 clean으로 기록 (이 시점의 파일들이 서로 일치함)"""
+        with self._lock:
+            if self._matrix is None or not self.persist:
+                return
+            self._matrix.flush()
+            self._ids.flush()
+            
+            metadata_path = os.path.join(self.index_dir, METADATA_FILE)
+            with open(metadata_path + ".tmp", "w", encoding="utf-8") as f:
+                for metadata in self._metadata:
+                    f.write(json.dumps(metadata, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(metadata_path + ".tmp", metadata_path)
+            
+            self._write_manifest(dirty=False)
+    
+    def _mark_dirty(self):
+        """파일을 제자리에서 바꾸기 전에 호출 (다음 save() 전에 종료되면 재시작 시 새로 빌드)"""
+        if self.persist and not self._dirty:
+            self._write_manifest(dirty=True)
+    
+    def _write_manifest(self, dirty: bool):
+        """manifest 원자적 기록 (임시 파일 + rename)"""
+        manifest = {
+            "dimension": self.dimension,
+            "count": self._count,
+            "synced_at": self._synced_at,
+            "dirty": dirty
+        }
+        manifest_path = self._path(MANIFEST_FILE)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+        self._dirty = dirty
+    
+    def stats(self) -> dict:
+        """/health에 노출할 인덱스 정보"""
+        capacity = self._matrix.shape[0] if self._matrix is not None else 0
+        return {
+            "version": self.version,
+            "count": self._count,
+            "capacity": capacity,
+            "quantization": self.quantization,
+            "matrix_mb": round(capacity * self.dimension * 4 / 1024 / 1024, 1),
+            "int8_codes_mb": round(self._codes.nbytes / 1024 / 1024, 1) if self._codes is not None else 0.0,
+            "synced_at": self._synced_at
+        }
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+    
+    def _open_existing(self) -> bool:
+        """저장된 인덱스 열기 (형식이 맞지 않으면 False)"""
+        try:
+            with open(self._path(MANIFEST_FILE), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["dimension"] != self.dimension:
+                logger.warning("⚠️ 벡터 인덱스 차원 불일치, 새로 빌드합니다.")
+                return False
+            if manifest.get("dirty"):
+                logger.warning("⚠️ 벡터 인덱스가 저장 도중 / 저장 전에 종료되어 파일이 어긋났을 수 있음, 새로 빌드합니다.")
+                return False
+            
+            matrix = np.load(self._path(EMBEDDINGS_FILE), mmap_mode="r+")
+            ids = np.load(self._path(IDS_FILE), mmap_mode="r+")
+            with open(self._path(METADATA_FILE), encoding="utf-8") as f:
+                metadata = [json.loads(line) for line in f]
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"저장된 벡터 인덱스 없음 또는 손상 ({str(e)}), 새로 빌드합니다.")
+            return False
+        
+        count = manifest["count"]
+        if len(metadata) != count or matrix.shape[0] < count:
+            logger.warning("⚠️ 벡터 인덱스 파일 불일치, 새로 빌드합니다.")
+            return False
+        
+        self._matrix = matrix
+        self._ids = ids
+        self._count = count
+        self._metadata = metadata
+        self._row_of = {int(institution_id): row for row, institution_id in enumerate(ids[:count])}
+        self._postings = defaultdict(set)
+        self._coords = np.full((matrix.shape[0], 2), np.nan)
+        for row in range(count):
+            self._index_metadata(row)
+        self._synced_at = manifest.get("synced_at")
+        self._build_codes()
+        return True
+    
+    def _allocate(self, capacity: int):
+        """빈 memmap 파일 생성 (persist=False면 메모리 배열)"""
+        if self.persist:
+            self._matrix = np.lib.format.open_memmap(
+                self._path(EMBEDDINGS_FILE), mode="w+", dtype=np.float32,
+                shape=(capacity, self.dimension)
+            )
+            self._ids = np.lib.format.open_memmap(
+                self._path(IDS_FILE), mode="w+", dtype=np.int64, shape=(capacity,)
+            )
+        else:
+            self._matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+            self._ids = np.zeros(capacity, dtype=np.int64)
+        self._count = 0
+        self._row_of = {}
+        self._metadata = []
+        self._postings = defaultdict(set)
+        self._coords = np.full((capacity, 2), np.nan)
+        self._build_codes()
+    
+    def _grow(self, capacity: int):
+        """용량 확장 (새 파일에 복사 후 교체, persist=False면 새 배열에 복사)"""
+        n = self._count
+        if self.persist:
+            matrix = np.lib.format.open_memmap(
+                self._path(EMBEDDINGS_FILE + ".tmp"), mode="w+", dtype=np.float32,
+                shape=(capacity, self.dimension)
+            )
+            ids = np.lib.format.open_memmap(
+                self._path(IDS_FILE + ".tmp"), mode="w+", dtype=np.int64, shape=(capacity,)
+            )
+        else:
+            matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+            ids = np.zeros(capacity, dtype=np.int64)
+        matrix[:n] = self._matrix[:n]
+        ids[:n] = self._ids[:n]
+        
+        if self.persist:
+            matrix.flush()
+            ids.flush()
+            del self._matrix, self._ids
+            os.replace(self._path(EMBEDDINGS_FILE + ".tmp"), self._path(EMBEDDINGS_FILE))
+            os.replace(self._path(IDS_FILE + ".tmp"), self._path(IDS_FILE))
+        self._matrix = matrix
+        self._ids = ids
+        
+        coords = np.full((capacity, 2), np.nan)
+        coords[:n] = self._coords[:n]
+        self._coords = coords
+        
+        if self._codes is not None:
+            codes = np.zeros((capacity, self.dimension), dtype=np.int8)
+            codes[:n] = self._codes[:n]
+            self._codes = codes
+    
+    def _build_codes(self):
+        """양자화 모드면 현재 행렬 전체를 int8로 변환 (메모리 상주, 파일 저장 안 함)"""
+        if self.quantization != "int8":
+            self._codes = None
+            return
+        
+        capacity = self._matrix.shape[0]
+        self._codes = np.zeros((capacity, self.dimension), dtype=np.int8)
+        for start in range(0, self._count, 4096):
+            end = min(start + 4096, self._count)
+            self._codes[start:end] = quantize_int8(self._matrix[start:end])
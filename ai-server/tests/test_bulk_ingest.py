@@ -0,0 +1,26 @@
+"""POST /api/v1/institutions/embeddings/bulk: 요청 검증 (모델 / DB 없이)"""
+from fastapi.testclient import TestClient
+
+import main
+
+
+def institution(institution_id: int) -> dict:
+    return {
+        "institutionId": institution_id,
+        "name": f"기관 {institution_id}",
+        "institutionType": "요양원",
+        "address": "서울시 송파구",
+    }
+
+
+def test_duplicate_institution_ids_rejected(monkeypatch):
+    # lifespan(모델 로드)을 실행하지 않으므로 준비 완료로 표시
+    monkeypatch.setattr(main, "ready", True)
+    client = TestClient(main.app)
+    response = client.post(
+        "/api/v1/institutions/embeddings/bulk",
+        json=[institution(1), institution(2), institution(1), institution(3), institution(2)]
+    )
+    
+    assert response.status_code == 422
+    assert "[1, 2]" in response.json()["detail"]
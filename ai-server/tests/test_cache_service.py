@@ -0,0 +1,154 @@
+"""services/cache_service: LRUTTLCache, SingleFlight"""
+import asyncio
+
+import pytest
+
+from services import cache_service
+from services.cache_service import LRUTTLCache, SingleFlight
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUTTLCache("test", maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a가 최근 사용
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_set_existing_key_updates_without_eviction():
+    cache = LRUTTLCache("test", maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+    assert cache.stats()["evictions"] == 0
+
+
+def test_ttl_expiry(clock):
+    cache = LRUTTLCache("test", maxsize=10, ttl_seconds=5)
+    cache.set("a", 1)
+    clock[0] += 4.9
+    assert cache.get("a") == 1
+    clock[0] += 0.2
+    assert cache.get("a") is None
+    
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["size"] == 0
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_zero_maxsize_disables_cache():
+    cache = LRUTTLCache("test", maxsize=0, ttl_seconds=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+        
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"value": calls}
+        
+        waiters = [asyncio.create_task(flight.run("key", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.stats()["in_flight"] == 1
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return flight, calls, results
+    
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 5, "coalesced": 4, "coalesced_rate": 0.8, "in_flight": 0}
+
+
+def test_single_flight_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight("test")
+        
+        async def compute(value):
+            await asyncio.sleep(0)
+            return value
+        
+        return await asyncio.gather(flight.run("a", lambda: compute(1)), flight.run("b", lambda: compute(2)))
+    
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_single_flight_propagates_errors_to_all_waiters():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+        
+        async def compute():
+            await release.wait()
+            raise RuntimeError("boom")
+        
+        waiters = [asyncio.create_task(flight.run("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return flight, await asyncio.gather(*waiters, return_exceptions=True)
+    
+    flight, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_does_not_retain_results():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = 0
+        
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return calls
+        
+        first = await flight.run("key", compute)
+        second = await flight.run("key", compute)
+        return first, second, flight
+    
+    first, second, flight = asyncio.run(scenario())
+    assert (first, second) == (1, 2)
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_single_flight_survives_first_caller_cancellation():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+        
+        async def compute():
+            await release.wait()
+            return "done"
+        
+        first = asyncio.create_task(flight.run("key", compute))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flight.run("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await second
+    
+    assert asyncio.run(scenario()) == "done"
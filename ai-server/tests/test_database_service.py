@@ -0,0 +1,122 @@
+"""services/database_service: 연결 오류 재시도 / 공유 데이터 버전 (Postgres 없이)"""
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+
+from services.database_service import DatabaseService
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, query, params=None):
+        self.db.queries.append(query)
+        if "nextval('institution_data_version')" in query:
+            self.db.sequence += 1
+            self.result = (self.db.sequence,)
+        elif "FROM institution_data_version" in query:
+            self.result = (self.db.sequence,)
+    
+    def fetchone(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+    
+    def cursor(self):
+        return FakeCursor(self.db)
+
+
+class SharedDB:
+    """여러 워커가 함께 보는 Postgres 시퀀스 흉내"""
+    
+    def __init__(self):
+        self.sequence = 0
+        self.queries = []
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setattr(DatabaseService, "connect", lambda self: None)
+    monkeypatch.setattr(DatabaseService, "refresh_active_version", lambda self: self.active_version)
+    monkeypatch.setattr(DatabaseService, "_check_vector_indexes", lambda self: None)
+    
+    def make(db: SharedDB) -> DatabaseService:
+        service = DatabaseService()
+        
+        @contextmanager
+        def connection():
+            yield FakeConnection(db)
+        
+        service.connection = connection
+        return service
+    
+    return make
+
+
+def test_write_in_one_worker_invalidates_other_workers(make_service):
+    db = SharedDB()
+    writer, reader = make_service(db), make_service(db)
+    writer.refresh_data_version()
+    reader.refresh_data_version()
+    writer_version, reader_version = writer.data_version, reader.data_version
+    
+    writer._bump_data_version()
+    assert writer.data_version > writer_version
+    assert reader.data_version == reader_version
+    
+    # 다른 워커는 다음 확인에서 반영, 쓴 워커는 자기 저장으로 한 번 더 올리지 않음
+    assert reader.refresh_data_version() > reader_version
+    bumped = writer.data_version
+    assert writer.refresh_data_version() == bumped
+    
+    # 변경이 없으면 그대로
+    unchanged = reader.data_version
+    assert reader.refresh_data_version() == unchanged
+
+
+def test_run_retries_only_idempotent_work(make_service, monkeypatch):
+    monkeypatch.setenv("DB_RECONNECT_BACKOFF", "0")
+    service = make_service(SharedDB())
+    calls = []
+    
+    def dropped_once(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return "ok"
+    
+    assert service._run(dropped_once) == "ok"
+    assert len(calls) == 2
+    
+    # 커밋됐는지 알 수 없는 INSERT는 다시 실행하지 않음
+    calls.clear()
+    with pytest.raises(psycopg2.OperationalError):
+        service._run(dropped_once, retry=False)
+    assert len(calls) == 1
+
+
+def test_create_embedding_job_is_not_retried(make_service, monkeypatch):
+    service = make_service(SharedDB())
+    inserts = []
+    
+    class DroppingCursor(FakeCursor):
+        def execute(self, query, params=None):
+            inserts.append(query)
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+    
+    monkeypatch.setattr(FakeConnection, "cursor", lambda self: DroppingCursor(self.db))
+    with pytest.raises(psycopg2.OperationalError):
+        service.create_embedding_job("all", None, False, True, 10, "server-1")
+    assert len(inserts) == 1
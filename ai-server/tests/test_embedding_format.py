@@ -0,0 +1,45 @@
+"""utils/embedding_format: 응답 임베딩 인코딩 → 디코딩 왕복"""
+import base64
+
+import numpy as np
+import pytest
+
+from utils.embedding_format import decode_embedding, encode_embedding
+
+
+@pytest.fixture
+def embedding():
+    vector = np.random.default_rng(0).standard_normal(1024).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_json_returns_float32_array(embedding):
+    value, dtype = encode_embedding(embedding.astype(np.float64))
+    assert dtype == "float32"
+    assert value.dtype == np.float32
+    np.testing.assert_array_equal(decode_embedding(value.tolist()), embedding)
+
+
+def test_base64_f32_is_lossless_little_endian(embedding):
+    value, dtype = encode_embedding(embedding, "base64-f32")
+    assert dtype == "float32"
+    assert len(value) == 5464
+    assert base64.b64decode(value)[:4] == embedding[:1].astype("<f4").tobytes()
+    np.testing.assert_array_equal(decode_embedding(value, "base64-f32"), embedding)
+
+
+def test_base64_f16_keeps_cosine(embedding):
+    value, dtype = encode_embedding(embedding, "base64-f16")
+    assert dtype == "float16"
+    assert len(value) == 2732
+    decoded = decode_embedding(value, "base64-f16")
+    assert decoded.dtype == np.float32
+    cosine = decoded @ embedding / np.linalg.norm(decoded)
+    assert cosine == pytest.approx(1.0, abs=1e-3)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        encode_embedding(np.zeros(4), "base64-i8")
+    with pytest.raises(ValueError):
+        decode_embedding("", "msgpack")
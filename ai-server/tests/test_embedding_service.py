@@ -0,0 +1,63 @@
+"""services/embedding_service: 길이 기준 배치 나누기 (모델 로드 없이)"""
+import numpy as np
+import pytest
+
+from services.embedding_service import EmbeddingService
+
+
+def make_service(max_batch_tokens: int) -> EmbeddingService:
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.max_batch_tokens = max_batch_tokens
+    return service
+
+
+def bucket_sizes(buckets):
+    return [bucket.stop - bucket.start for bucket in buckets]
+
+
+def assert_contiguous(buckets, total):
+    assert buckets[0].start == 0
+    assert buckets[-1].stop == total
+    for previous, current in zip(buckets, buckets[1:]):
+        assert previous.stop == current.start
+    assert all(bucket.stop > bucket.start for bucket in buckets)
+
+
+def test_batch_size_limit():
+    lengths = np.full(10, 8)
+    buckets = make_service(10_000)._length_buckets(lengths, batch_size=4)
+    assert bucket_sizes(buckets) == [4, 4, 2]
+    assert_contiguous(buckets, 10)
+
+
+def test_token_budget_limit():
+    # 패딩 길이(구간 마지막 원소) * 개수 <= 100
+    lengths = np.array([10, 10, 20, 20, 25, 50, 50, 100])
+    buckets = make_service(100)._length_buckets(lengths, batch_size=32)
+    assert_contiguous(buckets, len(lengths))
+    for bucket in buckets:
+        count = bucket.stop - bucket.start
+        assert count == 1 or lengths[bucket.stop - 1] * count <= 100
+    assert bucket_sizes(buckets) == [4, 2, 1, 1]
+
+
+def test_single_text_over_budget_gets_own_bucket():
+    lengths = np.array([5, 5, 500, 900])
+    buckets = make_service(100)._length_buckets(lengths, batch_size=32)
+    assert bucket_sizes(buckets) == [2, 1, 1]
+
+
+def test_single_text():
+    assert make_service(100)._length_buckets(np.array([7]), batch_size=32) == [slice(0, 1)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_lengths_respect_both_limits(seed):
+    rng = np.random.default_rng(seed)
+    lengths = np.sort(rng.integers(1, 512, size=300))
+    buckets = make_service(4096)._length_buckets(lengths, batch_size=16)
+    assert_contiguous(buckets, len(lengths))
+    for bucket in buckets:
+        count = bucket.stop - bucket.start
+        assert count <= 16
+        assert count == 1 or lengths[bucket.stop - 1] * count <= 4096
@@ -0,0 +1,81 @@
+"""utils/geo: 거리 / 반경 사각형 / 하이브리드 점수"""
+import math
+
+import numpy as np
+import pytest
+
+from utils.geo import EARTH_RADIUS_KM, bounding_box, haversine_km, hybrid_scores
+
+# 서울시청, 부산시청
+SEOUL = (37.5663, 126.9779)
+BUSAN = (35.1798, 129.0750)
+
+
+def test_haversine_known_distance():
+    distance = haversine_km(*SEOUL, np.array([BUSAN[0]]), np.array([BUSAN[1]]))[0]
+    assert distance == pytest.approx(325, abs=5)
+
+
+def test_haversine_zero_and_symmetric():
+    latitudes = np.array([SEOUL[0], BUSAN[0]])
+    longitudes = np.array([SEOUL[1], BUSAN[1]])
+    from_seoul = haversine_km(*SEOUL, latitudes, longitudes)
+    from_busan = haversine_km(*BUSAN, latitudes, longitudes)
+    
+    assert from_seoul[0] == pytest.approx(0.0, abs=1e-9)
+    assert from_seoul[1] == pytest.approx(from_busan[0])
+
+
+def test_haversine_one_degree_latitude():
+    distance = haversine_km(0.0, 0.0, np.array([1.0]), np.array([0.0]))[0]
+    assert distance == pytest.approx(EARTH_RADIUS_KM * math.pi / 180)
+
+
+def test_haversine_missing_coordinates_are_nan():
+    distances = haversine_km(*SEOUL, np.array([np.nan, SEOUL[0]]), np.array([np.nan, SEOUL[1]]))
+    assert np.isnan(distances[0])
+    assert distances[1] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_bounding_box_contains_circle():
+    radius = 10.0
+    min_lat, min_lon, max_lat, max_lon = bounding_box(*SEOUL, radius)
+    assert min_lat < SEOUL[0] < max_lat
+    assert min_lon < SEOUL[1] < max_lon
+    
+    # 원 위의 점들은 모두 사각형 안 (방위각마다 radius만큼 떨어진 점)
+    rng = np.random.default_rng(0)
+    lat1, lon1 = map(math.radians, SEOUL)
+    angular = radius / EARTH_RADIUS_KM
+    for bearing in rng.uniform(0, 2 * math.pi, 200):
+        lat2 = math.asin(math.sin(lat1) * math.cos(angular) + math.cos(lat1) * math.sin(angular) * math.cos(bearing))
+        lon2 = lon1 + math.atan2(
+            math.sin(bearing) * math.sin(angular) * math.cos(lat1),
+            math.cos(angular) - math.sin(lat1) * math.sin(lat2)
+        )
+        assert min_lat - 1e-9 <= math.degrees(lat2) <= max_lat + 1e-9
+        assert min_lon - 1e-9 <= math.degrees(lon2) <= max_lon + 1e-9
+
+
+def test_bounding_box_near_pole_and_antimeridian():
+    assert bounding_box(89.99, 10.0, 50.0)[1::2] == (-180.0, 180.0)
+    min_lat, min_lon, max_lat, max_lon = bounding_box(0.0, 179.99, 50.0)
+    assert (min_lon, max_lon) == (-180.0, 180.0)
+    assert min_lat < 0 < max_lat
+
+
+def test_hybrid_scores():
+    similarities = np.array([0.8, 0.8, 0.5])
+    distances = np.array([0.0, 10.0, np.nan])
+    scores = hybrid_scores(similarities, distances, distance_weight=0.3, decay_km=10.0)
+    
+    np.testing.assert_allclose(scores, [
+        0.7 * 0.8 + 0.3,
+        0.7 * 0.8 + 0.3 * math.exp(-1),
+        0.7 * 0.5,  # 좌표 없으면 거리 점수 0
+    ])
+
+
+def test_hybrid_scores_zero_weight_is_similarity():
+    similarities = np.array([0.9, 0.1])
+    np.testing.assert_allclose(hybrid_scores(similarities, np.array([100.0, 0.0]), 0.0, 10.0), similarities)
@@ -0,0 +1,52 @@
+"""services/inference_client: 응답 읽기 실패 시 재연결 (가짜 추론 서버 소켓)"""
+import asyncio
+import struct
+
+from services.inference_client import RemoteInferenceClient
+from utils.ipc import encode_frame, read_frame
+
+
+def test_reconnects_after_malformed_response(tmp_path, monkeypatch):
+    monkeypatch.setenv("INFERENCE_REQUEST_TIMEOUT", "5")
+    socket_path = str(tmp_path / "inference.sock")
+    
+    async def scenario():
+        connections = 0
+        
+        async def handle(reader, writer):
+            nonlocal connections
+            connections += 1
+            first = connections == 1
+            try:
+                while True:
+                    header, _ = await read_frame(reader)
+                    if first:
+                        # JSON이 아닌 헤더: 클라이언트의 응답 읽기 태스크가 실패함
+                        writer.write(struct.pack(">II", 3, 0) + b"{{{")
+                    else:
+                        writer.write(encode_frame({"id": header["id"], "ok": True, "stats": {"ok": True}}))
+                    await writer.drain()
+            except asyncio.IncompleteReadError:
+                pass
+            finally:
+                writer.close()
+        
+        server = await asyncio.start_unix_server(handle, path=socket_path)
+        client = RemoteInferenceClient(socket_path)
+        await client.start()
+        try:
+            first = await asyncio.gather(client.server_stats(), return_exceptions=True)
+            connected_after_error = client._connected()
+            second = await asyncio.wait_for(client.server_stats(), timeout=2)
+            return first[0], connected_after_error, second, client.reconnects, connections
+        finally:
+            await client.stop()
+            server.close()
+    
+    first, connected_after_error, second, reconnects, connections = asyncio.run(scenario())
+    
+    # 첫 요청은 타임아웃까지 기다리지 않고 바로 실패하고, 다음 요청은 새 연결로 성공
+    assert isinstance(first, ConnectionError)
+    assert not connected_after_error
+    assert second == {"ok": True}
+    assert (reconnects, connections) == (1, 2)
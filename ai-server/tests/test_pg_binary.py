@@ -0,0 +1,73 @@
+"""utils/pg_binary: COPY (FORMAT binary) 인코딩 → 디코딩 왕복"""
+import struct
+
+import numpy as np
+import pytest
+
+from utils.pg_binary import COPY_HEADER, COPY_TRAILER, decode_copy_rows, encode_copy_rows
+
+FIELD_TYPES = ("int8", "int4", "text", "bytea", "jsonb", "vector")
+
+
+def test_round_trip_all_types():
+    vector = np.linspace(-1, 1, 1024, dtype=np.float32)
+    rows = [
+        (
+            2**40, -7, "서울시 송파구 요양원", b"\x00\x01\xff",
+            {"name": "기관", "tags": ["치매", "주간보호"], "latitude": 37.5},
+            vector
+        ),
+        (1, 0, "", b"", [], np.zeros(4, dtype=np.float32)),
+    ]
+    
+    decoded = decode_copy_rows(encode_copy_rows(rows, FIELD_TYPES), FIELD_TYPES)
+    
+    assert len(decoded) == 2
+    for original, row in zip(rows, decoded):
+        assert row[:-1] == original[:-1]
+        assert row[-1].dtype == np.float32
+        np.testing.assert_array_equal(row[-1], original[-1])
+
+
+def test_null_fields():
+    rows = [(1, None, None, None, None, None)]
+    assert decode_copy_rows(encode_copy_rows(rows, FIELD_TYPES), FIELD_TYPES) == [tuple(rows[0])]
+
+
+def test_empty_payload():
+    payload = encode_copy_rows([], ("int8",))
+    assert payload == COPY_HEADER + COPY_TRAILER
+    assert decode_copy_rows(payload, ("int8",)) == []
+
+
+def test_vector_wire_format():
+    """pgvector vector_send: dim(uint16) + unused(uint16) + float32 big-endian"""
+    payload = encode_copy_rows([(np.array([1.0, -2.0], dtype=np.float32),)], ("vector",))
+    field = payload[len(COPY_HEADER) + 2:-len(COPY_TRAILER)]
+    assert field == struct.pack(">iHH", 12, 2, 0) + struct.pack(">ff", 1.0, -2.0)
+
+
+def test_sparsevec_wire_format():
+    """pgvector sparsevec_send: dim, nnz, unused (int32) + 오름차순 인덱스 + 값"""
+    payload = encode_copy_rows([((100, {9: 0.5, 2: 1.0}),)], ("sparsevec",))
+    field = payload[len(COPY_HEADER) + 2:-len(COPY_TRAILER)]
+    assert field == struct.pack(">iiii", 28, 100, 2, 0) + struct.pack(">ii", 2, 9) + struct.pack(">ff", 1.0, 0.5)
+
+
+def test_decode_ignores_extension_area():
+    payload = encode_copy_rows([(5,)], ("int4",))
+    signature_length = len(COPY_HEADER) - 8
+    with_extension = (
+        payload[:signature_length] + struct.pack(">ii", 0, 3) + b"abc" + payload[len(COPY_HEADER):]
+    )
+    assert decode_copy_rows(with_extension, ("int4",)) == [(5,)]
+
+
+def test_rejects_bad_signature():
+    with pytest.raises(ValueError):
+        decode_copy_rows(b"NOTCOPY" + b"\x00" * 16, ("int8",))
+
+
+def test_unsupported_type():
+    with pytest.raises(ValueError):
+        encode_copy_rows([(1.5,)], ("float8",))
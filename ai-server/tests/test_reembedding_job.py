@@ -0,0 +1,132 @@
+"""services/reembedding_job: 체크포인트 / heartbeat (DB / 모델 없이)"""
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from services.reembedding_job import ReembeddingJob
+
+
+class FakeDB:
+    """ReembeddingJob이 쓰는 DatabaseService 메서드만 흉내 (검색 v1 → 작업 v2)"""
+    active_version = 1
+    two_stage = False
+    
+    def __init__(self, rows, index_seconds=0.0):
+        self.rows = dict(rows)  # {institution_id: original_text}
+        self.index_seconds = index_seconds
+        self.events = []
+        self.activated = None
+        self.saved = []
+        self.checkpointed = {}  # 마지막으로 저장된 embedding_jobs 컬럼
+    
+    def fetch_reembedding_chunk(self, after_id, since, chunk_size, source_version, target_version):
+        ids = sorted(institution_id for institution_id in self.rows if institution_id > after_id)[:chunk_size]
+        return [(institution_id, self.rows[institution_id], {}, None, "2026-01-01 00:00:00") for institution_id in ids]
+    
+    def fetch_reembedding_rows(self, institution_ids, source_version, target_version):
+        ids = sorted(institution_id for institution_id in institution_ids if institution_id in self.rows)
+        return [(institution_id, self.rows[institution_id], {}, None, "2026-01-01 00:00:00") for institution_id in ids]
+    
+    def save_reembedded_batch(self, rows, source_version, target_version):
+        self.saved.extend(row[0] for row in rows)
+        return {row[0] for row in rows}
+    
+    def build_version_index(self, version):
+        self.events.append("build_start")
+        time.sleep(self.index_seconds)
+        self.events.append("build_end")
+    
+    def activate_version(self, version, force=False):
+        self.activated = version
+    
+    def checkpoint_embedding_job(self, job_id, finished=False, **fields):
+        self.events.append(("checkpoint", fields.get("status"), finished) if fields else "heartbeat")
+        self.checkpointed.update(fields)
+
+
+class FakeQueue:
+    async def encode_many(self, texts, version, batch_size=None, kind=None, lexical=False):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def make_job(**overrides) -> dict:
+    job = {
+        "job_id": 1, "mode": "all", "since": None, "force": False, "activate": True,
+        "embedding_version": 2, "status": "running", "error": None, "total": 0,
+        "last_institution_id": -1, "processed": 0, "reembedded": 0, "skipped": 0, "failed": 0,
+    }
+    job.update(overrides)
+    return job
+
+
+def run_job(db, job: dict) -> ReembeddingJob:
+    async def scenario():
+        reembedding_job = ReembeddingJob(db, FakeQueue(), job)
+        reembedding_job.start()
+        await reembedding_job._task
+        return reembedding_job
+    
+    return asyncio.run(scenario())
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setenv("REEMBEDDING_CHUNK_SIZE", "2")
+    monkeypatch.setenv("REEMBEDDING_ENCODE_CHUNK", "2")
+
+
+def test_completes_and_activates():
+    db = FakeDB({institution_id: f"기관 {institution_id}" for institution_id in range(1, 6)})
+    job = run_job(db, make_job(total=5))
+    
+    assert job.job["status"] == "completed"
+    assert (job.job["processed"], job.job["reembedded"], job.job["failed"]) == (5, 5, 0)
+    assert job.job["last_institution_id"] == 5
+    assert db.activated == 2
+    assert db.events[-1] == ("checkpoint", "completed", True)
+
+
+def test_heartbeat_continues_while_building_index(monkeypatch):
+    monkeypatch.setenv("REEMBEDDING_HEARTBEAT_SECONDS", "0.01")
+    db = FakeDB({1: "기관 1"}, index_seconds=0.2)
+    run_job(db, make_job(total=1))
+    
+    building = db.events[db.events.index("build_start"):db.events.index("build_end")]
+    assert building.count("heartbeat") >= 3
+    
+    # 작업이 끝나면 heartbeat도 멈춤
+    count = db.events.count("heartbeat")
+    time.sleep(0.05)
+    assert db.events.count("heartbeat") == count
+
+
+def test_failed_ids_are_persisted_and_retried_on_resume():
+    db = FakeDB({1: "기관 1", 2: "", 3: "기관 3", 4: "", 5: "기관 5"})
+    job = run_job(db, make_job(total=5))
+    
+    assert job.job["status"] == "failed"
+    assert (job.job["processed"], job.job["failed"]) == (5, 2)
+    assert db.checkpointed["failed_ids"] == [2, 4]
+    assert db.checkpointed["last_institution_id"] == 5
+    assert db.activated is None
+    
+    # 2번 데이터를 고친 뒤 재개 (claim_embedding_job이 돌려주는 행 = 마지막 체크포인트)
+    db.rows[2] = "기관 2"
+    db.saved = []
+    job = run_job(db, make_job(**dict(db.checkpointed, status="running", error=None)))
+    
+    assert db.saved == [2]
+    assert job.job["status"] == "failed"
+    assert (job.job["processed"], job.job["failed"]) == (5, 1)
+    assert db.checkpointed["failed_ids"] == [4]
+    
+    # 남은 4번은 삭제됨 → 더 시도할 기관이 없으므로 완료 후 전환
+    del db.rows[4]
+    job = run_job(db, make_job(**dict(db.checkpointed, status="running", error=None)))
+    
+    assert job.job["status"] == "completed"
+    assert (job.job["processed"], job.job["failed"]) == (5, 0)
+    assert db.checkpointed["failed_ids"] == []
+    assert db.activated == 2
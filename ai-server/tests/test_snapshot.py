@@ -0,0 +1,95 @@
+"""utils/snapshot: 스냅샷 인코더 → SnapshotDecoder 왕복"""
+import numpy as np
+import pytest
+
+from utils.snapshot import SnapshotDecoder, encode_chunk, encode_footer, encode_header
+
+DIMENSION = 8
+
+
+def make_rows(start: int, count: int):
+    rng = np.random.default_rng(start)
+    return [
+        (
+            institution_id,
+            rng.standard_normal(DIMENSION).astype(np.float32),
+            f"기관 {institution_id} 텍스트" if institution_id % 3 else None,
+            {"name": f"기관{institution_id}", "tags": ["치매"]} if institution_id % 2 else {},
+            f"hash-{institution_id}" if institution_id % 4 else None,
+        )
+        for institution_id in range(start, start + count)
+    ]
+
+
+def make_snapshot(chunks):
+    total = sum(len(rows) for rows in chunks)
+    return (
+        encode_header(3, DIMENSION, created_at="2026-01-01 00:00:00")
+        + b"".join(encode_chunk(rows, DIMENSION) for rows in chunks)
+        + encode_footer(total)
+    )
+
+
+def decode_all(payload: bytes, piece: int):
+    decoder = SnapshotDecoder()
+    rows = []
+    for start in range(0, len(payload), piece):
+        for chunk in decoder.feed(payload[start:start + piece]):
+            rows.extend(chunk)
+    return decoder, rows
+
+
+def assert_rows_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for (a_id, a_vec, a_text, a_meta, a_hash), (e_id, e_vec, e_text, e_meta, e_hash) in zip(actual, expected):
+        assert (a_id, a_text, a_meta, a_hash) == (e_id, e_text, e_meta, e_hash)
+        assert a_vec.dtype == np.float32
+        np.testing.assert_array_equal(a_vec, e_vec)
+
+
+@pytest.mark.parametrize("piece", [1, 7, 64, 1 << 20])
+def test_round_trip_any_feed_size(piece):
+    chunks = [make_rows(1, 5), make_rows(6, 1), make_rows(7, 12)]
+    decoder, rows = decode_all(make_snapshot(chunks), piece)
+    
+    assert decoder.header["embedding_version"] == 3
+    assert decoder.header["created_at"] == "2026-01-01 00:00:00"
+    assert decoder.dimension == DIMENSION
+    assert decoder.close() == {"rows": 18}
+    assert_rows_equal(rows, [row for chunk in chunks for row in chunk])
+
+
+def test_empty_snapshot():
+    decoder, rows = decode_all(make_snapshot([]), 5)
+    assert rows == []
+    assert decoder.close() == {"rows": 0}
+
+
+def test_truncated_snapshot_fails_on_close():
+    payload = make_snapshot([make_rows(1, 4), make_rows(5, 4)])
+    decoder, rows = decode_all(payload[:-3], 16)
+    with pytest.raises(ValueError, match="끊겼습니다"):
+        decoder.close()
+
+
+def test_bad_magic():
+    with pytest.raises(ValueError, match="MAGIC"):
+        SnapshotDecoder().feed(b"NOTASNAPSHOT" + b"\x00" * 16)
+
+
+def test_unsupported_format_version():
+    payload = bytearray(make_snapshot([make_rows(1, 1)]))
+    payload = bytes(payload).replace(b'"format_version":1', b'"format_version":9')
+    with pytest.raises(ValueError, match="지원하지 않는"):
+        SnapshotDecoder().feed(payload)
+
+
+def test_trailing_garbage_after_footer():
+    with pytest.raises(ValueError, match="footer"):
+        SnapshotDecoder().feed(make_snapshot([make_rows(1, 2)]) + b"x")
+
+
+def test_footer_row_count_mismatch():
+    payload = encode_header(1, DIMENSION) + encode_chunk(make_rows(1, 3), DIMENSION) + encode_footer(4)
+    with pytest.raises(ValueError, match="행 수"):
+        SnapshotDecoder().feed(payload)
@@ -0,0 +1,51 @@
+"""services/two_stage_retriever: RRF 융합"""
+import pytest
+
+from services.two_stage_retriever import TwoStageRetriever
+
+
+@pytest.fixture
+def retriever(monkeypatch):
+    monkeypatch.setenv("TWO_STAGE_RRF_K", "60")
+    return TwoStageRetriever(db_service=None)
+
+
+def test_fuse_prefers_ids_in_both_rankings(retriever):
+    fused = retriever._fuse([1, 2, 3], [4, 3, 5])
+    # 3은 dense 3위 + sparse 2위 → 1/63 + 1/62 로 1위
+    assert fused[0] == 3
+    assert set(fused) == {1, 2, 3, 4, 5}
+    assert len(fused) == 5
+
+
+def test_fuse_rank_order_within_single_list(retriever):
+    assert retriever._fuse([10, 20, 30], []) == [10, 20, 30]
+    assert retriever._fuse([], [7, 8]) == [7, 8]
+    assert retriever._fuse([], []) == []
+
+
+def test_fuse_scores_match_rrf_formula(retriever):
+    dense, sparse = [1, 2, 3, 4], [4, 1]
+    k = retriever.rrf_k
+    expected_scores = {
+        1: 1 / (k + 1) + 1 / (k + 2),
+        2: 1 / (k + 2),
+        3: 1 / (k + 3),
+        4: 1 / (k + 4) + 1 / (k + 1),
+    }
+    assert retriever._fuse(dense, sparse) == sorted(expected_scores, key=expected_scores.get, reverse=True)
+
+
+def test_fuse_small_k_rewards_top_ranks(monkeypatch):
+    monkeypatch.setenv("TWO_STAGE_RRF_K", "1")
+    retriever = TwoStageRetriever(db_service=None)
+    # k=1: dense 1위(1/2)가 양쪽 3위(1/4 + 1/4)와 같고, 2위들보다는 높음
+    fused = retriever._fuse([1, 2, 3], [9, 8, 3])
+    assert fused.index(1) < fused.index(2)
+    assert fused.index(9) < fused.index(8)
+
+
+def test_invalid_weights(monkeypatch):
+    monkeypatch.setenv("TWO_STAGE_WEIGHTS", "1.0,0.3")
+    with pytest.raises(ValueError):
+        TwoStageRetriever(db_service=None)
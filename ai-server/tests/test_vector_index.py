@@ -0,0 +1,250 @@
+"""services/vector_index: upsert / 필터 / 검색 / 디스크 재로드"""
+import numpy as np
+import pytest
+
+from services.vector_index import VectorIndex
+
+DIMENSION = 16
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeDB:
+    """iter_institution_embeddings / sync_watermark / fetch_institution_ids만 흉내"""
+    
+    def __init__(self, rows):
+        self.rows = dict(rows)
+        self.changed = set()
+    
+    def sync_watermark(self):
+        return "2026-01-01 00:00:00"
+    
+    def iter_institution_embeddings(self, since=None, chunk_size=1000, version=None):
+        ids = sorted(self.rows) if since is None else sorted(self.changed & set(self.rows))
+        self.changed = set()
+        for start in range(0, len(ids), 2):
+            yield [(institution_id, *self.rows[institution_id]) for institution_id in ids[start:start + 2]]
+    
+    def fetch_institution_ids(self, version=None):
+        return np.array(sorted(self.rows), dtype=np.int64)
+
+
+def metadata(type_, diseases=(), services=(), address="서울시 송파구", location=None):
+    data = {
+        "type": type_,
+        "specialized_diseases": list(diseases),
+        "service_types": list(services),
+        "address": address,
+    }
+    if location:
+        data["latitude"], data["longitude"] = location
+    return data
+
+
+@pytest.fixture(params=["none", "int8"])
+def index(request, tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_INDEX_QUANTIZATION", request.param)
+    rng = np.random.default_rng(0)
+    rows = {
+        1: (unit(rng.standard_normal(DIMENSION)), metadata("요양원", ["치매"], ["방문요양"], location=(37.50, 127.10))),
+        2: (unit(rng.standard_normal(DIMENSION)), metadata("주간보호센터", ["치매", "뇌졸중"], location=(37.51, 127.11))),
+        3: (unit(rng.standard_normal(DIMENSION)), metadata("요양원", ["당뇨"], address="부산시 해운대구", location=(35.16, 129.16))),
+        4: (unit(rng.standard_normal(DIMENSION)), metadata("요양병원", ["치매"], ["방문요양"])),
+        5: (unit(rng.standard_normal(DIMENSION)), metadata("요양원", location=(37.60, 127.00))),
+    }
+    index = VectorIndex(FakeDB(rows), version=1, index_dir=str(tmp_path), dimension=DIMENSION)
+    index.load()
+    return index
+
+
+def ids(results):
+    return [result["institutionId"] for result in results]
+
+
+def query_for(index, institution_id):
+    return index.db_service.rows[institution_id][0]
+
+
+def test_load_and_exact_match(index):
+    assert index.size == 5
+    for institution_id in index.db_service.rows:
+        top = index.search_similar_institutions(query_for(index, institution_id), limit=1, min_similarity=-1)[0]
+        assert top["institutionId"] == institution_id
+        assert top["similarity"] == pytest.approx(1.0, abs=1e-3)
+        assert top["originalText"] is None
+
+
+def test_results_sorted_and_limited(index):
+    results = index.search_similar_institutions(query_for(index, 1), limit=3, min_similarity=-1)
+    similarities = [result["similarity"] for result in results]
+    assert len(results) == 3
+    assert similarities == sorted(similarities, reverse=True)
+
+
+def test_min_similarity(index):
+    results = index.search_similar_institutions(query_for(index, 1), limit=5, min_similarity=0.99)
+    assert ids(results) == [1]
+
+
+def test_upsert_updates_vector_and_metadata(index):
+    new_vector = unit(np.arange(DIMENSION) + 1)
+    index.upsert_many([(3, new_vector, metadata("주간보호센터", ["치매"]))])
+    
+    assert index.size == 5
+    top = index.search_similar_institutions(new_vector, limit=1)[0]
+    assert top["institutionId"] == 3
+    assert top["metadata"]["type"] == "주간보호센터"
+    # 역색인도 갱신: 더 이상 요양원이 아님
+    results = index.search_similar_institutions(new_vector, limit=5, min_similarity=-1, filters={"institution_types": ["요양원"]})
+    assert 3 not in ids(results)
+
+
+def test_upsert_metadata_only(index):
+    index.upsert_many([(1, None, metadata("요양병원"))])
+    results = index.search_similar_institutions(query_for(index, 1), limit=1)
+    assert results[0]["institutionId"] == 1
+    assert results[0]["metadata"]["type"] == "요양병원"
+    # 없는 기관의 메타데이터 갱신은 무시
+    index.upsert_many([(99, None, metadata("요양원"))])
+    assert index.size == 5
+
+
+def test_upsert_grows_capacity(index):
+    rng = np.random.default_rng(1)
+    index.upsert_many([
+        (100 + i, unit(rng.standard_normal(DIMENSION)), metadata("요양원"))
+        for i in range(2000)
+    ])
+    assert index.size == 2005
+    target = unit(rng.standard_normal(DIMENSION))
+    index.upsert_many([(5000, target, metadata("요양원"))])
+    assert index.search_similar_institutions(target, limit=1)[0]["institutionId"] == 5000
+
+
+def test_reload_from_disk_applies_only_changes(index, tmp_path):
+    db = index.db_service
+    db.rows[6] = (unit(np.arange(DIMENSION) - 3), metadata("요양원"))
+    db.changed = {6}
+    
+    reopened = VectorIndex(db, version=1, index_dir=str(tmp_path), dimension=DIMENSION)
+    reopened.load()
+    
+    assert reopened.size == 6
+    for institution_id in db.rows:
+        assert reopened.search_similar_institutions(db.rows[institution_id][0], limit=1)[0]["institutionId"] == institution_id
+
+
+def test_persist_false_writes_no_files(tmp_path):
+    index = VectorIndex(FakeDB({1: (unit(np.ones(DIMENSION)), metadata("요양원"))}), version=1, index_dir=str(tmp_path / "memory"), dimension=DIMENSION, persist=False)
+    index.load()
+    assert index.size == 1
+    assert not (tmp_path / "memory").exists()
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"institution_types": ["요양원"]}, {1, 3, 5}),
+    ({"institution_types": ["요양원", "요양병원"]}, {1, 3, 4, 5}),
+    ({"required_specialized_diseases": ["치매"]}, {1, 2, 4}),
+    ({"required_specialized_diseases": ["치매", "뇌졸중"]}, {2}),
+    ({"required_service_types": ["방문요양"], "institution_types": ["요양원"]}, {1}),
+    ({"excluded_institution_ids": [1, 2, 42]}, {3, 4, 5}),
+    ({"region_prefix": "부산"}, {3}),
+    # 좌표 없는 기관(4)은 반경 필터에서 제외
+    ({"origin_latitude": 37.50, "origin_longitude": 127.10, "max_distance_km": 5}, {1, 2}),
+    ({"origin_latitude": 37.50, "origin_longitude": 127.10, "max_distance_km": 500}, {1, 2, 3, 5}),
+])
+def test_filters(index, filters, expected):
+    results = index.search_similar_institutions(query_for(index, 1), limit=10, min_similarity=-1, filters=filters)
+    assert set(ids(results)) == expected
+
+
+def test_filter_does_not_shrink_results(index):
+    # 필터 밖 기관이 상위에 있어도 필터에 맞는 기관으로 limit를 채움
+    results = index.search_similar_institutions(
+        query_for(index, 2), limit=2, min_similarity=-1, filters={"institution_types": ["요양원"]}
+    )
+    assert len(results) == 2
+    assert set(ids(results)) <= {1, 3, 5}
+
+
+def test_search_many_matches_single_search(index):
+    queries = np.stack([query_for(index, 1), query_for(index, 3), query_for(index, 4)])
+    filters = [None, {"institution_types": ["요양원"]}, {"required_specialized_diseases": ["치매"]}]
+    batched = index.search_many(queries, limits=[3, 2, 5], filters=filters, min_similarity=-1)
+    
+    for query, limit, query_filters, results in zip(queries, [3, 2, 5], filters, batched):
+        single = index.search_similar_institutions(query, limit=limit, min_similarity=-1, filters=query_filters)
+        assert ids(results) == ids(single)
+
+
+def test_version_mismatch(index):
+    with pytest.raises(ValueError):
+        index.search_similar_institutions(query_for(index, 1), version=2)
+
+
+def test_on_write_ignores_other_versions(index):
+    vector = unit(np.ones(DIMENSION))
+    index.on_write([(77, vector, metadata("요양원"))], version=2)
+    assert index.size == 5
+    index.on_write([(77, vector, metadata("요양원"))], version=1)
+    assert index.size == 6
+
+
+def test_remove_many_keeps_index_consistent(index):
+    assert index.remove_many([2, 99]) == 1
+    assert index.size == 4
+    for institution_id in (1, 3, 4, 5):
+        assert index.search_similar_institutions(query_for(index, institution_id), limit=1)[0]["institutionId"] == institution_id
+    results = index.search_similar_institutions(
+        query_for(index, 1), limit=10, min_similarity=-1, filters={"required_specialized_diseases": ["치매"]}
+    )
+    assert set(ids(results)) == {1, 4}
+
+
+def test_refresh_applies_changes_and_deletions(index):
+    db = index.db_service
+    del db.rows[1], db.rows[5]
+    db.rows[6] = (unit(np.arange(DIMENSION) - 3), metadata("요양원", ["치매"]))
+    db.rows[3] = (unit(np.arange(DIMENSION) * -1.0 + 2), metadata("요양원", ["치매"]))
+    db.changed = {3, 6}
+    
+    assert index.refresh() == 4
+    assert index.size == 4
+    for institution_id in db.rows:
+        assert index.search_similar_institutions(db.rows[institution_id][0], limit=1)[0]["institutionId"] == institution_id
+    results = index.search_similar_institutions(
+        db.rows[6][0], limit=10, min_similarity=-1, filters={"institution_types": ["요양원"]}
+    )
+    assert set(ids(results)) == {3, 6}
+    assert index.refresh() == 0
+
+
+def test_reload_rebuilds_after_unsaved_changes(index, tmp_path):
+    db = index.db_service
+    # 저장하지 않고 종료: 행렬 / id 파일은 바뀌었지만 metadata / manifest는 이전 상태
+    index.remove_many([1])
+    index._ids.flush()
+    del db.rows[1]
+    
+    reopened = VectorIndex(db, version=1, index_dir=str(tmp_path), dimension=DIMENSION)
+    reopened.load()
+    
+    assert reopened.size == 4
+    for institution_id in db.rows:
+        result = reopened.search_similar_institutions(db.rows[institution_id][0], limit=1)[0]
+        assert result["institutionId"] == institution_id
+        assert result["metadata"] == db.rows[institution_id][1]
+
+
+def test_save_marks_index_clean(index, tmp_path):
+    index.upsert_many([(6, unit(np.arange(DIMENSION) - 3), metadata("요양원"))])
+    index.save()
+    index.db_service.rows[6] = (unit(np.arange(DIMENSION) - 3), metadata("요양원"))
+    
+    reopened = VectorIndex(index.db_service, version=1, index_dir=str(tmp_path), dimension=DIMENSION)
+    reopened._allocate = None  # 새로 빌드하지 않고 파일을 그대로 열어야 함
+    reopened.load()
+    assert reopened.size == 6
@@ -0,0 +1,57 @@
+"""main.apply_active_version: 버전 전환 시 새 모델 워밍업 (모델 / DB 없이)"""
+import asyncio
+
+import main
+from services.inference_queue import InferenceQueue
+
+
+class FakeEncoder:
+    def __init__(self, events, name):
+        self.events = events
+        self.name = name
+    
+    def warm_up(self, seq_lengths, batch_sizes):
+        self.events.append(("warm_up", self.name, main.active_version))
+
+
+class FakeDB:
+    embedding_version = 1
+    
+    def refresh_active_version(self):
+        return 2
+    
+    def remove_write_listener(self, listener):
+        pass
+
+
+class FakeTagMatcher:
+    def __init__(self, events):
+        self.events = events
+    
+    async def prepare(self, version):
+        self.events.append(("prepare", version, main.active_version))
+    
+    def release(self, keep):
+        pass
+
+
+def test_new_version_is_warmed_up_before_switch(monkeypatch):
+    events = []
+    shared = FakeEncoder(events, "v1")
+    
+    def loader(versions, loaded):
+        return {version: FakeEncoder(events, f"v{version}") for version in versions}
+    
+    monkeypatch.setattr(main, "INFERENCE_MODE", "local")
+    monkeypatch.setattr(main, "db_service", FakeDB())
+    monkeypatch.setattr(main, "inference_queue", InferenceQueue({1: shared}, loader=loader))
+    monkeypatch.setattr(main, "tag_matcher", FakeTagMatcher(events))
+    monkeypatch.setattr(main, "active_version", 1)
+    monkeypatch.setattr(main, "vector_index", None)
+    monkeypatch.setattr(main, "bulk_index", None)
+    
+    asyncio.run(main.apply_active_version())
+    
+    # 새로 로드한 v2만 워밍업, active_version은 그 뒤에 바뀜
+    assert events == [("warm_up", "v2", 1), ("prepare", 2, 1)]
+    assert main.active_version == 2
@@ -0,0 +1,51 @@
+"""
+API 응답의 임베딩 인코딩
+
+기본(json)은 숫자 배열이고, 요청 시 base64로 압축된 바이트를 돌려줄 수 있습니다.
+    - json: [0.0123, -0.0456, ...] (1024차원 약 12~20KB)
+    - base64-f32: little-endian float32 바이트의 base64 (1024차원 5,464자, 손실 없음)
+    - base64-f16: little-endian float16 바이트의 base64 (1024차원 2,732자, 정규화 벡터의 코사인 오차 ~1e-4)
+
+응답에는 embeddingFormat / embeddingDtype가 함께 들어가므로 클라이언트는 그 값으로 디코딩합니다.
+    (Java) ByteBuffer.wrap(Base64.getDecoder().decode(s)).order(ByteOrder.LITTLE_ENDIAN).asFloatBuffer()
+    (Python) decode_embedding(s, "base64-f32")
+"""
+import base64
+from typing import Literal, Tuple, Union
+
+import numpy as np
+
+EmbeddingFormat = Literal["json", "base64-f32", "base64-f16"]
+
+# 포맷 → (바이트 dtype, 응답의 embeddingDtype)
+_BINARY_FORMATS = {
+    "base64-f32": (np.dtype("<f4"), "float32"),
+    "base64-f16": (np.dtype("<f2"), "float16"),
+}
+
+
+def encode_embedding(embedding: np.ndarray, embedding_format: str = "json") -> Tuple[Union[np.ndarray, str], str]:
+    """
+    임베딩 → (응답 값, dtype 이름)
+    
+    json은 float32 배열을 그대로 돌려주고 응답 클래스(orjson)가 직렬화합니다.
+    """
+    if embedding_format == "json":
+        return np.ascontiguousarray(embedding, dtype=np.float32), "float32"
+    if embedding_format not in _BINARY_FORMATS:
+        raise ValueError(f"지원하지 않는 임베딩 포맷입니다: {embedding_format}")
+    
+    dtype, dtype_name = _BINARY_FORMATS[embedding_format]
+    raw = np.asarray(embedding).astype(dtype, copy=False).tobytes()
+    return base64.b64encode(raw).decode("ascii"), dtype_name
+
+
+def decode_embedding(value: Union[list, str], embedding_format: str = "json") -> np.ndarray:
+    """encode_embedding의 역변환 (float32 배열)"""
+    if embedding_format == "json":
+        return np.asarray(value, dtype=np.float32)
+    if embedding_format not in _BINARY_FORMATS:
+        raise ValueError(f"지원하지 않는 임베딩 포맷입니다: {embedding_format}")
+    
+    dtype, _ = _BINARY_FORMATS[embedding_format]
+    return np.frombuffer(base64.b64decode(value), dtype=dtype).astype(np.float32)
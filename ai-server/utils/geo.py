@@ -0,0 +1,89 @@
+"""
+위치 기반 거리 계산 / 하이브리드 점수 유틸
+
+모든 함수는 numpy 배열 단위로 계산합니다 (후보 전체를 한 번에).
+좌표가 없는 기관은 NaN으로 두며, 거리도 NaN이 됩니다.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """기준점에서 각 좌표까지의 대원 거리 (km)"""
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - math.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    반경 radius_km 원을 포함하는 위경도 사각형 (min_lat, min_lon, max_lat, max_lon)
+    
+    극점 또는 날짜변경선에 걸리면 경도 범위를 전체로 넓힙니다 (반경 조건으로 다시 거름).
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = latitude - delta_lat
+    max_lat = latitude + delta_lat
+    
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    
+    delta_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude)))))
+    min_lon = longitude - delta_lon
+    max_lon = longitude + delta_lon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, -180.0, max_lat, 180.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def hybrid_scores(
+    similarities: np.ndarray,
+    distances_km: np.ndarray,
+    distance_weight: float,
+    decay_km: float
+) -> np.ndarray:
+    """
+    (1 - distance_weight) * 코사인 유사도 + distance_weight * exp(-거리 / decay_km)
+    
+    거리 점수는 0km에서 1, decay_km에서 약 0.37입니다. 좌표가 없으면 거리 점수 0.
+    """
+    proximity = np.exp(-np.nan_to_num(distances_km, nan=np.inf) / decay_km)
+    return (1 - distance_weight) * similarities + distance_weight * proximity
+
+
+def rank_by_distance(
+    results: List[Dict],
+    latitude: float,
+    longitude: float,
+    distance_weight: float,
+    decay_km: float,
+    max_distance_km: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    검색 결과(search_similar_institutions 형식)를 하이브리드 점수로 재정렬
+    
+    Returns:
+        (점수 내림차순 결과 인덱스, 결과별 거리 km 배열)
+        max_distance_km 밖이거나 좌표가 없는 기관은 반경 지정 시 인덱스에서 제외
+    """
+    count = len(results)
+    metadata = [result.get("metadata") or {} for result in results]
+    similarities = np.fromiter((result["similarity"] for result in results), dtype=np.float64, count=count)
+    latitudes = np.fromiter((m.get("latitude") if m.get("latitude") is not None else np.nan for m in metadata), dtype=np.float64, count=count)
+    longitudes = np.fromiter((m.get("longitude") if m.get("longitude") is not None else np.nan for m in metadata), dtype=np.float64, count=count)
+    
+    distances = haversine_km(latitude, longitude, latitudes, longitudes)
+    scores = hybrid_scores(similarities, distances, distance_weight, decay_km)
+    
+    if max_distance_km is not None:
+        scores[~(distances <= max_distance_km)] = -np.inf
+    order = np.argsort(-scores, kind="stable")
+    order = order[np.isfinite(scores[order])]
+    return order, distances
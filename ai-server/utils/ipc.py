@@ -0,0 +1,37 @@
+"""
+추론 서버 ↔ API 워커 간 Unix 소켓 프레임
+
+프레임 = 헤더 길이(uint32) + 본문 길이(uint32) + 헤더(JSON) + 본문(바이트)
+    요청: 헤더에 id / op / 텍스트 등, 본문 없음
+    응답: 헤더에 id / ok / shape, 본문은 임베딩 float32 바이트 (JSON 직렬화 없이 그대로)
+id로 요청과 응답을 짝지으므로 연결 하나에서 여러 요청을 동시에 주고받을 수 있습니다.
+"""
+import asyncio
+import json
+import struct
+from typing import Tuple
+
+# INFERENCE_SOCKET 기본값 (추론 서버와 API 워커가 같은 경로를 사용)
+DEFAULT_SOCKET = "/tmp/caring-inference.sock"
+
+_LENGTHS = struct.Struct(">II")
+
+# 헤더 크기 상한 (대량 등록 텍스트 묶음 포함)
+MAX_HEADER_BYTES = 64 * 1024 * 1024
+
+
+def encode_frame(header: dict, body: bytes = b"") -> bytes:
+    """헤더(dict) + 본문 → 프레임 바이트"""
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return _LENGTHS.pack(len(header_bytes), len(body)) + header_bytes + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    """프레임 하나 읽기 (연결이 끊기면 asyncio.IncompleteReadError)"""
+    header_length, body_length = _LENGTHS.unpack(await reader.readexactly(_LENGTHS.size))
+    if header_length > MAX_HEADER_BYTES:
+        raise ValueError(f"프레임 헤더가 너무 큽니다: {header_length} bytes")
+    
+    header = json.loads(await reader.readexactly(header_length))
+    body = await reader.readexactly(body_length) if body_length else b""
+    return header, body
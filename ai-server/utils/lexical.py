@@ -0,0 +1,130 @@
+"""
+bge-m3 sparse(어휘 가중치) / multi-vector(ColBERT) 표현 유틸
+
+bge-m3는 같은 forward pass의 토큰별 hidden state로 세 가지 표현을 만듭니다.
+    - dense: [CLS] 벡터 (기존 임베딩)
+    - sparse: 토큰마다 relu(sparse_linear(h)), 같은 토큰 id는 최댓값 → {token_id: weight}
+              점수 = 두 텍스트에 함께 있는 토큰의 가중치 곱의 합 (치매, 주간보호 같은 정확한 용어에 강함)
+    - colbert: [CLS]를 뺀 토큰마다 normalize(colbert_linear(h)) → (토큰 수, 1024)
+               점수 = 쿼리 토큰마다 문서 토큰과의 최대 내적을 구해 평균 (MaxSim)
+
+기관 multi-vector는 저장 크기를 줄이기 위해 인접 토큰을 평균해 max_tokens개 이하로 줄이고
+int8(utils/quantization)로 저장합니다 (1024차원 x 64토큰 = 64KB/기관).
+"""
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from utils.quantization import INT8_SCALE, quantize_int8
+
+# bge-m3 (XLM-RoBERTa) 어휘 크기 = sparsevec 차원
+SPARSE_DIMENSION = 250002
+
+
+class LexicalEmbedding(NamedTuple):
+    """텍스트 하나의 dense / sparse / multi-vector 표현"""
+    dense: np.ndarray  # (1024,) float32, 정규화
+    sparse: Dict[int, float]  # token_id → 가중치
+    colbert: np.ndarray  # (토큰 수, 1024) float32, 행마다 정규화
+
+
+def sparse_weights(
+    token_weights: np.ndarray,
+    input_ids: Sequence[int],
+    skip_ids: set,
+    max_terms: int = 0
+) -> Dict[int, float]:
+    """
+    토큰별 가중치 → {token_id: 최대 가중치} (특수 토큰 / 0 이하 제외)
+    
+    max_terms > 0이면 가중치가 큰 max_terms개만 남깁니다 (sparsevec HNSW 인덱스는 1000개 이하).
+    """
+    weights: Dict[int, float] = {}
+    for token_id, weight in zip(input_ids, token_weights.tolist()):
+        token_id = int(token_id)
+        if token_id in skip_ids or weight <= 0:
+            continue
+        if weight > weights.get(token_id, 0.0):
+            weights[token_id] = weight
+    if max_terms and len(weights) > max_terms:
+        weights = dict(sorted(weights.items(), key=lambda item: item[1], reverse=True)[:max_terms])
+    return weights
+
+
+def sparsevec_literal(weights: Dict[int, float], dimension: int = SPARSE_DIMENSION) -> str:
+    """{token_id: 가중치} → pgvector sparsevec 텍스트 ('{1:0.5,7:0.1}/250002', 인덱스는 1부터)"""
+    terms = ",".join(f"{token_id + 1}:{weight:.6g}" for token_id, weight in sorted(weights.items()))
+    return f"{{{terms}}}/{dimension}"
+
+
+def pool_tokens(vectors: np.ndarray, max_tokens: int) -> np.ndarray:
+    """
+    (토큰 수, dim) → 인접 토큰을 평균해 max_tokens개 이하로 줄이고 다시 정규화
+    
+    max_tokens가 0이거나 이미 작으면 그대로 반환합니다.
+    """
+    count = vectors.shape[0]
+    if not max_tokens or count <= max_tokens:
+        return vectors
+    bounds = np.linspace(0, count, max_tokens + 1).round().astype(np.int64)
+    pooled = np.add.reduceat(vectors, bounds[:-1], axis=0) / np.diff(bounds)[:, np.newaxis]
+    return normalize_rows(pooled.astype(np.float32))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def maxsim(query: np.ndarray, document: np.ndarray) -> float:
+    """ColBERT 점수: 쿼리 토큰마다 문서 토큰과의 최대 내적의 평균"""
+    if query.shape[0] == 0 or document.shape[0] == 0:
+        return 0.0
+    return float((query @ document.T).max(axis=1).mean())
+
+
+def colbert_to_int8(vectors: np.ndarray) -> bytes:
+    """(토큰 수, dim) float32 → int8 바이트 (BYTEA 저장용)"""
+    return quantize_int8(vectors).tobytes()
+
+
+def colbert_from_int8(data: bytes, dimension: int = 1024) -> np.ndarray:
+    """colbert_to_int8의 역변환 (근사 float32)"""
+    codes = np.frombuffer(data, dtype=np.int8).reshape(-1, dimension)
+    return codes.astype(np.float32) / INT8_SCALE
+
+
+def pack_lexical(embeddings: List[LexicalEmbedding]) -> Tuple[List[dict], bytes]:
+    """
+    추론 서버 응답용: (텍스트별 헤더, 본문)
+    
+    본문 = dense (N, dim) float32 + 각 텍스트의 colbert 행을 순서대로 이어 붙인 float32
+    헤더 = [{"sparse": [[token_id...], [weight...]], "tokens": colbert 행 수}, ...]
+    """
+    meta = [
+        {"sparse": [list(e.sparse.keys()), list(e.sparse.values())], "tokens": int(e.colbert.shape[0])}
+        for e in embeddings
+    ]
+    parts = [np.ascontiguousarray(np.stack([e.dense for e in embeddings]), dtype=np.float32).tobytes()]
+    parts.extend(np.ascontiguousarray(e.colbert, dtype=np.float32).tobytes() for e in embeddings)
+    return meta, b"".join(parts)
+
+
+def unpack_lexical(meta: List[dict], body: bytes, dimension: int = 1024) -> List[LexicalEmbedding]:
+    """pack_lexical의 역변환"""
+    values = np.frombuffer(body, dtype=np.float32)
+    dense = values[:len(meta) * dimension].reshape(len(meta), dimension)
+    offset = len(meta) * dimension
+    
+    embeddings = []
+    for i, item in enumerate(meta):
+        size = item["tokens"] * dimension
+        colbert = values[offset:offset + size].reshape(item["tokens"], dimension)
+        offset += size
+        token_ids, weights = item["sparse"]
+        embeddings.append(LexicalEmbedding(
+            dense=dense[i].copy(),
+            sparse={int(token_id): float(weight) for token_id, weight in zip(token_ids, weights)},
+            colbert=colbert.copy()
+        ))
+    return embeddings
@@ -0,0 +1,237 @@
+"""
+Prometheus 지표 + 요청 단계별 소요 시간 (GET /metrics, Server-Timing 헤더)
+
+요청 하나의 단계(text / embed / search / rank / serialize, DB 쿼리 등)는 stage()로 감싸면
+MetricsMiddleware가 요청이 끝날 때 엔드포인트(라우트 경로) 라벨로 히스토그램에 기록하고,
+응답 헤더 Server-Timing에 단계별 ms를 붙입니다.
+요청 밖(재임베딩 작업 등)에서 기록한 단계는 endpoint="background"로 바로 기록합니다.
+
+uvicorn 워커가 여러 개면 PROMETHEUS_MULTIPROC_DIR을 지정해 워커별 지표를 합쳐서 내보냅니다
+(scripts/start.sh가 설정).
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+
+# 단계 / 요청 소요 시간 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 요청 / 응답 본문 크기 (bytes)
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+# 추론 배치 크기
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# DB 쿼리 결과 행 수
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+REQUEST_SECONDS = Histogram(
+    "caring_request_duration_seconds", "요청 전체 소요 시간",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    "caring_request_stage_seconds", "요청 단계별 소요 시간",
+    ["endpoint", "stage"], buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "caring_stage_errors_total", "단계별 오류 수",
+    ["endpoint", "stage"]
+)
+REQUEST_BYTES = Histogram(
+    "caring_request_payload_bytes", "요청 본문 크기",
+    ["endpoint"], buckets=PAYLOAD_BUCKETS
+)
+RESPONSE_BYTES = Histogram(
+    "caring_response_payload_bytes", "응답 본문 크기",
+    ["endpoint"], buckets=PAYLOAD_BUCKETS
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "caring_inference_batch_size", "forward pass 한 번의 텍스트 수",
+    ["kind"], buckets=BATCH_BUCKETS
+)
+INFERENCE_QUEUE_WAIT = Histogram(
+    "caring_inference_queue_wait_seconds", "추론 요청이 배치로 실행되기까지 기다린 시간",
+    ["kind"], buckets=LATENCY_BUCKETS
+)
+INFERENCE_SECONDS = Histogram(
+    "caring_inference_seconds", "배치 추론(forward pass) 소요 시간",
+    ["kind"], buckets=LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "caring_db_query_seconds", "DB 작업 소요 시간 (커넥션 대기 포함)",
+    ["operation"], buckets=LATENCY_BUCKETS
+)
+DB_ROWS = Histogram(
+    "caring_db_rows", "DB 작업이 반환/저장한 행 수",
+    ["operation"], buckets=ROW_BUCKETS
+)
+COALESCED_REQUESTS = Counter(
+    "caring_coalesced_requests_total", "진행 중인 같은 계산에 합류한(새로 계산하지 않은) 요청 수",
+    ["name"]
+)
+
+# 요청 밖에서 기록한 단계의 endpoint 라벨
+BACKGROUND_ENDPOINT = "background"
+# 라우트가 없는 요청(404)의 endpoint 라벨 (경로를 그대로 라벨로 쓰지 않도록)
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+class RequestTimings:
+    """요청 하나의 단계별 누적 소요 시간 / 오류 단계 (같은 단계가 여러 번이면 합산)"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.errors: Dict[str, int] = {}
+    
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def error(self, name: str):
+        self.errors[name] = self.errors.get(name, 0) + 1
+    
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (예: embed;dur=12.3, search;dur=4.1, total;dur=20.5)"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+    
+    def observe(self, endpoint: str):
+        for name, seconds in self.stages.items():
+            STAGE_SECONDS.labels(endpoint, name).observe(seconds)
+        for name, count in self.errors.items():
+            STAGE_ERRORS.labels(endpoint, name).inc(count)
+
+
+# 현재 요청의 단계 기록 (요청 밖이면 None)
+# run_in_threadpool / create_task는 컨텍스트를 복사하므로 스레드에서 실행한 DB 작업도 같은 요청에 기록됨
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(name: str, seconds: float):
+    """단계 소요 시간 기록 (요청 안이면 요청 종료 시 함께, 밖이면 바로)"""
+    timings = _current.get()
+    if timings is None:
+        STAGE_SECONDS.labels(BACKGROUND_ENDPOINT, name).observe(seconds)
+    else:
+        timings.add(name, seconds)
+
+
+def record_stage_error(name: str):
+    timings = _current.get()
+    if timings is None:
+        STAGE_ERRORS.labels(BACKGROUND_ENDPOINT, name).inc()
+    else:
+        timings.error(name)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    with 블록을 단계 name으로 계측 (블록 안에서 await 가능)
+    
+    예외가 나면 단계 오류로 세고 그대로 다시 발생시킵니다.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_stage_error(name)
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def observe_db(operation: str, seconds: float, rows: Optional[int] = None):
+    """DB 작업 하나 기록 (요청 안이면 Server-Timing의 db 단계에도 합산)"""
+    DB_QUERY_SECONDS.labels(operation).observe(seconds)
+    if rows is not None:
+        DB_ROWS.labels(operation).observe(rows)
+    record_stage("db", seconds)
+
+
+def observe_inference(kind: str, batch_size: int, seconds: float):
+    INFERENCE_BATCH_SIZE.labels(kind).observe(batch_size)
+    INFERENCE_SECONDS.labels(kind).observe(seconds)
+
+
+def observe_queue_wait(kind: str, seconds: float):
+    INFERENCE_QUEUE_WAIT.labels(kind).observe(seconds)
+
+
+def record_coalesced(name: str):
+    COALESCED_REQUESTS.labels(name).inc()
+
+
+def render_metrics() -> tuple:
+    """(본문, Content-Type) — 멀티 프로세스 모드면 워커 전체를 합산"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    요청 전체 소요 시간 / 본문 크기 / 단계별 지표 기록 + Server-Timing 헤더 (ASGI 미들웨어)
+    
+    endpoint 라벨은 실제 경로가 아닌 라우트 경로(/api/v1/embeddings/batch-update/{job_id})를 사용합니다.
+    스트리밍 응답은 헤더를 먼저 보내므로 Server-Timing에는 그때까지의 단계만 들어가고,
+    이후 단계는 응답이 끝난 뒤 지표에만 기록됩니다.
+    """
+    
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        
+        timings = RequestTimings()
+        token = _current.set(timings)
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+        
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+        
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            endpoint = route.path if route is not None else UNMATCHED_ENDPOINT
+            
+            timings.observe(endpoint)
+            REQUEST_SECONDS.labels(endpoint, scope["method"], str(status)).observe(time.perf_counter() - timings.start)
+            REQUEST_BYTES.labels(endpoint).observe(request_bytes)
+            RESPONSE_BYTES.labels(endpoint).observe(response_bytes)
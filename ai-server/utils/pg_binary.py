@@ -0,0 +1,116 @@
+"""
+PostgreSQL COPY ... (FORMAT binary) 인코딩/디코딩
+
+psycopg2는 바인드 파라미터를 텍스트로만 보내므로, 대량 쓰기/읽기는
+binary COPY로 벡터를 float32 바이트 그대로 주고받습니다.
+
+지원 타입:
+    int4, int8, text, bytea, jsonb, vector / sparsevec (pgvector)
+"""
+import json
+import struct
+from typing import Any, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_HEADER = COPY_SIGNATURE + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+_NULL = struct.pack(">i", -1)
+
+
+def _encode_field(value: Any, field_type: str) -> bytes:
+    if value is None:
+        return _NULL
+    
+    if field_type == "int8":
+        data = struct.pack(">q", value)
+    elif field_type == "int4":
+        data = struct.pack(">i", value)
+    elif field_type == "text":
+        data = value.encode("utf-8")
+    elif field_type == "bytea":
+        data = bytes(value)
+    elif field_type == "jsonb":
+        # jsonb binary 형식: 버전 바이트(1) + JSON 텍스트
+        data = b"\x01" + json.dumps(value, ensure_ascii=False).encode("utf-8")
+    elif field_type == "vector":
+        # pgvector vector_send 형식: dim(uint16) + unused(uint16) + float32 big-endian
+        vector = np.asarray(value, dtype=">f4")
+        data = struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+    elif field_type == "sparsevec":
+        # pgvector sparsevec_send 형식: dim(int32) + nnz(int32) + unused(int32)
+        #                              + 0-based 인덱스 int32 * nnz + float32 값 * nnz (인덱스 오름차순)
+        dimension, weights = value
+        indices = sorted(weights)
+        data = (
+            struct.pack(">iii", dimension, len(indices), 0)
+            + np.asarray(indices, dtype=">i4").tobytes()
+            + np.asarray([weights[i] for i in indices], dtype=">f4").tobytes()
+        )
+    else:
+        raise ValueError(f"지원하지 않는 COPY 타입: {field_type}")
+    
+    return struct.pack(">i", len(data)) + data
+
+
+def _decode_field(data: memoryview, field_type: str) -> Any:
+    if field_type == "int8":
+        return struct.unpack(">q", data)[0]
+    if field_type == "int4":
+        return struct.unpack(">i", data)[0]
+    if field_type == "text":
+        return bytes(data).decode("utf-8")
+    if field_type == "bytea":
+        return bytes(data)
+    if field_type == "jsonb":
+        return json.loads(bytes(data[1:]).decode("utf-8"))
+    if field_type == "vector":
+        dim = struct.unpack_from(">H", data, 0)[0]
+        return np.frombuffer(data, dtype=">f4", count=dim, offset=4).astype(np.float32)
+    raise ValueError(f"지원하지 않는 COPY 타입: {field_type}")
+
+
+def encode_copy_rows(rows: Iterable[Sequence[Any]], field_types: Sequence[str]) -> bytes:
+    """행들을 COPY FROM STDIN (FORMAT binary) 입력 바이트로 변환"""
+    field_count = struct.pack(">h", len(field_types))
+    parts = [COPY_HEADER]
+    for row in rows:
+        parts.append(field_count)
+        for value, field_type in zip(row, field_types):
+            parts.append(_encode_field(value, field_type))
+    parts.append(COPY_TRAILER)
+    return b"".join(parts)
+
+
+def decode_copy_rows(payload: bytes, field_types: Sequence[str]) -> List[Tuple[Any, ...]]:
+    """COPY TO STDOUT (FORMAT binary) 출력 바이트를 행 튜플 리스트로 변환"""
+    if not payload.startswith(COPY_SIGNATURE):
+        raise ValueError("binary COPY 시그니처가 아닙니다.")
+    
+    view = memoryview(payload)
+    offset = len(COPY_SIGNATURE)
+    _flags, extension_length = struct.unpack_from(">ii", view, offset)
+    offset += 8 + extension_length
+    
+    rows = []
+    while True:
+        field_count = struct.unpack_from(">h", view, offset)[0]
+        offset += 2
+        if field_count == -1:
+            break
+        
+        row = []
+        for field_type in field_types[:field_count]:
+            length = struct.unpack_from(">i", view, offset)[0]
+            offset += 4
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(_decode_field(view[offset:offset + length], field_type))
+            offset += length
+        rows.append(tuple(row))
+    
+    return rows
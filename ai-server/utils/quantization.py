@@ -0,0 +1,32 @@
+"""
+임베딩 양자화 유틸
+
+정규화된 bge-m3 임베딩(각 성분이 -1~1)을 작은 표현으로 변환합니다.
+    - halfvec: float16 (2 bytes/dim)
+    - int8: 스칼라 양자화, x * 127 반올림 (1 byte/dim)
+    - binary: 부호 비트 (1 bit/dim), pgvector binary_quantize와 동일 (x > 0 → 1)
+"""
+import numpy as np
+
+INT8_SCALE = 127.0
+
+
+def quantize_int8(embeddings: np.ndarray) -> np.ndarray:
+    """float32 → int8 (행 단위 또는 단일 벡터)"""
+    return np.clip(np.rint(embeddings * INT8_SCALE), -127, 127).astype(np.int8)
+
+
+def int8_scores(codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """int8 행렬과 float32 쿼리의 근사 코사인 유사도 (쿼리가 (Q, dim) 행렬이면 (N, Q))"""
+    query_codes = quantize_int8(query).astype(np.int32)
+    return (codes.astype(np.int32) @ query_codes.T).astype(np.float32) / (INT8_SCALE * INT8_SCALE)
+
+
+def binary_codes(embeddings: np.ndarray) -> np.ndarray:
+    """float32 → 부호 비트를 8개씩 묶은 uint8 (dim / 8 bytes)"""
+    return np.packbits(embeddings > 0, axis=-1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """binary 코드 행렬과 쿼리 코드의 해밍 거리"""
+    return np.unpackbits(np.bitwise_xor(codes, query_code), axis=-1).sum(axis=-1)
@@ -0,0 +1,166 @@
+"""
+institution_embeddings 스냅샷 파일 형식 (.cemb)
+
+재임베딩 없이 환경 간(운영 → 스테이징, 새 리전) 임베딩을 옮기기 위한 형식입니다.
+청크 단위로 쓰고 읽으므로 코퍼스 크기와 관계없이 메모리는 청크 하나만큼만 사용합니다.
+    
+    MAGIC (8 bytes) + header 길이 (uint32) + header JSON
+    청크 * N:
+        행 수 n (uint32) + records 길이 (uint32)
+        벡터 블록: n x dimension float32 (little-endian, 행 순서 = records 순서)
+        records: 행마다 한 줄 JSON {"institution_id", "original_text", "metadata", "content_hash"}
+    끝: 행 수 0 (uint32) + footer 길이 (uint32) + footer JSON {"rows": 전체 행 수}
+
+정수는 모두 little-endian입니다. footer가 없으면 잘린 파일로 보고 실패합니다.
+"""
+import json
+import struct
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"CEMB\x00\x01\r\n"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_MEDIA_TYPE = "application/vnd.caring.embeddings"
+
+_LENGTH = struct.Struct("<I")
+_CHUNK_HEADER = struct.Struct("<II")
+_VECTOR_DTYPE = np.dtype("<f4")
+
+# (institution_id, embedding, original_text, metadata, content_hash)
+SnapshotRow = Tuple[int, np.ndarray, Optional[str], dict, Optional[str]]
+
+
+def _dump_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_header(embedding_version: int, dimension: int, **fields) -> bytes:
+    """파일 시작 (MAGIC + header JSON)"""
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "embedding_version": embedding_version,
+        "dimension": dimension,
+        "dtype": "float32",
+        **fields,
+    }
+    data = _dump_json(header)
+    return SNAPSHOT_MAGIC + _LENGTH.pack(len(data)) + data
+
+
+def encode_chunk(rows: Sequence[SnapshotRow], dimension: int) -> bytes:
+    """행들 → 청크 하나 (벡터 블록 + records)"""
+    vectors = np.empty((len(rows), dimension), dtype=_VECTOR_DTYPE)
+    records = []
+    for i, (institution_id, embedding, original_text, metadata, content_hash) in enumerate(rows):
+        vectors[i] = embedding
+        records.append(_dump_json({
+            "institution_id": institution_id,
+            "original_text": original_text,
+            "metadata": metadata,
+            "content_hash": content_hash,
+        }))
+    data = b"\n".join(records)
+    return _CHUNK_HEADER.pack(len(rows), len(data)) + vectors.tobytes() + data
+
+
+def encode_footer(total_rows: int) -> bytes:
+    data = _dump_json({"rows": total_rows})
+    return _CHUNK_HEADER.pack(0, len(data)) + data
+
+
+class SnapshotDecoder:
+    """
+    스냅샷 바이트 스트림의 점진적 디코더
+    
+    feed()에 임의 크기로 잘린 바이트를 넣으면 완성된 청크들을 행 리스트로 돌려주고,
+    처리한 바이트는 버퍼에서 버립니다 (버퍼는 최대 청크 하나 + 입력 한 조각).
+    """
+    
+    def __init__(self):
+        self.header: Optional[dict] = None
+        self.footer: Optional[dict] = None
+        self.rows = 0
+        self._buffer = bytearray()
+    
+    @property
+    def dimension(self) -> int:
+        return self.header["dimension"]
+    
+    def feed(self, data: bytes) -> List[List[SnapshotRow]]:
+        if self.footer is not None:
+            if data:
+                raise ValueError("스냅샷 끝(footer) 뒤에 데이터가 더 있습니다.")
+            return []
+        self._buffer += data
+        
+        chunks = []
+        if self.header is None and not self._read_header():
+            return chunks
+        while self.footer is None:
+            chunk = self._read_chunk()
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        if self.footer is not None and self._buffer:
+            raise ValueError("스냅샷 끝(footer) 뒤에 데이터가 더 있습니다.")
+        return chunks
+    
+    def close(self) -> dict:
+        """입력이 끝났을 때 호출, footer 확인 후 footer 반환"""
+        if self.footer is None:
+            raise ValueError(f"스냅샷이 중간에 끊겼습니다 ({self.rows}행까지 읽음).")
+        return self.footer
+    
+    def _read_header(self) -> bool:
+        prefix = len(SNAPSHOT_MAGIC) + _LENGTH.size
+        if len(self._buffer) < prefix:
+            return False
+        if bytes(self._buffer[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError("스냅샷 파일이 아닙니다 (MAGIC 불일치).")
+        
+        length = _LENGTH.unpack_from(self._buffer, len(SNAPSHOT_MAGIC))[0]
+        if len(self._buffer) < prefix + length:
+            return False
+        header = json.loads(bytes(self._buffer[prefix:prefix + length]).decode("utf-8"))
+        if header.get("format_version") != SNAPSHOT_FORMAT_VERSION or header.get("dtype") != "float32":
+            raise ValueError(f"지원하지 않는 스냅샷 형식입니다: {header}")
+        
+        self.header = header
+        del self._buffer[:prefix + length]
+        return True
+    
+    def _read_chunk(self) -> Optional[List[SnapshotRow]]:
+        if len(self._buffer) < _CHUNK_HEADER.size:
+            return None
+        count, records_length = _CHUNK_HEADER.unpack_from(self._buffer, 0)
+        vectors_length = count * self.dimension * _VECTOR_DTYPE.itemsize
+        end = _CHUNK_HEADER.size + vectors_length + records_length
+        if len(self._buffer) < end:
+            return None
+        
+        start = _CHUNK_HEADER.size
+        if count == 0:
+            self.footer = json.loads(bytes(self._buffer[start:end]).decode("utf-8"))
+            if self.footer.get("rows") != self.rows:
+                raise ValueError(f"스냅샷 행 수가 맞지 않습니다 (footer {self.footer.get('rows')}, 읽음 {self.rows}).")
+            del self._buffer[:end]
+            return None
+        
+        vectors = np.frombuffer(
+            self._buffer, dtype=_VECTOR_DTYPE, count=count * self.dimension, offset=start
+        ).reshape(count, self.dimension).astype(np.float32)
+        records = bytes(self._buffer[start + vectors_length:end]).decode("utf-8").split("\n")
+        if len(records) != count:
+            raise ValueError(f"스냅샷 청크의 벡터 수({count})와 레코드 수({len(records)})가 다릅니다.")
+        del self._buffer[:end]
+        
+        rows = []
+        for vector, line in zip(vectors, records):
+            record = json.loads(line)
+            rows.append((
+                record["institution_id"], vector, record.get("original_text"),
+                record.get("metadata") or {}, record.get("content_hash")
+            ))
+        self.rows += count
+        return rows
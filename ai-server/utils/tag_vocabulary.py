@@ -0,0 +1,51 @@
+"""
+기관 / 선호 태그 어휘 (Spring 태그 테이블과 동일, docs/test-institutions.md "태그 ID 참고")
+
+추천 이유의 태그 매칭(services/tag_matcher.py)은 이 닫힌 어휘의 임베딩을
+한 번만 계산해 두고 재사용합니다. 리뷰 태그는 기관 등록 요청에 포함되지 않으므로 제외합니다.
+"""
+from typing import Dict, List
+
+TAG_VOCABULARY: Dict[str, List[str]] = {
+    # 전문 질환 (SPECIALIZATION)
+    "specialized_diseases": [
+        "치매", "뇌졸중", "파킨슨병", "당뇨", "고혈압",
+        "욕창", "경관영양", "도뇨관", "호흡기질환", "암",
+        "재활", "정신건강", "완화케어", "골절", "관절염"
+    ],
+    # 서비스 (SERVICE)
+    "service_types": [
+        "주간보호", "단기보호", "장기요양",
+        "방문요양", "방문간호", "방문목욕", "재가돌봄", "식사배달",
+        "재활서비스", "의료서비스", "응급돌봄", "휴식돌봄"
+    ],
+    # 운영 특성 (OPERATION)
+    "operational_features": [
+        "여성전용", "남성전용", "남녀공용",
+        "치매전담", "자격증보유직원", "24시간간호사", "의사상주",
+        "영양사배치", "물리치료사", "주차가능", "셔틀버스",
+        "반려동물가능", "종교중립", "소규모", "대규모"
+    ],
+    # 환경 (ENVIRONMENT)
+    "facility_features": [
+        "엘리베이터", "휠체어접근가능", "개인실", "다인실",
+        "정원", "야외공간", "운동실", "재활치료실",
+        "오락실", "도서실", "예배실", "식당", "카페",
+        "의료실", "응급시스템", "CCTV", "화재안전시설",
+        "냉난방시설", "청결한시설", "신축건물"
+    ]
+}
+
+
+def normalize_tag(tag: str) -> str:
+    """비교용 태그 키 ("치매 전담" / "치매전담"처럼 띄어쓰기만 다른 태그를 같은 태그로)"""
+    return "".join(tag.split()).lower()
+
+
+def all_tags() -> List[str]:
+    """카테고리 순서대로 중복 없는 전체 태그"""
+    tags = {}
+    for category_tags in TAG_VOCABULARY.values():
+        for tag in category_tags:
+            tags.setdefault(normalize_tag(tag), tag)
+    return list(tags.values())
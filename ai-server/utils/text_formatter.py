@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 
 def create_institution_text(
@@ -48,6 +48,29 @@ def create_institution_text(
     return "\n".join(text_parts)
 
 
+def create_institution_text_from_metadata(metadata: dict) -> Optional[str]:
+    """
+    저장된 metadata로 기관 텍스트를 다시 생성 (템플릿 변경 후 재임베딩용)
+    
+    opening_hours / description이 metadata에 저장되기 전의 행이면 None
+    (원문을 복원할 수 없으므로 호출 측에서 original_text를 그대로 사용)
+    """
+    if "description" not in metadata:
+        return None
+    
+    return create_institution_text(
+        name=metadata.get("name") or "",
+        institution_type=metadata.get("type") or "",
+        address=metadata.get("address") or "",
+        specialized_diseases=metadata.get("specialized_diseases") or [],
+        service_types=metadata.get("service_types") or [],
+        operational_features=metadata.get("operational_features") or [],
+        facility_features=metadata.get("facility_features") or [],
+        opening_hours=metadata.get("opening_hours") or "",
+        description=metadata.get("description") or ""
+    )
+
+
 def create_user_profile_text(
     member_name: str,
     elderly_name: str,
@@ -151,3 +174,28 @@ def create_user_profile_text(
         text_parts.append(f"- 추가 요구사항: {additional_text}")
     
     return "\n".join(text_parts)
+
+
+def create_recommendation_reason(
+    exact_tags: List[str],
+    related_tags: List[Tuple[str, str]],
+    similarity: float,
+    max_tags: int = 3
+) -> str:
+    """
+    태그 매칭 결과 → 추천 이유 문장
+    
+    exact_tags: 기관이 그대로 갖춘 선호 태그
+    related_tags: (선호 태그, 관련 기관 태그)
+    일치하는 선호 태그가 없으면 프로필 유사도만 표시
+    """
+    parts = []
+    if exact_tags:
+        parts.append(f"선호하신 {', '.join(exact_tags[:max_tags])} 조건을 갖추고 있습니다.")
+    if related_tags:
+        related = ", ".join(f"{tag}({preferred} 관련)" for preferred, tag in related_tags[:max_tags])
+        parts.append(f"{related} 특성이 있습니다.")
+    
+    if not parts:
+        return f"유사도 {similarity:.2%}로 매칭되었습니다."
+    return " ".join(parts) + f" (프로필 유사도 {similarity:.0%})"
@@ -0,0 +1,33 @@
+-- 압축 임베딩 저장 (선택, pgvector 0.7 이상)
+-- AI 서버 EMBEDDING_STORAGE_MODE=halfvec 또는 binary 로 설정하기 전에 실행
+--   halfvec: float16 (2KB/행)
+--   int8: 스칼라 양자화 x*127 (1KB/행, 메모리 인덱스/내보내기용)
+--   binary: 부호 비트 (128B/행)
+-- 1차 후보 검색은 압축 컬럼, 최종 순위는 원본 embedding으로 다시 계산합니다.
+-- 모드별 메모리 / recall@k 비교: ai-server/benchmarks/quantization_benchmark.py
+
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS embedding_half halfvec(1024);
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS embedding_int8 BYTEA;
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS embedding_bin bit(1024);
+
+-- 기존 행 채우기 (embedding_int8은 AI 서버가 저장할 때 채워짐)
+UPDATE institution_embeddings
+SET embedding_half = embedding::halfvec(1024),
+    embedding_bin = binary_quantize(embedding)::bit(1024)
+WHERE embedding IS NOT NULL
+  AND (embedding_half IS NULL OR embedding_bin IS NULL);
+
+-- 1차 검색용 인덱스 (사용하는 모드의 인덱스만 생성, 임베딩 버전별 부분 인덱스)
+-- 새 버전 인덱스는 재임베딩 작업이 끝날 때 AI 서버가 같은 이름 규칙으로 생성
+-- EMBEDDING_STORAGE_MODE=halfvec
+DROP INDEX IF EXISTS idx_embedding_half_hnsw;
+CREATE INDEX IF NOT EXISTS idx_embedding_half_v1_hnsw 
+ON institution_embeddings 
+USING hnsw (embedding_half halfvec_cosine_ops)
+WHERE embedding_version = 1;
+
+-- EMBEDDING_STORAGE_MODE=binary
+-- CREATE INDEX IF NOT EXISTS idx_embedding_bin_v1_hnsw 
+-- ON institution_embeddings 
+-- USING hnsw (embedding_bin bit_hamming_ops)
+-- WHERE embedding_version = 1;
@@ -2,30 +2,91 @@
 CREATE EXTENSION IF NOT EXISTS vector;
 
 -- 기관 임베딩 테이블 (벡터 저장)
+-- 모델/템플릿 전환 중에는 한 기관에 버전별로 행이 하나씩 (institution_id, embedding_version)
 CREATE TABLE IF NOT EXISTS institution_embeddings (
     id BIGSERIAL PRIMARY KEY,
-    institution_id BIGINT NOT NULL UNIQUE,
+    institution_id BIGINT NOT NULL,
     embedding vector(1024),  -- bge-m3 모델 (1024차원)
     original_text TEXT,  -- 임베딩 생성에 사용된 원본 텍스트 (디버깅/추적용)
     metadata JSONB,  -- 기관 메타데이터
-    embedding_version INT DEFAULT 1,  -- 임베딩 버전 관리
+    embedding_version INT NOT NULL DEFAULT 1,  -- 임베딩 버전 (AI 서버 EMBEDDING_VERSION)
+    content_hash TEXT,  -- original_text의 SHA-256 (텍스트와 버전이 같으면 재임베딩 생략)
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+-- 기존 테이블 마이그레이션
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE institution_embeddings DROP CONSTRAINT IF EXISTS institution_embeddings_institution_id_key;
+UPDATE institution_embeddings SET embedding_version = 1 WHERE embedding_version IS NULL;
+ALTER TABLE institution_embeddings ALTER COLUMN embedding_version SET NOT NULL;
+
+-- 기관 + 버전별 1행 (AI 서버 UPSERT의 ON CONFLICT 대상)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_institution_version 
+ON institution_embeddings(institution_id, embedding_version);
+
+-- 검색에 사용하는 임베딩 버전 (1행)
+-- 새 버전 재임베딩 + 인덱스 생성이 끝나면 AI 서버가 active_version을 바꿔 한 번에 전환
+CREATE TABLE IF NOT EXISTS embedding_settings (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    active_version INT NOT NULL,
+    previous_version INT,
+    switched_at TIMESTAMP
+);
+INSERT INTO embedding_settings (id, active_version) VALUES (TRUE, 1) ON CONFLICT (id) DO NOTHING;
+
+-- 기관 데이터 버전: AI 서버가 기관 저장 / 삭제 / 버전 전환 후 nextval
+-- 모든 워커/서버가 주기적으로 last_value를 읽어 다른 곳의 저장으로 낡은 검색 결과 캐시를 무효화
+CREATE SEQUENCE IF NOT EXISTS institution_data_version;
+
 -- 벡터 유사도 검색용 인덱스 (IVFFlat)
-CREATE INDEX IF NOT EXISTS idx_embedding_ivfflat 
+-- 버전별 부분 인덱스: 새 버전 인덱스는 재임베딩 작업이 끝날 때 AI 서버가 같은 형식으로 생성
+-- (idx_embedding_v{버전}_ivfflat, CREATE INDEX CONCURRENTLY ... WHERE embedding_version = {버전})
+-- lists는 행 수 기준 약 rows / 1000 (100만 행 이상이면 sqrt(rows))
+-- 검색 시 ivfflat.probes (AI 서버: IVFFLAT_PROBES, 요청별 ivfflatProbes)로 recall 조절
+DROP INDEX IF EXISTS idx_embedding_ivfflat;
+CREATE INDEX IF NOT EXISTS idx_embedding_v1_ivfflat 
 ON institution_embeddings 
 USING ivfflat (embedding vector_cosine_ops) 
-WITH (lists = 100);
+WITH (lists = 100)
+WHERE embedding_version = 1;
+
+-- 벡터 유사도 검색용 인덱스 (HNSW, 선택)
+-- 빌드가 느리고 메모리를 더 쓰지만 같은 recall에서 검색이 빠름
+-- 사용 시 IVFFlat 인덱스를 삭제하고 AI 서버에 VECTOR_INDEX_TYPE=hnsw 설정
+-- 검색 시 hnsw.ef_search (AI 서버: HNSW_EF_SEARCH, 요청별 hnswEfSearch)로 recall 조절
+-- DROP INDEX IF EXISTS idx_embedding_v1_ivfflat;
+-- CREATE INDEX IF NOT EXISTS idx_embedding_v1_hnsw 
+-- ON institution_embeddings 
+-- USING hnsw (embedding vector_cosine_ops) 
+-- WITH (m = 16, ef_construction = 64)
+-- WHERE embedding_version = 1;
+
+-- 압축 임베딩 저장 (선택): database/quantized_storage.sql 참고
 
 -- 일반 인덱스
 CREATE INDEX IF NOT EXISTS idx_institution_id 
 ON institution_embeddings(institution_id);
 
+-- 추천 필터: 태그 포함 조건 (metadata @> '{"specialized_diseases": [...]}')
 CREATE INDEX IF NOT EXISTS idx_metadata 
 ON institution_embeddings USING GIN (metadata);
 
+-- 추천 필터: 기관 유형 (metadata->>'type' = ANY(...))
+CREATE INDEX IF NOT EXISTS idx_metadata_type 
+ON institution_embeddings ((metadata->>'type'));
+
+-- 추천 필터: 지역 접두어 (metadata->>'address' LIKE '서울시 송파구%')
+CREATE INDEX IF NOT EXISTS idx_metadata_address 
+ON institution_embeddings ((metadata->>'address') text_pattern_ops);
+
+-- 추천 필터: 반경 검색 (위경도 사각형 <@ box로 먼저 거른 뒤 실제 거리 확인)
+-- 식은 AI 서버 database_service.LOCATION_POINT와 같아야 함
+CREATE INDEX IF NOT EXISTS idx_metadata_location 
+ON institution_embeddings USING GIST (
+    point((metadata->>'longitude')::float8, (metadata->>'latitude')::float8)
+);
+
 -- 업데이트 시간 자동 갱신 함수
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -42,6 +103,32 @@ BEFORE UPDATE ON institution_embeddings
 FOR EACH ROW 
 EXECUTE FUNCTION update_updated_at_column();
 
+-- 재임베딩 작업 (POST /api/v1/embeddings/batch-update)
+-- 청크마다 체크포인트(last_institution_id, 카운터)와 heartbeat를 갱신하므로
+-- 서버가 재시작되어도 마지막으로 처리한 기관 다음부터 이어서 실행
+CREATE TABLE IF NOT EXISTS embedding_jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    mode TEXT NOT NULL,  -- all / modified_only
+    since TIMESTAMP,  -- modified_only 기준 시각
+    force BOOLEAN NOT NULL DEFAULT FALSE,  -- 텍스트/버전이 같아도 재임베딩
+    activate BOOLEAN NOT NULL DEFAULT FALSE,  -- 새 버전이면 완료 후 검색 버전까지 전환
+    embedding_version INT NOT NULL,  -- 이 작업이 기록하는 임베딩 버전
+    status TEXT NOT NULL DEFAULT 'running',  -- running / indexing / completed / failed / interrupted
+    total INT NOT NULL DEFAULT 0,
+    last_institution_id BIGINT NOT NULL DEFAULT -1,  -- 체크포인트
+    processed INT NOT NULL DEFAULT 0,
+    reembedded INT NOT NULL DEFAULT 0,
+    skipped INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    failed_ids BIGINT[] NOT NULL DEFAULT '{}',  -- 텍스트가 없어 임베딩하지 못한 기관 (resume 시 다시 시도)
+    owner TEXT,  -- 실행 중인 서버 (hostname:pid)
+    error TEXT,
+    started_at TIMESTAMP DEFAULT NOW(),
+    heartbeat_at TIMESTAMP DEFAULT NOW(),
+    finished_at TIMESTAMP
+);
+ALTER TABLE embedding_jobs ADD COLUMN IF NOT EXISTS failed_ids BIGINT[] NOT NULL DEFAULT '{}';
+
 -- 샘플 쿼리 예시 (주석)
 /*
 -- Top 10 유사 기관 검색 예시
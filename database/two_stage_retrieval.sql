@@ -0,0 +1,20 @@
+-- 2단계 검색용 sparse / multi-vector 저장 (선택, pgvector 0.7 이상)
+-- AI 서버 RETRIEVAL_MODE=two_stage 로 설정하기 전에 실행
+--   embedding_sparse: bge-m3 sparse 표현 (어휘 토큰 id → 가중치, 기관당 수백 개 이하)
+--   embedding_colbert: bge-m3 multi-vector, 인접 토큰 평균으로 MULTIVECTOR_MAX_TOKENS개 이하 x 1024 int8
+--   lexical_hash: 위 두 표현을 계산할 때의 content_hash (다르면 텍스트가 바뀐 것이므로 검색에서 제외)
+-- 1차 후보 = dense ANN + sparse 내적 상위 후보를 RRF로 합침,
+-- 상위 TWO_STAGE_RERANK_CANDIDATES개만 multi-vector(MaxSim)로 다시 정렬합니다.
+-- 기존 행 채우기: python -m scripts.build_lexical_index (ai-server 디렉토리에서)
+
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS embedding_sparse sparsevec(250002);
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS embedding_colbert BYTEA;
+ALTER TABLE institution_embeddings ADD COLUMN IF NOT EXISTS lexical_hash TEXT;
+
+-- sparse 후보 검색용 인덱스 (임베딩 버전별 부분 인덱스, 행당 0이 아닌 값 1000개 이하)
+-- 여기서는 v1만 만들고, 새 버전은 RETRIEVAL_MODE=two_stage에서 재임베딩 작업이 sparse / multi-vector를 채운 뒤
+-- idx_embedding_sparse_v{버전}_hnsw를 만듭니다 (채우기 / 인덱스가 끝나지 않은 버전은 전환 거부).
+CREATE INDEX IF NOT EXISTS idx_embedding_sparse_v1_hnsw 
+ON institution_embeddings 
+USING hnsw (embedding_sparse sparsevec_ip_ops)
+WHERE embedding_version = 1;